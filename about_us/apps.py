@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AboutUsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'about_us'
+
+    def ready(self):
+        # Подключаем обработчики сигналов, сбрасывающие кэш страницы «О нас».
+        from about_us import signals  # noqa: F401
@@ -0,0 +1,32 @@
+from about_us.models import MissionAndValues, RestaurantHistory, TeamMember
+from booking.caching import get_or_build
+from config.settings import CACHE_ENABLED
+
+# Пространство имен версионированного кэша страницы «О нас» (см. `booking.caching`).
+ABOUT_US_NAMESPACE = 'about_us'
+
+
+def get_about_us_content():
+    """
+    Получение содержимого страницы «О нас» с использованием кэширования.
+
+    В кэше процесса и Redis хранятся поля опубликованных истории, миссии и ценностей и
+    членов команды; объекты моделей восстанавливаются из них без запроса к базе данных.
+    Версия кэша увеличивается при изменении любой из моделей (см. `about_us.signals`).
+
+    Возвращаемое значение:
+        dict: Словарь с ключами `history`, `mission_and_values` и `team_members`.
+    """
+    def build():
+        return {
+            'history': RestaurantHistory.objects.filter(is_published=True).order_by('pk').values().first(),
+            'mission_and_values': MissionAndValues.objects.filter(is_published=True).order_by('pk').values().first(),
+            'team_members': list(TeamMember.objects.order_by('pk').values()),
+        }
+
+    data = get_or_build(ABOUT_US_NAMESPACE, 'content', build, local=True) if CACHE_ENABLED else build()
+    return {
+        'history': RestaurantHistory(**data['history']) if data['history'] else None,
+        'mission_and_values': MissionAndValues(**data['mission_and_values']) if data['mission_and_values'] else None,
+        'team_members': [TeamMember(**member) for member in data['team_members']],
+    }
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from about_us.models import MissionAndValues, RestaurantHistory, TeamMember
+from about_us.services import ABOUT_US_NAMESPACE
+from booking.caching import bump_generation
+
+
+@receiver(post_save, sender=RestaurantHistory)
+@receiver(post_delete, sender=RestaurantHistory)
+@receiver(post_save, sender=MissionAndValues)
+@receiver(post_delete, sender=MissionAndValues)
+@receiver(post_save, sender=TeamMember)
+@receiver(post_delete, sender=TeamMember)
+def invalidate_about_us(sender, instance, **kwargs):
+    """
+    Сбрасывает кэш страницы «О нас» при изменении её содержимого во всех процессах.
+    """
+    bump_generation(ABOUT_US_NAMESPACE, broadcast=True)
@@ -1,3 +1,53 @@
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+
+from about_us.models import MissionAndValues, RestaurantHistory, TeamMember
+from booking.caching import local_cache
+from config.query_budget import QueryBudgetTestMixin, views_without_budget
+
+
+@mock.patch('about_us.services.CACHE_ENABLED', True)
+class RestaurantPageViewTest(QueryBudgetTestMixin, TestCase):
+    """
+    Тесты для страницы «О нас» с кэшированием содержимого.
+    """
+
+    def setUp(self):
+        """
+        Создает историю, миссию и члена команды.
+        """
+        cache.clear()
+        local_cache.clear()
+        RestaurantHistory.objects.create(description='С 1998 года')
+        MissionAndValues.objects.create(mission='Кормить вкусно', values='Честность')
+        self.member = TeamMember.objects.create(name='Анна', position='Шеф', description='Повар')
+        self.url = reverse('about_us:about')
+
+    def test_page_served_from_cache(self):
+        """
+        Повторный показ страницы не обращается к базе данных.
+        """
+        response = self.client.get(self.url)
+        self.assertContains(response, 'С 1998 года')
+        self.assertContains(response, 'Анна - Шеф')
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_edit_invalidates_cache(self):
+        """
+        Изменение члена команды сразу видно на странице.
+        """
+        self.client.get(self.url)
+        self.member.position = 'Су-шеф'
+        self.member.save()
+        self.assertContains(self.client.get(self.url), 'Анна - Су-шеф')
 
-# Create your tests here.
+    def test_page_within_budget(self):
+        """
+        Страница укладывается в бюджет запросов при пустом кэше, у всех представлений задан бюджет.
+        """
+        self.assertEqual(views_without_budget('about_us'), [])
+        self.assertContains(self.assertQueryBudget(self.url), 'С 1998 года')
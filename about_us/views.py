@@ -1,8 +1,9 @@
 from django.views.generic import TemplateView
-from about_us.models import RestaurantHistory, MissionAndValues, TeamMember
+from about_us.services import get_about_us_content
+from config.db_router import ReplicaReadMixin
 
 
-class RestaurantPageView(TemplateView):
+class RestaurantPageView(ReplicaReadMixin, TemplateView):
     """
     Представление для отображения страницы о ресторане.
 
@@ -21,15 +22,16 @@ class RestaurantPageView(TemplateView):
           ресторане, которая была отмечена как опубликованная.
         - mission_and_values (MissionAndValues): Миссия и ценности ресторана.
           Включает информацию, которая была отмечена как опубликованная.
-        - team_members (QuerySet[TeamMember]): Список всех членов команды ресторана.
+        - team_members (list[TeamMember]): Список всех членов команды ресторана.
     """
+    query_budget = 5
     template_name = 'about_us/about_use.html'
 
     def get_context_data(self, **kwargs):
         """
         Метод для получения контекста данных, передаваемых в шаблон.
 
-        Получает следующие данные:
+        Получает следующие данные (из кэша, см. `about_us.services`):
         - history: История ресторана, отфильтрованная по признаку опубликованности.
         - mission_and_values: Миссия и ценности ресторана, отфильтрованные по
           признаку опубликованности.
@@ -42,7 +44,5 @@ class RestaurantPageView(TemplateView):
             dict: Словарь с контекстом данных для шаблона.
         """
         context = super().get_context_data(**kwargs)
-        context['history'] = RestaurantHistory.objects.filter(is_published=True).first()
-        context['mission_and_values'] = MissionAndValues.objects.filter(is_published=True).first()
-        context['team_members'] = TeamMember.objects.all()
+        context.update(get_about_us_content())
         return context
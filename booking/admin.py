@@ -1,13 +1,57 @@
 from django.contrib import admin
-from .models import Table, Booking, CoverImage
+from .models import Table, Booking, BookingTable, CoverImage, WaitlistEntry
+from .pagination import EstimatedCountPaginator
 
-# Регистрируем модель Table в админ-панели.
-# Эта модель будет доступна для просмотра и редактирования в административном интерфейсе Django.
-admin.site.register(Table)
 
-# Регистрируем модель Booking в админ-панели.
-# Эта модель будет доступна для просмотра и редактирования в административном интерфейсе Django.
-admin.site.register(Booking)
+@admin.register(Table)
+class TableAdmin(admin.ModelAdmin):
+    """
+    Административный интерфейс для модели Table.
+
+    Поиск по номеру нужен для выбора столов с автодополнением в бронированиях.
+    """
+    list_display = ['number', 'capacity']
+    search_fields = ['=number']
+
+
+class BookingTableInline(admin.TabularInline):
+    """
+    Встроенная форма столов бронирования.
+
+    Связь `Booking.tables` задана через промежуточную модель `BookingTable`, поэтому
+    столы бронирования редактируются в этой форме. Интервал занятости стола
+    заполняется автоматически из бронирования. Стол выбирается с автодополнением,
+    чтобы каждая строка формы не загружала список всех столов.
+    """
+    model = BookingTable
+    fields = ['table', 'start', 'end']
+    readonly_fields = ['start', 'end']
+    autocomplete_fields = ['table']
+    extra = 0
+
+
+@admin.register(Booking)
+class BookingAdmin(admin.ModelAdmin):
+    """
+    Административный интерфейс для модели Booking.
+
+    Рассчитан на большую таблицу бронирований:
+    - навигация по датам и фильтры используют индексы по дате и пользователю;
+    - количество строк для больших выборок берется из статистики PostgreSQL
+      (`EstimatedCountPaginator`), общее количество без фильтров не считается;
+    - пользователь выбирается с автодополнением, а не списком всех пользователей;
+    - поиск — только точный, по номеру бронирования и почте пользователя.
+    """
+    list_display = ['id', 'date', 'time', 'guests', 'name', 'customer_user']
+    list_select_related = ['customer_user']
+    date_hierarchy = 'date'
+    list_filter = ['date', ('customer_user', admin.EmptyFieldListFilter)]
+    search_fields = ['=id', '=customer_user__email']
+    ordering = ['-date', '-time', '-id']
+    autocomplete_fields = ['customer_user']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    inlines = [BookingTableInline]
 
 
 @admin.register(CoverImage)
@@ -20,3 +64,14 @@ class CoverImageAdmin(admin.ModelAdmin):
 
     # Поля, которые будут отображаться в списке объектов модели CoverImage
     list_display = ['title', 'image']
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    """
+    Административный интерфейс для листа ожидания.
+    """
+    list_display = ['date', 'time', 'guests', 'name', 'status', 'booking', 'created_at']
+    list_filter = ['status', 'date']
+    readonly_fields = ['booking', 'created_at']
+    autocomplete_fields = ['customer_user']
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BookingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'booking'
+
+    def ready(self):
+        # Подключаем обработчики сигналов, поддерживающие движок доступности столов.
+        from booking import signals  # noqa: F401
@@ -0,0 +1,231 @@
+import gzip
+import json
+import logging
+import os
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from booking.availability import availability_engine, publish_invalidation
+from booking.caching import bump_generation
+from booking.models import Booking, BookingTable, SlotOccupancy, Table
+from booking.month_availability import invalidate_months
+from booking.occupancy import build_slot_occupancies
+from booking.services import bookings_namespace
+from users.models import User
+
+logger = logging.getLogger(__name__)
+
+# Поля бронирования, которые записываются в архив без преобразования.
+ARCHIVED_FIELDS = ('id', 'guests', 'name', 'email', 'phone_number', 'comments', 'customer_user_id')
+
+
+def archive_cutoff(today=None, after_days=None):
+    """
+    Возвращает дату, бронирования до которой (не включая ее) переносятся в архив.
+
+    Аргументы:
+        today (date | None): Текущая дата.
+        after_days (int | None): Через сколько дней бронирование попадает в архив,
+            по умолчанию `BOOKING_ARCHIVE_AFTER_DAYS`.
+    """
+    if after_days is None:
+        after_days = settings.BOOKING_ARCHIVE_AFTER_DAYS
+    return (today or timezone.localdate()) - timedelta(days=after_days)
+
+
+def serialize_booking(booking):
+    """
+    Возвращает словарь бронирования со столами для строки архива.
+
+    Ожидает бронирование с предзагруженными строками `booking_tables`.
+    """
+    row = {field: getattr(booking, field) for field in ARCHIVED_FIELDS}
+    row.update(
+        date=booking.date.isoformat(),
+        time=booking.time.isoformat(),
+        duration=booking.duration.total_seconds(),
+        tables=[
+            {'table_id': item.table_id,
+             'start': item.start.isoformat() if item.start else None,
+             'end': item.end.isoformat() if item.end else None}
+            for item in booking.booking_tables.all()
+        ],
+    )
+    return row
+
+
+def iter_archive(path):
+    """
+    Построчно читает архив бронирований и возвращает словари строк.
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as archive:
+        for line in archive:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _invalidate_days(days):
+    """
+    Сбрасывает кэш бронирований, движок доступности и календарь месяцев на даты
+    (и следующие за ними дни — для бронирований после полуночи).
+    """
+    days = {shifted for day in days for shifted in (day, day + timedelta(days=1))}
+    if days:
+        bump_generation(*(bookings_namespace(day) for day in days))
+        availability_engine.invalidate(*days)
+        invalidate_months(*days)
+        transaction.on_commit(lambda: publish_invalidation(*days))
+
+
+def _delete_batch(ids, cutoff):
+    """
+    Удаляет пакет заархивированных бронирований вместе со строками столов и занятости слотов.
+
+    Удаление выполняется обычным `QuerySet.delete()`: Django каскадно удаляет
+    строки `BookingTable` и `SlotOccupancy` (ограничений внешнего ключа на
+    бронирования в базе данных нет), обнуляет ссылки листа ожидания, а сигналы
+    `post_delete` сбрасывают кэш бронирований, движок доступности и календарь
+    месяцев на даты пакета. Лист ожидания для прошедших бронирований не
+    переводится (см. `booking.signals.promote_waitlist_on_cancel`).
+    Бронирование, дата которого после выгрузки сдвинулась за `cutoff`, не удаляется.
+
+    Возвращает:
+        int: Количество удаленных бронирований.
+    """
+    with transaction.atomic():
+        _, deleted = Booking.objects.filter(pk__in=ids, date__lt=cutoff).delete()
+    return deleted.get(Booking._meta.label, 0)
+
+
+def archive_bookings(before=None, chunk_size=None, directory=None):
+    """
+    Переносит бронирования с датой раньше `before` в архив и удаляет их из базы данных.
+
+    Бронирования читаются потоково (`iterator(chunk_size=...)`) и записываются
+    по одному на строку JSON в сжатый gzip файл. Файл сначала пишется под
+    временным именем и переименовывается только после полной записи на диск,
+    затем бронирования удаляются пакетами по идентификаторам из готового архива,
+    поэтому удаляется только то, что уже сохранено.
+
+    Перед отсоединением секций `manage_booking_partitions` архивирует
+    бронирования до границы хранения секций тем же способом.
+
+    Аргументы:
+        before (date | None): Граница архивации, по умолчанию `archive_cutoff()`.
+        chunk_size (int | None): Размер пакета чтения и удаления, по умолчанию
+            `BOOKING_ARCHIVE_CHUNK_SIZE`.
+        directory (str | None): Каталог архивов, по умолчанию `BOOKING_ARCHIVE_DIR`.
+
+    Возвращает:
+        tuple[str | None, int]: Путь к архиву (None, если архивировать нечего) и
+        количество удаленных бронирований.
+    """
+    before = before or archive_cutoff()
+    chunk_size = chunk_size or settings.BOOKING_ARCHIVE_CHUNK_SIZE
+    directory = directory or settings.BOOKING_ARCHIVE_DIR
+
+    bookings = (Booking.objects.filter(date__lt=before).order_by('date', 'id')
+                .prefetch_related('booking_tables'))
+    if not bookings.exists():
+        return None, 0
+
+    os.makedirs(directory, exist_ok=True)
+    stamp = timezone.localtime().strftime('%Y%m%dT%H%M%S')
+    path = os.path.join(directory, f'bookings_before_{before.isoformat()}_{stamp}.jsonl.gz')
+    temporary_path = f'{path}.part'
+
+    archived = 0
+    with open(temporary_path, 'wb') as raw:
+        with gzip.open(raw, 'wt', encoding='utf-8') as archive:
+            for booking in bookings.iterator(chunk_size=chunk_size):
+                archive.write(json.dumps(serialize_booking(booking), ensure_ascii=False) + '\n')
+                archived += 1
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(temporary_path, path)
+    logger.info(f"В архив {path} записано бронирований: {archived}")
+
+    deleted = 0
+    for batch in _batches((row['id'] for row in iter_archive(path)), chunk_size):
+        deleted += _delete_batch(batch, before)
+    logger.info(f"Удалено заархивированных бронирований: {deleted}")
+    return path, deleted
+
+
+def _restore_batch(rows):
+    """
+    Восстанавливает пакет бронирований архива вместе со строками столов и занятостью слотов.
+
+    Бронирования, которые уже есть в базе данных, пропускаются. Ссылка на
+    удаленного с тех пор пользователя обнуляется, удаленные столы пропускаются.
+
+    Возвращает:
+        int: Количество восстановленных бронирований.
+    """
+    ids = [row['id'] for row in rows]
+    existing = set(Booking.objects.filter(pk__in=ids).values_list('pk', flat=True))
+    rows = [row for row in rows if row['id'] not in existing]
+    if not rows:
+        return 0
+    users = set(User.objects.filter(
+        pk__in={row['customer_user_id'] for row in rows if row['customer_user_id']}).values_list('pk', flat=True))
+    tables = set(Table.objects.filter(
+        pk__in={item['table_id'] for row in rows for item in row['tables']}).values_list('pk', flat=True))
+
+    bookings = []
+    booking_tables = []
+    for row in rows:
+        booking = Booking(**{field: row[field] for field in ARCHIVED_FIELDS})
+        booking.date = date.fromisoformat(row['date'])
+        booking.time = time.fromisoformat(row['time'])
+        booking.duration = timedelta(seconds=row['duration'])
+        if booking.customer_user_id not in users:
+            booking.customer_user_id = None
+        bookings.append(booking)
+        for item in row['tables']:
+            if item['table_id'] in tables:
+                booking_tables.append(BookingTable(
+                    booking_id=booking.id, table_id=item['table_id'],
+                    start=datetime.fromisoformat(item['start']) if item['start'] else None,
+                    end=datetime.fromisoformat(item['end']) if item['end'] else None,
+                ))
+
+    with transaction.atomic():
+        Booking.objects.bulk_create(bookings)
+        BookingTable.objects.bulk_create(booking_tables)
+        SlotOccupancy.objects.bulk_create(build_slot_occupancies(
+            BookingTable.objects.filter(booking_id__in=[booking.id for booking in bookings])
+            .only('id', 'table_id', 'start', 'end')))
+        _invalidate_days({booking.date for booking in bookings})
+    return len(bookings)
+
+
+def restore_archive(path, chunk_size=None):
+    """
+    Восстанавливает бронирования из архива `archive_bookings`.
+
+    Архив читается потоково и восстанавливается пакетами по `chunk_size` строк,
+    каждый пакет — в отдельной транзакции. Повторное восстановление того же
+    архива ничего не дублирует.
+
+    Возвращает:
+        int: Количество восстановленных бронирований.
+    """
+    chunk_size = chunk_size or settings.BOOKING_ARCHIVE_CHUNK_SIZE
+    restored = sum(_restore_batch(batch) for batch in _batches(iter_archive(path), chunk_size))
+    logger.info(f"Из архива {path} восстановлено бронирований: {restored}")
+    return restored
@@ -0,0 +1,51 @@
+def assign_tables(free_tables, guests):
+    """
+    Подбирает комбинацию свободных столов для компании гостей.
+
+    Выбирает столы с минимальным количеством пустых мест, при равенстве — с
+    минимальным количеством столов, а среди одинаковых по вместимости столов —
+    столы с меньшими номерами.
+
+    Столы одной вместимости взаимозаменяемы, поэтому задача решается как
+    ограниченный рюкзак по группам вместимостей: состояние — число занятых мест
+    (не больше `guests + максимальная вместимость - 1`, так как в оптимальной
+    комбинации любой стол можно убрать только ценой нехватки мест). Для зала на
+    несколько десятков столов это сотни операций, то есть десятки микросекунд.
+
+    Аргументы:
+        free_tables (list[TableInfo]): Свободные столы.
+        guests (int): Количество гостей.
+
+    Возвращает:
+        list: Идентификаторы выбранных столов, отсортированные по номеру стола,
+        или None, если свободных мест недостаточно.
+    """
+    if not guests or guests <= 0 or not free_tables:
+        return None
+
+    groups = {}
+    for table in sorted(free_tables, key=lambda item: (item.number, item.id)):
+        groups.setdefault(table.capacity, []).append(table)
+
+    capacities = sorted(groups)
+    limit = guests + capacities[-1] - 1
+
+    # Количество мест -> (количество столов, ((вместимость, сколько столов), ...)).
+    best = {0: (0, ())}
+    for capacity in capacities:
+        next_best = dict(best)
+        for seats, (count, used_groups) in best.items():
+            for used in range(1, len(groups[capacity]) + 1):
+                total = seats + used * capacity
+                if total > limit:
+                    break
+                if total not in next_best or count + used < next_best[total][0]:
+                    next_best[total] = (count + used, used_groups + ((capacity, used),))
+        best = next_best
+
+    for seats in range(guests, limit + 1):
+        if seats in best:
+            chosen = [table for capacity, used in best[seats][1] for table in groups[capacity][:used]]
+            chosen.sort(key=lambda item: (item.number, item.id))
+            return [table.id for table in chosen]
+    return None
@@ -0,0 +1,301 @@
+import threading
+import time as time_module
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from booking.invalidation import ensure_subscriber, publish
+from booking.models import SlotOccupancy, Table
+from config.db_router import primary_reads
+
+# Сетка бронирования: 48 получасовых слотов в сутках (как в поле `ReservationForm.time`).
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+DAY_MASK = (1 << SLOTS_PER_DAY) - 1
+DEFAULT_DURATION = timedelta(hours=2)
+
+TableInfo = namedtuple('TableInfo', ['id', 'number', 'capacity'])
+
+
+def parse_time(value):
+    """
+    Приводит время к объекту `time`.
+
+    :param value: Время в виде строки 'ЧЧ:ММ' или объекта `time`.
+    :return: Объект `time`.
+    :raises ValueError: Если строка не является корректным временем.
+    """
+    if isinstance(value, str):
+        return time.fromisoformat(value)
+    return value
+
+
+def slot_to_time(slot):
+    """
+    Возвращает время начала получасового слота.
+
+    :param slot: Номер слота от 0 до 47.
+    :return: Объект `time`.
+    """
+    return time(*divmod(slot * SLOT_MINUTES, 60))
+
+
+def time_to_slot(value):
+    """
+    Возвращает номер получасового слота, в который попадает указанное время.
+
+    :param value: Время в виде строки 'ЧЧ:ММ' или объекта `time`.
+    :return: Номер слота от 0 до 47.
+    """
+    value = parse_time(value)
+    return (value.hour * 60 + value.minute) // SLOT_MINUTES
+
+
+def booking_slots(start, duration=DEFAULT_DURATION):
+    """
+    Возвращает полуинтервал слотов [начало, конец), занятых бронированием.
+
+    Конец может выходить за пределы суток (больше 48), если бронирование
+    заканчивается после полуночи.
+
+    :param start: Время начала бронирования.
+    :param duration: Продолжительность бронирования.
+    :return: Кортеж (первый слот, слот после последнего).
+    """
+    start = parse_time(start)
+    start_minutes = start.hour * 60 + start.minute
+    end_minutes = start_minutes + int(duration.total_seconds() // 60)
+    first_slot = start_minutes // SLOT_MINUTES
+    last_slot = max(first_slot + 1, -(-end_minutes // SLOT_MINUTES))
+    return first_slot, last_slot
+
+
+def interval_masks(start, duration=DEFAULT_DURATION):
+    """
+    Возвращает битовые маски слотов бронирования.
+
+    :param start: Время начала бронирования.
+    :param duration: Продолжительность бронирования.
+    :return: Кортеж (маска текущего дня, маска следующего дня).
+    """
+    first_slot, last_slot = booking_slots(start, duration)
+    mask = ((1 << (last_slot - first_slot)) - 1) << first_slot
+    return mask & DAY_MASK, (mask >> SLOTS_PER_DAY) & DAY_MASK
+
+
+def period_slots(start, end):
+    """
+    Возвращает слоты, которые занимает интервал [start, end).
+
+    :param start: Начало интервала (datetime с часовым поясом).
+    :param end: Конец интервала (datetime с часовым поясом).
+    :return: Список кортежей (дата, номер слота) в местном времени.
+    """
+    start = timezone.localtime(start)
+    day = start.date()
+    day_start = timezone.make_aware(datetime.combine(day, time.min))
+    slot = timedelta(minutes=SLOT_MINUTES)
+    first_slot = (start - day_start) // slot
+    last_slot = max(first_slot + 1, -(-(end - day_start) // slot))
+    return [(day + timedelta(days=index // SLOTS_PER_DAY), index % SLOTS_PER_DAY)
+            for index in range(first_slot, last_slot)]
+
+
+class AvailabilityEngine:
+    """
+    Движок доступности столов на основе битовых масок.
+
+    Для каждой даты хранит словарь `{id стола: маска}`, где каждый из 48 бит
+    маски соответствует занятому получасовому слоту. Данные за дату загружаются
+    одним запросом к `SlotOccupancy` при первом обращении и дальше обслуживаются из памяти
+    процесса. Загрузка всегда читает основную БД, даже в представлениях с
+    `ReplicaReadMixin`: данные отстающей реплики остались бы в процессе до
+    истечения TTL. Сигналы моделей `Booking` и `Table` (см. `booking.signals`)
+    обновляют или сбрасывают затронутые даты в текущем процессе, а после
+    фиксации транзакции публикуют сброс этих дат для остальных процессов (веб-
+    и Celery) через `booking.invalidation` (см. `publish_invalidation`).
+    `AVAILABILITY_CACHE_TTL` ограничивает время жизни данных, изменённых в обход
+    сигналов или при потере события.
+
+    Методы:
+        tables(): Возвращает список столов ресторана.
+        day_masks(day): Возвращает маски занятости столов на дату.
+        free_tables(day, start, duration): Возвращает свободные столы на указанное время.
+        day_slots(day, duration): Возвращает свободные столы для каждого слота даты.
+        occupy(day, start, duration, table_ids): Отмечает столы занятыми.
+        invalidate(*days): Сбрасывает данные за указанные даты.
+        clear(): Сбрасывает все данные.
+    """
+
+    def __init__(self, ttl=None):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._days = {}
+        self._tables = None
+
+    @property
+    def ttl(self):
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'AVAILABILITY_CACHE_TTL', 60)
+
+    def tables(self):
+        """
+        Возвращает список столов, отсортированный по номеру.
+
+        :return: Кортеж объектов `TableInfo`.
+        """
+        # Подписка на события сброса кэша сбрасывает движок при изменении столов в других процессах.
+        ensure_subscriber()
+        now = time_module.monotonic()
+        with self._lock:
+            if self._tables is not None and self._tables[0] > now:
+                return self._tables[1]
+            generation = self._generation
+
+        # Данные хранятся в процессе до истечения TTL, поэтому читаются из основной БД, а не из реплики.
+        with primary_reads():
+            tables = tuple(TableInfo(*row) for row in Table.objects.order_by('number', 'id').values_list(
+                'id', 'number', 'capacity'))
+
+        with self._lock:
+            if generation == self._generation:
+                self._tables = (now + self.ttl, tables)
+        return tables
+
+    def day_masks(self, day):
+        """
+        Возвращает маски занятости столов на дату.
+
+        :param day: Дата.
+        :return: Словарь `{id стола: маска занятых слотов}`.
+        """
+        now = time_module.monotonic()
+        with self._lock:
+            entry = self._days.get(day)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+            generation = self._generation
+
+        with primary_reads():
+            masks = self._load_day(day)
+
+        with self._lock:
+            if generation == self._generation:
+                self._days[day] = (now + self.ttl, masks)
+        return masks
+
+    def free_tables(self, day, start, duration=DEFAULT_DURATION):
+        """
+        Возвращает столы, свободные на всём протяжении бронирования.
+
+        :param day: Дата бронирования.
+        :param start: Время начала бронирования ('ЧЧ:ММ' или `time`).
+        :param duration: Продолжительность бронирования.
+        :return: Список объектов `TableInfo`, отсортированный по номеру стола.
+        """
+        today_mask, next_day_mask = interval_masks(start, duration)
+        masks = self.day_masks(day)
+        next_day_masks = self.day_masks(day + timedelta(days=1)) if next_day_mask else {}
+        return [
+            table for table in self.tables()
+            if not masks.get(table.id, 0) & today_mask
+            and not next_day_masks.get(table.id, 0) & next_day_mask
+        ]
+
+    def day_slots(self, day, duration=DEFAULT_DURATION):
+        """
+        Возвращает свободные столы для каждого из 48 слотов даты.
+
+        Маски даты и следующего дня склеиваются в одно 96-битное число на стол,
+        после чего проверка слота сводится к одной побитовой операции.
+
+        :param day: Дата.
+        :param duration: Продолжительность бронирования.
+        :return: Список из 48 списков объектов `TableInfo`.
+        """
+        first_slot, last_slot = booking_slots(time.min, duration)
+        window = (1 << (last_slot - first_slot)) - 1
+        masks = self.day_masks(day)
+        next_day_masks = self.day_masks(day + timedelta(days=1))
+        occupancy = [
+            (table, masks.get(table.id, 0) | (next_day_masks.get(table.id, 0) << SLOTS_PER_DAY))
+            for table in self.tables()
+        ]
+        return [
+            [table for table, mask in occupancy if not mask & (window << slot)]
+            for slot in range(SLOTS_PER_DAY)
+        ]
+
+    def occupy(self, day, start, duration, table_ids):
+        """
+        Отмечает столы занятыми в уже загруженных датах.
+
+        :param day: Дата бронирования.
+        :param start: Время начала бронирования.
+        :param duration: Продолжительность бронирования.
+        :param table_ids: Идентификаторы столов.
+        """
+        today_mask, next_day_mask = interval_masks(start, duration)
+        with self._lock:
+            for current_day, mask in ((day, today_mask), (day + timedelta(days=1), next_day_mask)):
+                entry = self._days.get(current_day)
+                if not mask or entry is None:
+                    continue
+                masks = dict(entry[1])
+                for table_id in table_ids:
+                    masks[table_id] = masks.get(table_id, 0) | mask
+                self._days[current_day] = (entry[0], masks)
+
+    def invalidate(self, *days):
+        """
+        Сбрасывает данные за указанные даты.
+
+        :param days: Даты, данные за которые нужно перечитать из базы.
+        """
+        with self._lock:
+            self._generation += 1
+            for day in days:
+                self._days.pop(day, None)
+
+    def clear(self):
+        """
+        Сбрасывает все загруженные даты и список столов.
+        """
+        with self._lock:
+            self._generation += 1
+            self._days.clear()
+            self._tables = None
+
+    @staticmethod
+    def _load_day(day):
+        # Один запрос по индексу (date, slot, table) к предрассчитанной занятости слотов.
+        masks = {}
+        for table_id, slot in SlotOccupancy.objects.filter(date=day).values_list('table_id', 'slot'):
+            masks[table_id] = masks.get(table_id, 0) | (1 << slot)
+        return masks
+
+
+availability_engine = AvailabilityEngine()
+
+# Префикс пространств имен событий сброса дат движка доступности в других процессах.
+AVAILABILITY_NAMESPACE_PREFIX = 'availability:'
+
+
+def availability_namespace(day):
+    """
+    Возвращает пространство имен события сброса даты движка доступности.
+    """
+    return f'{AVAILABILITY_NAMESPACE_PREFIX}{day.isoformat()}'
+
+
+def publish_invalidation(*days):
+    """
+    Публикует сброс дат движка доступности для остальных процессов.
+
+    Вызывается после фиксации транзакции, изменившей бронирования этих дат.
+    """
+    publish(*(availability_namespace(day) for day in sorted(set(days))))
@@ -0,0 +1,187 @@
+import bisect
+import pickle
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+# Верхние границы интервалов гистограммы задержек в миллисекундах.
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250)
+
+
+def key_prefix(key):
+    """
+    Возвращает префикс ключа кэша (часть до первого двоеточия), по которому группируется статистика.
+    """
+    return str(key).split(':', 1)[0]
+
+
+def _size(value):
+    # Размер значения в байтах pickle, как его сохраняют бэкенды Django.
+    return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+
+def latency_bucket(elapsed_ms):
+    """
+    Возвращает подпись интервала гистограммы задержек для времени вызова.
+    """
+    index = bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)
+    return f'le_{LATENCY_BUCKETS_MS[index]}' if index < len(LATENCY_BUCKETS_MS) else 'inf'
+
+
+class InstrumentedCacheMixin:
+    """
+    Примесь к бэкенду кэша, собирающая статистику вызовов по префиксам ключей.
+
+    Для каждого префикса считаются попадания и промахи чтения, количество и
+    суммарный размер записей (в байтах pickle) и гистограмма задержек каждой
+    операции. Счетчики копятся в памяти процесса и раз в
+    `CACHE_STATS_FLUSH_INTERVAL` секунд сбрасываются в общее хранилище
+    (`_persist`), откуда их читают команда `cache_stats` и `CacheStatsView`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._nested = threading.local()
+        self._pending = defaultdict(float)
+        self._last_flush = time.monotonic()
+
+    def _record(self, operation, key, started, hit=None, size=None):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        prefix = key_prefix(key)
+        with self._stats_lock:
+            self._pending[(prefix, f'{operation}_calls')] += 1
+            self._pending[(prefix, f'{operation}_ms_total')] += elapsed_ms
+            self._pending[(prefix, f'{operation}_ms_{latency_bucket(elapsed_ms)}')] += 1
+            if hit is not None:
+                self._pending[(prefix, 'hits' if hit else 'misses')] += 1
+            if size is not None:
+                self._pending[(prefix, 'sets')] += 1
+                self._pending[(prefix, 'set_bytes')] += size
+            flush = time.monotonic() - self._last_flush >= getattr(settings, 'CACHE_STATS_FLUSH_INTERVAL', 10)
+        if flush:
+            self.flush_stats()
+
+    def flush_stats(self):
+        """
+        Переносит накопленные в процессе счетчики в общее хранилище.
+        """
+        with self._stats_lock:
+            pending, self._pending = self._pending, defaultdict(float)
+            self._last_flush = time.monotonic()
+        if pending:
+            self._persist({f'{prefix}|{metric}': value for (prefix, metric), value in pending.items()})
+
+    def read_stats(self):
+        """
+        Возвращает статистику по префиксам: `{префикс: {метрика: значение}}`.
+        """
+        self.flush_stats()
+        result = defaultdict(dict)
+        for field, value in self._load().items():
+            prefix, metric = field.split('|', 1)
+            result[prefix][metric] = value
+        for metrics in result.values():
+            reads = metrics.get('hits', 0) + metrics.get('misses', 0)
+            metrics['hit_ratio'] = round(metrics.get('hits', 0) / reads, 4) if reads else None
+        return dict(result)
+
+    def _measure(self, operation, key, call, hit=None, size=None):
+        """
+        Выполняет вызов бэкенда и записывает его статистику.
+
+        Вложенные вызовы (например, `get` внутри `get_many` базового класса) не
+        учитываются повторно.
+        """
+        if getattr(self._nested, 'active', False):
+            return call()
+        self._nested.active = True
+        started = time.perf_counter()
+        try:
+            result = call()
+        finally:
+            self._nested.active = False
+        self._record(operation, key, started, hit=hit(result) if hit else None,
+                     size=size(result) if size else None)
+        return result
+
+    def get(self, key, default=None, version=None):
+        missing = object()
+        value = self._measure('get', key, lambda: super(InstrumentedCacheMixin, self).get(key, missing, version),
+                              hit=lambda result: result is not missing)
+        return default if value is missing else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        nested = getattr(self._nested, 'active', False)
+        values = self._measure('get_many', keys[0] if keys else '',
+                               lambda: super(InstrumentedCacheMixin, self).get_many(keys, version))
+        if not nested:
+            # Задержка относится ко всему вызову, попадания считаются по каждому ключу.
+            with self._stats_lock:
+                for key in keys:
+                    self._pending[(key_prefix(key), 'hits' if key in values else 'misses')] += 1
+        return values
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._measure('set', key, lambda: super(InstrumentedCacheMixin, self).set(key, value, timeout, version),
+                             size=lambda result: _size(value))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._measure('add', key, lambda: super(InstrumentedCacheMixin, self).add(key, value, timeout, version),
+                             size=lambda result: _size(value) if result else None)
+
+    def incr(self, key, delta=1, version=None):
+        return self._measure('incr', key, lambda: super(InstrumentedCacheMixin, self).incr(key, delta, version))
+
+    def delete(self, key, version=None):
+        return self._measure('delete', key, lambda: super(InstrumentedCacheMixin, self).delete(key, version))
+
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+    """
+    Бэкенд Redis со статистикой вызовов. Счетчики всех процессов суммируются в
+    хэше `STATS_KEY` в том же Redis.
+    """
+    STATS_KEY = 'cache_stats'
+
+    def _persist(self, counters):
+        pipeline = self._cache.get_client(write=True).pipeline(transaction=False)
+        for field, value in counters.items():
+            pipeline.hincrbyfloat(self.STATS_KEY, field, value)
+        pipeline.execute()
+
+    def _load(self):
+        raw = self._cache.get_client().hgetall(self.STATS_KEY)
+        return {field.decode(): float(value) for field, value in raw.items()}
+
+    def reset_stats(self):
+        self._cache.get_client(write=True).delete(self.STATS_KEY)
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    """
+    Бэкенд в памяти процесса со статистикой вызовов (разработка и тесты без Redis).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._persisted = defaultdict(float)
+
+    def _persist(self, counters):
+        with self._stats_lock:
+            for field, value in counters.items():
+                self._persisted[field] += value
+
+    def _load(self):
+        with self._stats_lock:
+            return dict(self._persisted)
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._persisted.clear()
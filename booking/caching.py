@@ -0,0 +1,272 @@
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from booking import invalidation
+from config.db_router import primary_reads
+
+# Время жизни закэшированных данных. Устаревшие версии не читаются и
+# вытесняются по истечении этого времени.
+CACHE_TIMEOUT = 60 * 60
+
+# Сколько секунд после истечения значение хранится, чтобы отдавать его, пока
+# один из процессов пересчитывает новое (stale-while-revalidate).
+STALE_TIMEOUT = 60
+
+# Время жизни блокировки пересчета.
+LOCK_TIMEOUT = 10
+
+# Сколько секунд запрос без прежнего значения ждет чужого пересчета, прежде чем
+# вычислить значение сам: дольше держать поток веб-сервера нельзя.
+LOCK_WAIT_TIMEOUT = 1
+
+# Коэффициент вероятностного досрочного пересчета: чем больше, тем раньше
+# до истечения значение начинает пересчитываться.
+EARLY_RECOMPUTE_BETA = 1.0
+
+
+class LocalCache:
+    """
+    Ограниченный по размеру LRU-кэш в памяти процесса со временем жизни записей.
+
+    Используется как первый уровень перед Redis для редко меняющихся данных
+    (столы, обложки, страница «О нас»): попадание не требует сетевого запроса.
+    Ключи — пары (пространство имен, ключ), что позволяет сбросить все записи
+    пространства имен при увеличении его версии.
+
+    Каждый сброс пространства имен увеличивает его счетчик сбросов. Значение,
+    прочитанное до сброса, не сохраняется, если передать в `set` счетчик
+    (`version`), полученный до чтения: иначе сброс, пришедший между чтением из
+    Redis и записью, потерялся бы, и прежнее значение отдавалось бы до истечения
+    `LOCAL_CACHE_TTL`.
+
+    Методы:
+        get(namespace, key): Возвращает значение или None.
+        version(namespace): Возвращает счетчик сбросов пространства имен.
+        set(namespace, key, value, version=None): Сохраняет значение, вытесняя самую
+            давно использованную запись, если пространство имен не сбрасывалось после `version`.
+        delete_namespace(namespace): Удаляет записи пространства имен.
+        clear(): Удаляет все записи и обнуляет счетчики.
+        stats(): Возвращает количество попаданий, промахов и записей.
+    """
+
+    def __init__(self, max_entries=None, timeout=None):
+        self._max_entries = max_entries
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._clears = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_entries(self):
+        if self._max_entries is not None:
+            return self._max_entries
+        return getattr(settings, 'LOCAL_CACHE_MAX_ENTRIES', 1000)
+
+    @property
+    def timeout(self):
+        if self._timeout is not None:
+            return self._timeout
+        return getattr(settings, 'LOCAL_CACHE_TTL', 300)
+
+    def get(self, namespace, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None or entry[0] <= now:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((namespace, key))
+            self.hits += 1
+            return entry[1]
+
+    def version(self, namespace):
+        with self._lock:
+            return self._clears, self._versions.get(namespace, 0)
+
+    def set(self, namespace, key, value, version=None):
+        with self._lock:
+            if version is not None and version != (self._clears, self._versions.get(namespace, 0)):
+                return
+            self._entries[(namespace, key)] = (time.monotonic() + self.timeout, value)
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_namespace(self, namespace):
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            for entry_key in [entry_key for entry_key in self._entries if entry_key[0] == namespace]:
+                del self._entries[entry_key]
+
+    def clear(self):
+        with self._lock:
+            self._clears += 1
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries),
+                    'max_entries': self.max_entries}
+
+
+local_cache = LocalCache()
+
+
+def _generation_key(namespace):
+    return f'cache_generation:{namespace}'
+
+
+def _initial_generation():
+    # Начальная версия зависит от времени, поэтому после вытеснения счетчика
+    # из кэша новая версия не совпадет ни с одной из ранее использованных.
+    return int(time.time() * 1000)
+
+
+def get_generation(namespace):
+    """
+    Возвращает текущую версию (поколение) данных пространства имен.
+    """
+    key = _generation_key(namespace)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _initial_generation(), None)
+        generation = cache.get(key, _initial_generation())
+    return generation
+
+
+def bump_generation(*namespaces, broadcast=False):
+    """
+    Увеличивает версию данных пространств имен, делая их закэшированные значения недоступными.
+
+    Версия увеличивается сразу и повторно после фиксации транзакции, чтобы
+    параллельный запрос не закэшировал под новой версией незафиксированное состояние.
+    Записи пространств имен в `local_cache` текущего процесса удаляются. При
+    `broadcast=True` после фиксации транзакции событие сброса публикуется для
+    остальных процессов (см. `booking.invalidation`).
+    """
+    def bump():
+        for namespace in namespaces:
+            local_cache.delete_namespace(namespace)
+            try:
+                cache.incr(_generation_key(namespace))
+            except ValueError:
+                cache.set(_generation_key(namespace), _initial_generation(), None)
+
+    def bump_and_publish():
+        bump()
+        if broadcast:
+            invalidation.publish(*namespaces)
+
+    bump()
+    transaction.on_commit(bump_and_publish)
+
+
+def _should_recompute(expires_at, build_time):
+    """
+    Решает, пора ли пересчитать значение (алгоритм XFetch).
+
+    Вероятность досрочного пересчета растет по мере приближения к истечению и
+    пропорциональна времени вычисления значения, поэтому дорогие значения
+    пересчитываются заранее, а одновременные промахи после истечения редки.
+    """
+    return time.time() - build_time * EARLY_RECOMPUTE_BETA * math.log(1 - random.random()) >= expires_at
+
+
+def _build_and_store(versioned_key, lock_key, builder, timeout):
+    try:
+        started = time.time()
+        # Значение попадает в общий кэш, поэтому читается из основной БД, а не из реплики.
+        with primary_reads():
+            value = builder()
+        build_time = time.time() - started
+        cache.set(versioned_key, (value, time.time() + timeout, build_time), timeout + STALE_TIMEOUT)
+        return value
+    finally:
+        cache.delete(lock_key)
+
+
+def get_or_build(namespace, key, builder, timeout=CACHE_TIMEOUT, local=False):
+    """
+    Возвращает значение из кэша под ключом с версией пространства имен или
+    вычисляет его функцией `builder` и сохраняет в кэш.
+
+    При `local=True` значение сначала ищется в `local_cache` процесса и
+    сохраняется в него после чтения из Redis. Другие процессы удаляют свои копии
+    по событию из Redis pub/sub (`bump_generation(..., broadcast=True)`), а
+    `LOCAL_CACHE_TTL` ограничивает устаревание при потере события. Если событие
+    пришло, пока значение читалось из Redis, значение не сохраняется в процессе.
+
+    `builder` должен возвращать материализованные данные (списки кортежей или
+    словарей), а не ленивые `QuerySet`.
+
+    Защита от одновременного пересчета:
+    - значение хранится `STALE_TIMEOUT` секунд после истечения вместе со
+      временем истечения и длительностью вычисления;
+    - незадолго до истечения значение вероятностно пересчитывается заранее
+      (`_should_recompute`);
+    - пересчитывает только процесс, получивший блокировку (`cache.add`,
+      в Redis — SET NX), остальные продолжают отдавать прежнее значение;
+    - если прежнего значения нет (первое обращение или новая версия после
+      изменения данных), остальные процессы ждут результата до
+      `LOCK_WAIT_TIMEOUT` секунд, а затем вычисляют значение сами, не сохраняя
+      его: сохранит процесс, владеющий блокировкой.
+    """
+    if local:
+        invalidation.ensure_subscriber()
+        version = local_cache.version(namespace)
+        value = local_cache.get(namespace, key)
+        if value is None:
+            value = get_or_build(namespace, key, builder, timeout)
+            local_cache.set(namespace, key, value, version)
+        return value
+
+    versioned_key = f'{namespace}:v{get_generation(namespace)}:{key}'
+    lock_key = f'{versioned_key}:lock'
+
+    entry = cache.get(versioned_key)
+    if entry is not None:
+        value, expires_at, build_time = entry
+        if not _should_recompute(expires_at, build_time) or not cache.add(lock_key, 1, LOCK_TIMEOUT):
+            return value
+        return _build_and_store(versioned_key, lock_key, builder, timeout)
+
+    if cache.add(lock_key, 1, LOCK_TIMEOUT):
+        return _build_and_store(versioned_key, lock_key, builder, timeout)
+
+    deadline = time.time() + LOCK_WAIT_TIMEOUT
+    while time.time() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(versioned_key)
+        if entry is not None:
+            return entry[0]
+    return builder()
+
+
+def get_cache_stats():
+    """
+    Возвращает статистику кэша: счетчики бэкенда по префиксам ключей (если
+    бэкенд их собирает, см. `booking.cache_backends`) и счетчики `local_cache`.
+    """
+    prefixes = cache.read_stats() if hasattr(cache, 'read_stats') else {}
+    return {'prefixes': prefixes, 'local': local_cache.stats()}
+
+
+def reset_cache_stats():
+    """
+    Обнуляет статистику кэша бэкенда и счетчики `local_cache`.
+    """
+    if hasattr(cache, 'reset_stats'):
+        cache.flush_stats()
+        cache.reset_stats()
+    local_cache.clear()
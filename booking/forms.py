@@ -1,8 +1,10 @@
 from django import forms
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from datetime import datetime, timedelta, date
-from .models import Booking, Table
+from datetime import datetime, date
+from .assignment import assign_tables
+from .availability import availability_engine
+from .models import Booking, WaitlistEntry
 import re
 
 
@@ -68,6 +70,9 @@ class ReservationForm(StyleFormMixin, forms.ModelForm):
         label='Количество гостей'
     )
 
+    # Проверять ли наличие свободных столов (отключается в форме листа ожидания)
+    check_tables = True
+
     class Meta:
         model = Booking
         fields = ['date', 'time', 'guests', 'name', 'email', 'phone_number', 'comments']
@@ -128,31 +133,40 @@ class ReservationForm(StyleFormMixin, forms.ModelForm):
         if date_value and time:
             time = datetime.strptime(time, "%H:%M").time()
             datetime_booking = datetime.combine(date_value, time)
-            end_time = (datetime_booking + timedelta(hours=2)).time()
-            datetime_end_booking = datetime.combine(date_value, end_time)
 
             if timezone.localtime() > timezone.make_aware(datetime_booking):
                 self.add_error(None, "Дата и время не могут быть в прошлом!")
 
-            conflicting_bookings = Booking.objects.filter(
-                date=date_value,
-                time__lt=datetime_end_booking,
-                time__gte=datetime_booking
-            )
-
-            reserved_tables = conflicting_bookings.values_list('tables', flat=True)
-            available_tables = Table.objects.exclude(id__in=reserved_tables)
+        if date_value and time and self.check_tables:
+            available_tables = availability_engine.free_tables(date_value, time)
 
-            tables_needed = (guests + 1) // 2
-            if available_tables.count() < tables_needed:
+            if guests and assign_tables(available_tables, guests) is None:
                 self.add_error(None, "Недостаточно свободных столов для указанного времени.")
 
-            if tables and not all(table in available_tables for table in tables.all()):
+            available_ids = {table.id for table in available_tables}
+            if tables and not all(table.pk in available_ids for table in tables):
                 self.add_error('tables', "Все выбранные столы должны быть доступны в выбранное время.")
 
         return cleaned_data
 
 
+class WaitlistForm(ReservationForm):
+    """
+    Форма для постановки в лист ожидания.
+
+    Содержит те же поля и проверки, что и `ReservationForm`, кроме проверки
+    свободных столов: в лист ожидания встают именно тогда, когда столов нет.
+
+    Метаданные:
+    - `model`: WaitlistEntry
+    - `fields`: ['date', 'time', 'guests', 'name', 'email', 'phone_number', 'comments']
+    """
+    check_tables = False
+
+    class Meta(ReservationForm.Meta):
+        model = WaitlistEntry
+
+
 class ContactForm(forms.Form):
     """
     Форма для отправки сообщений через контактную страницу.
@@ -169,3 +183,36 @@ class ContactForm(forms.Form):
     email = forms.EmailField(required=True)
     phone = forms.CharField(max_length=20, required=True)
     message = forms.CharField(widget=forms.Textarea, required=True)
+
+
+class ReservationFilterForm(forms.Form):
+    """
+    Форма фильтров списка всех бронирований.
+
+    Поля:
+    - `date_from` (`DateField`): Начало периода (включительно).
+    - `date_to` (`DateField`): Конец периода (включительно).
+    - `customer` (`EmailField`): Электронная почта пользователя, сделавшего бронирование.
+    """
+    date_from = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+        label='С'
+    )
+    date_to = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+        label='По'
+    )
+    customer = forms.EmailField(
+        required=False,
+        widget=forms.EmailInput(attrs={'class': 'form-control'}),
+        label='Пользователь'
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from, date_to = cleaned_data.get('date_from'), cleaned_data.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            raise ValidationError('Начало периода не может быть позже его конца.')
+        return cleaned_data
@@ -0,0 +1,292 @@
+import json
+import threading
+import time as time_module
+import uuid
+from collections import namedtuple
+from datetime import date, timedelta
+
+import redis
+from django.conf import settings
+
+from booking.assignment import assign_tables
+from booking.availability import DEFAULT_DURATION, SLOTS_PER_DAY, booking_slots, parse_time
+
+# Ключ сессии, под которым хранится токен удержания столов текущего гостя.
+HOLD_SESSION_KEY = 'table_hold'
+
+TableHold = namedtuple('TableHold', ['token', 'date', 'time', 'duration', 'guests', 'table_ids'])
+
+# Удержания хранятся в отсортированном множестве на каждую дату: элемент
+# `токен:стол:первый слот:слот после последнего`, вес — момент истечения (мс).
+# Скрипт атомарно удаляет истёкшие удержания, проверяет пересечения с чужими
+# удержаниями тех же столов и записывает новое удержание вместе с его описанием.
+#
+# KEYS[1] — описание удержания, KEYS[2..] — множества дат.
+# ARGV: токен, текущее время (мс), время истечения (мс), TTL (мс), описание,
+# идентификаторы столов через запятую, диапазоны слотов `первый:последний` по датам.
+ACQUIRE_SCRIPT = """
+local token, now, expires, ttl = ARGV[1], tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local tables = {}
+for id in string.gmatch(ARGV[6], '%d+') do tables[id] = true end
+for i = 2, #KEYS do
+    redis.call('ZREMRANGEBYSCORE', KEYS[i], '-inf', now)
+    local first, last = string.match(ARGV[5 + i], '(%d+):(%d+)')
+    first, last = tonumber(first), tonumber(last)
+    for _, member in ipairs(redis.call('ZRANGE', KEYS[i], 0, -1)) do
+        local owner, id, other_first, other_last = string.match(member, '([^:]+):(%d+):(%d+):(%d+)')
+        if owner ~= token and tables[id] and tonumber(other_first) < last and first < tonumber(other_last) then
+            return tonumber(id)
+        end
+    end
+end
+for i = 2, #KEYS do
+    for _, member in ipairs(redis.call('ZRANGE', KEYS[i], 0, -1)) do
+        if string.sub(member, 1, #token + 1) == token .. ':' then
+            redis.call('ZREM', KEYS[i], member)
+        end
+    end
+    for id in pairs(tables) do
+        redis.call('ZADD', KEYS[i], expires, token .. ':' .. id .. ':' .. ARGV[5 + i])
+    end
+    if redis.call('PTTL', KEYS[i]) < ttl then
+        redis.call('PEXPIRE', KEYS[i], ttl)
+    end
+end
+redis.call('SET', KEYS[1], ARGV[5], 'PX', ttl)
+return 0
+"""
+
+# KEYS[1] — описание удержания, KEYS[2..] — множества дат. ARGV[1] — токен.
+RELEASE_SCRIPT = """
+for i = 2, #KEYS do
+    for _, member in ipairs(redis.call('ZRANGE', KEYS[i], 0, -1)) do
+        if string.sub(member, 1, #ARGV[1] + 1) == ARGV[1] .. ':' then
+            redis.call('ZREM', KEYS[i], member)
+        end
+    end
+end
+return redis.call('DEL', KEYS[1])
+"""
+
+
+def _record_key(token):
+    return f'table_hold:{token}'
+
+
+def _day_key(day):
+    return f'table_holds:{day.isoformat()}'
+
+
+def _parse_member(member):
+    token, table_id, first, last = member.rsplit(':', 3)
+    return token, int(table_id), int(first), int(last)
+
+
+def hold_day_ranges(day, start, duration=DEFAULT_DURATION):
+    """
+    Разбивает интервал бронирования на диапазоны слотов по датам.
+
+    :return: Список кортежей (дата, первый слот, слот после последнего).
+    """
+    first_slot, last_slot = booking_slots(start, duration)
+    ranges = [(day, first_slot, min(last_slot, SLOTS_PER_DAY))]
+    if last_slot > SLOTS_PER_DAY:
+        ranges.append((day + timedelta(days=1), 0, last_slot - SLOTS_PER_DAY))
+    return ranges
+
+
+class RedisHoldStore:
+    """
+    Хранилище удержаний столов в Redis. Захват и освобождение выполняются
+    Lua-скриптами, поэтому проверка пересечений и запись атомарны для всех
+    процессов приложения.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.acquire_script = client.register_script(ACQUIRE_SCRIPT)
+        self.release_script = client.register_script(RELEASE_SCRIPT)
+
+    def acquire(self, token, ranges, table_ids, record, ttl):
+        now = int(time_module.time() * 1000)
+        ttl_ms = int(ttl * 1000)
+        keys = [_record_key(token)] + [_day_key(day) for day, _, _ in ranges]
+        args = [token, now, now + ttl_ms, ttl_ms, record, ','.join(map(str, table_ids))]
+        args += [f'{first}:{last}' for _, first, last in ranges]
+        return int(self.acquire_script(keys=keys, args=args))
+
+    def release(self, token, days):
+        self.release_script(keys=[_record_key(token)] + [_day_key(day) for day in days], args=[token])
+
+    def record(self, token):
+        return self.client.get(_record_key(token))
+
+    def members(self, days):
+        now = int(time_module.time() * 1000)
+        pipeline = self.client.pipeline(transaction=False)
+        for day in days:
+            pipeline.zrangebyscore(_day_key(day), now, '+inf')
+        return [[member.decode() for member in members] for members in pipeline.execute()]
+
+
+class LocalHoldStore:
+    """
+    Хранилище удержаний в памяти процесса для запуска без Redis (разработка и
+    тесты). Повторяет семантику Lua-скриптов под блокировкой потока.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.days = {}
+        self.records = {}
+
+    def clear(self):
+        with self.lock:
+            self.days.clear()
+            self.records.clear()
+
+    def _prune(self, day, now):
+        members = self.days.setdefault(day, {})
+        for member in [member for member, expires in members.items() if expires <= now]:
+            del members[member]
+        return members
+
+    def acquire(self, token, ranges, table_ids, record, ttl):
+        now = time_module.time()
+        with self.lock:
+            for day, first, last in ranges:
+                for member in self._prune(day, now):
+                    owner, table_id, other_first, other_last = _parse_member(member)
+                    if owner != token and table_id in table_ids and other_first < last and first < other_last:
+                        return table_id
+            for day, first, last in ranges:
+                members = self.days[day]
+                for member in [member for member in members if member.startswith(f'{token}:')]:
+                    del members[member]
+                members.update({f'{token}:{table_id}:{first}:{last}': now + ttl for table_id in table_ids})
+            self.records[token] = (record, now + ttl)
+            return 0
+
+    def release(self, token, days):
+        with self.lock:
+            for day in days:
+                members = self.days.get(day, {})
+                for member in [member for member in members if member.startswith(f'{token}:')]:
+                    del members[member]
+            self.records.pop(token, None)
+
+    def record(self, token):
+        record, expires = self.records.get(token, (None, 0))
+        return record if expires > time_module.time() else None
+
+    def members(self, days):
+        now = time_module.time()
+        with self.lock:
+            return [list(self._prune(day, now)) for day in days]
+
+
+_local_store = LocalHoldStore()
+_redis_store = None
+
+
+def get_hold_store():
+    """
+    Возвращает хранилище удержаний: Redis из настроек кэша, если кэширование
+    включено, иначе хранилище в памяти процесса.
+    """
+    global _redis_store
+    if not settings.CACHE_ENABLED:
+        return _local_store
+    if _redis_store is None:
+        _redis_store = RedisHoldStore(redis.from_url(settings.CACHES['default']['LOCATION']))
+    return _redis_store
+
+
+def held_ranges(day, exclude_token=None):
+    """
+    Возвращает чужие действующие удержания, затрагивающие дату и следующий день.
+
+    Слоты следующего дня сдвинуты на 48, чтобы их можно было сравнивать со
+    слотами бронирований, заканчивающихся после полуночи.
+
+    :return: Список кортежей (id стола, первый слот, слот после последнего).
+    """
+    result = []
+    days = [day, day + timedelta(days=1)]
+    for offset, members in enumerate(get_hold_store().members(days)):
+        for member in members:
+            token, table_id, first, last = _parse_member(member)
+            if token != exclude_token:
+                result.append((table_id, first + offset * SLOTS_PER_DAY, last + offset * SLOTS_PER_DAY))
+    return result
+
+
+def held_table_ids(day, start, duration=DEFAULT_DURATION, exclude_token=None, ranges=None):
+    """
+    Возвращает идентификаторы столов, удерживаемых другими гостями на указанное время.
+
+    :param ranges: Заранее полученный результат `held_ranges(day, exclude_token)`.
+    """
+    if ranges is None:
+        ranges = held_ranges(day, exclude_token)
+    first_slot, last_slot = booking_slots(start, duration)
+    return {table_id for table_id, first, last in ranges if first < last_slot and first_slot < last}
+
+
+def get_hold(token):
+    """
+    Возвращает действующее удержание по токену или None.
+    """
+    record = get_hold_store().record(token) if token else None
+    if record is None:
+        return None
+    data = json.loads(record)
+    return TableHold(token, data['date'], data['time'], timedelta(seconds=data['duration']), data['guests'],
+                     data['table_ids'])
+
+
+def release_hold(token):
+    """
+    Снимает удержание столов.
+    """
+    hold = get_hold(token)
+    if hold is not None:
+        ranges = hold_day_ranges(date.fromisoformat(hold.date), hold.time, hold.duration)
+        get_hold_store().release(token, [day for day, _, _ in ranges])
+
+
+def acquire_hold(day, start, guests, free_tables, duration=DEFAULT_DURATION, attempts=5):
+    """
+    Подбирает столы для компании и удерживает их на `TABLE_HOLD_TTL` секунд.
+
+    Столы, удерживаемые другими гостями, исключаются из подбора. Если между
+    чтением удержаний и записью другой гость успел удержать один из столов,
+    скрипт сообщает о конфликте, и подбор повторяется без этого стола.
+
+    Аргументы:
+        day (date): Дата бронирования.
+        start (time | str): Время начала бронирования.
+        guests (int): Количество гостей.
+        free_tables (list[TableInfo]): Свободные по базе данных столы.
+        duration (timedelta): Продолжительность бронирования.
+        attempts (int): Максимальное количество попыток.
+
+    Возвращает:
+        TableHold: Удержание или None, если столов недостаточно.
+    """
+    start = parse_time(start)
+    token = uuid.uuid4().hex
+    ranges = hold_day_ranges(day, start, duration)
+    busy = held_table_ids(day, start, duration)
+    for _ in range(attempts):
+        table_ids = assign_tables([table for table in free_tables if table.id not in busy], guests)
+        if table_ids is None:
+            return None
+        hold = TableHold(token, day.isoformat(), start.strftime('%H:%M'), duration, guests, table_ids)
+        record = json.dumps({'date': hold.date, 'time': hold.time, 'duration': int(duration.total_seconds()),
+                             'guests': guests, 'table_ids': table_ids})
+        conflict = get_hold_store().acquire(token, ranges, table_ids, record, settings.TABLE_HOLD_TTL)
+        if not conflict:
+            return hold
+        busy.add(conflict)
+    return None
@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+import threading
+import time
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Канал Redis, в который публикуются события сброса кэшей процессов.
+CHANNEL = 'cache_invalidation'
+
+# Обработчики событий по пространствам имен: кроме удаления записей `local_cache`
+# события могут сбрасывать другие данные процесса (например, движок доступности).
+_handlers = {}
+
+# Обработчики событий по префиксам пространств имен (например, даты движка
+# доступности): получают остаток имени после префикса.
+_prefix_handlers = {}
+
+_client = None
+_subscriber_pid = None
+_subscriber_lock = threading.Lock()
+
+
+def register_handler(namespace, handler):
+    """
+    Регистрирует функцию, вызываемую при получении события сброса пространства имен.
+    """
+    _handlers.setdefault(namespace, []).append(handler)
+
+
+def register_prefix_handler(prefix, handler):
+    """
+    Регистрирует функцию, вызываемую с остатком имени при получении события сброса
+    пространства имен, начинающегося с `prefix`.
+
+    После переподключения к Redis эти обработчики не вызываются: процесс
+    полностью сбрасывает данные обработчиками `register_handler`.
+    """
+    _prefix_handlers.setdefault(prefix, []).append(handler)
+
+
+def get_client():
+    """
+    Возвращает клиент Redis из настроек кэша.
+    """
+    global _client
+    if _client is None:
+        _client = redis.from_url(settings.CACHES['default']['LOCATION'])
+    return _client
+
+
+def publish(*namespaces):
+    """
+    Публикует событие сброса пространств имен для всех процессов.
+
+    Без Redis (`CACHE_ENABLED` выключен) кэш процессов не используется, и
+    публиковать нечего.
+    """
+    if not settings.CACHE_ENABLED or not namespaces:
+        return
+    try:
+        get_client().publish(CHANNEL, json.dumps({'namespaces': list(namespaces)}))
+    except redis.RedisError as error:
+        # Без события другие процессы увидят изменение по истечении LOCAL_CACHE_TTL.
+        logger.warning(f"Не удалось опубликовать сброс кэша {namespaces}: {error}")
+
+
+def evict(*namespaces):
+    """
+    Удаляет данные пространств имен в текущем процессе и вызывает зарегистрированные обработчики.
+    """
+    from booking.caching import local_cache
+
+    for namespace in namespaces:
+        local_cache.delete_namespace(namespace)
+        for handler in _handlers.get(namespace, ()):
+            handler()
+        for prefix, handlers in _prefix_handlers.items():
+            if namespace.startswith(prefix):
+                for handler in handlers:
+                    handler(namespace[len(prefix):])
+
+
+def handle_message(message):
+    """
+    Обрабатывает сообщение канала `CHANNEL`.
+    """
+    if message.get('type') != 'message':
+        return
+    try:
+        namespaces = json.loads(message['data'])['namespaces']
+    except (KeyError, TypeError, ValueError):
+        logger.warning(f"Некорректное событие сброса кэша: {message.get('data')!r}")
+        return
+    evict(*namespaces)
+
+
+def _listen():
+    from booking.caching import local_cache
+
+    delay = 1
+    while True:
+        try:
+            pubsub = get_client().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(CHANNEL)
+            # События, опубликованные до подписки или во время разрыва соединения,
+            # потеряны, поэтому кэш процесса очищается полностью.
+            local_cache.clear()
+            for handlers in _handlers.values():
+                for handler in handlers:
+                    handler()
+            delay = 1
+            for message in pubsub.listen():
+                handle_message(message)
+        except redis.RedisError as error:
+            logger.warning(f"Подписка на сброс кэша прервана, повтор через {delay} с: {error}")
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
+
+
+def ensure_subscriber():
+    """
+    Запускает в текущем процессе фоновый поток, подписанный на события сброса кэша.
+
+    Вызывается при обращении к кэшу процесса. Поток запускается один раз на
+    процесс: после fork (gunicorn с --preload, воркеры Celery) он запускается
+    заново, так как потоки родителя не наследуются.
+    """
+    global _subscriber_pid
+    if not settings.CACHE_ENABLED or _subscriber_pid == os.getpid():
+        return
+    with _subscriber_lock:
+        if _subscriber_pid == os.getpid():
+            return
+        _subscriber_pid = os.getpid()
+        threading.Thread(target=_listen, name='cache-invalidation', daemon=True).start()
@@ -0,0 +1,38 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from booking.archive import archive_bookings, archive_cutoff
+
+
+class Command(BaseCommand):
+    """
+    Архивация прошедших бронирований.
+
+    Переносит бронирования с датой раньше `--before` (по умолчанию — старше
+    `BOOKING_ARCHIVE_AFTER_DAYS` дней) в gzip-архив JSONL в `BOOKING_ARCHIVE_DIR`
+    и удаляет их из базы данных. То же ежедневно выполняет задача Celery
+    `archive_bookings_task`. Восстановить бронирования можно командой
+    `restore_booking_archive`.
+
+    Пример:
+        python manage.py archive_bookings
+        python manage.py archive_bookings --after-days 730 --chunk-size 5000
+        python manage.py archive_bookings --before 2024-01-01
+    """
+    help = 'Переносит прошедшие бронирования в gzip-архив и удаляет их из базы данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', type=date.fromisoformat,
+                            help='Архивировать бронирования раньше даты (ГГГГ-ММ-ДД)')
+        parser.add_argument('--after-days', type=int, help='Архивировать бронирования старше стольких дней')
+        parser.add_argument('--chunk-size', type=int, help='Размер пакета чтения и удаления')
+        parser.add_argument('--directory', help='Каталог архивов')
+
+    def handle(self, *args, **options):
+        before = options['before'] or archive_cutoff(after_days=options['after_days'])
+        path, deleted = archive_bookings(before, options['chunk_size'], options['directory'])
+        if path is None:
+            self.stdout.write(f'Нет бронирований раньше {before.isoformat()}')
+            return
+        self.stdout.write(self.style.SUCCESS(f'Заархивировано и удалено бронирований: {deleted}, архив: {path}'))
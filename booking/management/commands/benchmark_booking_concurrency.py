@@ -0,0 +1,110 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from booking.assignment import assign_tables
+from booking.availability import parse_time
+from booking.models import Booking, BookingTable
+from booking.services import TablesUnavailableError, create_booking
+
+
+class Command(BaseCommand):
+    """
+    Нагрузочная проверка параллельного бронирования.
+
+    Одновременно отправляет множество бронирований на один и тот же слот через
+    `create_booking` и проверяет, что ни один стол не был назначен двум
+    пересекающимся бронированиям. Созданные бронирования удаляются после
+    проверки, если не указан флаг `--keep`.
+
+    Пример:
+        python manage.py benchmark_booking_concurrency --requests 50 --workers 16
+    """
+    help = 'Параллельно бронирует один слот и проверяет отсутствие двойных назначений столов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Количество бронирований')
+        parser.add_argument('--workers', type=int, default=16, help='Количество параллельных потоков')
+        parser.add_argument('--days-ahead', type=int, default=365, help='Через сколько дней от сегодня бронировать')
+        parser.add_argument('--time', default='20:00', help='Время бронирования (ЧЧ:ММ)')
+        parser.add_argument('--guests', type=int, default=2, help='Количество гостей в бронировании')
+        parser.add_argument('--keep', action='store_true', help='Не удалять созданные бронирования')
+
+    def handle(self, *args, **options):
+        day = timezone.localdate() + timedelta(days=options['days_ahead'])
+        start_time = parse_time(options['time'])
+        guests = options['guests']
+        barrier = threading.Barrier(min(options['workers'], options['requests']))
+        created_ids = []
+        latencies = []
+        rejected = 0
+        lock = threading.Lock()
+
+        def book(number):
+            nonlocal rejected
+            reservation = Booking(
+                date=day, time=start_time, guests=guests, name='Benchmark',
+                email=f'benchmark-{number}@example.com', phone_number='0'
+            )
+            try:
+                if number < barrier.parties:
+                    barrier.wait()
+                started = time.perf_counter()
+                try:
+                    create_booking(reservation, lambda free_tables: assign_tables(free_tables, guests))
+                except TablesUnavailableError:
+                    with lock:
+                        rejected += 1
+                else:
+                    with lock:
+                        created_ids.append(reservation.pk)
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            list(executor.map(book, range(options['requests'])))
+        elapsed = time.perf_counter() - started
+
+        try:
+            double_assignments = self.find_double_assignments(created_ids)
+        finally:
+            if not options['keep']:
+                Booking.objects.filter(pk__in=created_ids).delete()
+
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+        p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0
+        self.stdout.write(
+            f'Запросов: {options["requests"]}, потоков: {options["workers"]}, за {elapsed:.2f} с\n'
+            f'Создано бронирований: {len(created_ids)}, отклонено: {rejected}\n'
+            f'Задержка: p50 {p50:.1f} мс, p95 {p95:.1f} мс\n'
+            f'Двойных назначений столов: {len(double_assignments)}'
+        )
+        if double_assignments:
+            raise CommandError(f'Обнаружены двойные назначения столов: {double_assignments}')
+        self.stdout.write(self.style.SUCCESS('Двойных назначений нет'))
+
+    @staticmethod
+    def find_double_assignments(booking_ids):
+        """
+        Возвращает пары строк `BookingTable` одного стола с пересекающимися интервалами.
+        """
+        rows = sorted(
+            BookingTable.objects.filter(booking_id__in=booking_ids).values_list('table_id', 'start', 'end', 'booking_id')
+        )
+        conflicts = []
+        latest = None
+        for table_id, start, end, booking_id in rows:
+            if latest and latest[0] == table_id and start < latest[1]:
+                conflicts.append((latest[2], booking_id, table_id))
+            if not latest or latest[0] != table_id or end > latest[1]:
+                latest = (table_id, end, booking_id)
+        return conflicts
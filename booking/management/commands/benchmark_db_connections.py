@@ -0,0 +1,105 @@
+import copy
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    """
+    Сравнение задержки обращения к БД при разных способах работы с соединениями.
+
+    Для каждого режима создается отдельное соединение с настройками базы
+    `--database` и выполняется `--requests` «запросов». Каждый запрос повторяет
+    цикл Django: проверка соединения при начале запроса, `--queries` простых
+    запросов к БД и закрытие или возврат соединения в конце
+    (`close_if_unusable_or_obsolete`).
+
+    Режимы:
+        connect — новое соединение на каждый запрос (CONN_MAX_AGE=0, без пула);
+        persistent — постоянное соединение с проверкой (CONN_MAX_AGE, CONN_HEALTH_CHECKS);
+        pool — пул соединений psycopg 3 (только PostgreSQL).
+
+    Пример:
+        python manage.py benchmark_db_connections --requests 500
+        python manage.py benchmark_db_connections --modes connect pool
+    """
+    help = 'Сравнивает задержку запросов к БД с новым, постоянным соединением и пулом соединений'
+
+    MODES = ('connect', 'persistent', 'pool')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Количество запросов в каждом режиме')
+        parser.add_argument('--queries', type=int, default=3, help='Количество запросов к БД на один запрос')
+        parser.add_argument('--modes', nargs='+', choices=self.MODES, default=list(self.MODES),
+                            help='Сравниваемые режимы')
+        parser.add_argument('--database', default='default', help='Псевдоним базы данных')
+
+    def handle(self, *args, **options):
+        base = connections[options['database']]
+        results = {}
+        for mode in options['modes']:
+            if mode == 'pool' and base.vendor != 'postgresql':
+                self.stdout.write('pool: пропущен, пул соединений поддерживается только для PostgreSQL')
+                continue
+            wrapper = self.make_connection(base, mode)
+            try:
+                results[mode] = self.run(wrapper, options['requests'], options['queries'])
+            finally:
+                wrapper.close()
+                if mode == 'pool':
+                    wrapper.close_pool()
+
+        if not results:
+            raise CommandError('Нет режимов для сравнения')
+
+        for mode, latencies in results.items():
+            latencies.sort()
+            self.stdout.write(
+                f'{mode:<11} p50 {statistics.median(latencies):7.2f} мс, '
+                f'p95 {latencies[max(int(len(latencies) * 0.95) - 1, 0)]:7.2f} мс, '
+                f'среднее {statistics.fmean(latencies):7.2f} мс'
+            )
+        if 'connect' in results:
+            baseline = statistics.median(results['connect'])
+            for mode in results.keys() - {'connect'}:
+                self.stdout.write(f'Накладные расходы на соединение, устраненные режимом {mode}: '
+                                  f'{baseline - statistics.median(results[mode]):.2f} мс на запрос')
+
+    @staticmethod
+    def make_connection(base, mode):
+        """
+        Создает отдельное соединение с настройками базы `base` для режима `mode`.
+        """
+        settings_dict = copy.deepcopy(base.settings_dict)
+        options = settings_dict.setdefault('OPTIONS', {})
+        options.pop('pool', None)
+        settings_dict['CONN_MAX_AGE'] = 0
+        settings_dict['CONN_HEALTH_CHECKS'] = False
+        if mode == 'persistent':
+            settings_dict['CONN_MAX_AGE'] = None
+            settings_dict['CONN_HEALTH_CHECKS'] = True
+        elif mode == 'pool':
+            pool = base.settings_dict.get('OPTIONS', {}).get('pool')
+            options['pool'] = pool if isinstance(pool, dict) else True
+            settings_dict['CONN_HEALTH_CHECKS'] = True
+        # Отдельный псевдоним, чтобы не использовать пул и соединения основной базы.
+        return base.__class__(settings_dict, alias=f'benchmark_{mode}')
+
+    @staticmethod
+    def run(wrapper, requests, queries):
+        """
+        Выполняет запросы через соединение и возвращает задержку каждого в миллисекундах.
+        """
+        latencies = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            wrapper.close_if_unusable_or_obsolete()
+            with wrapper.cursor() as cursor:
+                for _ in range(queries):
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+            wrapper.close_if_unusable_or_obsolete()
+            latencies.append((time.perf_counter() - started) * 1000)
+        return latencies
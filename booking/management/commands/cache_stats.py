@@ -0,0 +1,51 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from booking.caching import get_cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    """
+    Вывод статистики кэша по префиксам ключей.
+
+    Показывает попадания, промахи, долю попаданий, количество и средний размер
+    записей и среднюю задержку чтения для каждого префикса ключей, а также
+    счетчики кэша процесса (`local_cache`). Статистика всех процессов
+    суммируется бэкендом `booking.cache_backends.InstrumentedRedisCache`.
+
+    Пример:
+        python manage.py cache_stats
+        python manage.py cache_stats --json
+        python manage.py cache_stats --reset
+    """
+    help = 'Выводит статистику попаданий, размеров и задержек кэша по префиксам ключей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help='Вывести полную статистику в формате JSON')
+        parser.add_argument('--reset', action='store_true', help='Обнулить статистику после вывода')
+
+    def handle(self, *args, **options):
+        stats = get_cache_stats()
+
+        if options['json']:
+            self.stdout.write(json.dumps(stats, ensure_ascii=False, indent=2, sort_keys=True))
+        else:
+            self.stdout.write(f"{'Префикс':<30} {'Попадания':>10} {'Промахи':>10} {'Доля':>7} "
+                              f"{'Записи':>8} {'Байт/зап.':>10} {'get, мс':>8}")
+            for prefix, metrics in sorted(stats['prefixes'].items()):
+                hits, misses = int(metrics.get('hits', 0)), int(metrics.get('misses', 0))
+                ratio = '-' if metrics['hit_ratio'] is None else f"{metrics['hit_ratio']:.1%}"
+                sets = int(metrics.get('sets', 0))
+                size = metrics.get('set_bytes', 0) / sets if sets else 0
+                gets = metrics.get('get_calls', 0)
+                latency = metrics.get('get_ms_total', 0) / gets if gets else 0
+                self.stdout.write(f"{prefix:<30} {hits:>10} {misses:>10} {ratio:>7} {sets:>8} "
+                                  f"{size:>10.0f} {latency:>8.2f}")
+            local = stats['local']
+            self.stdout.write(f"Кэш процесса: попаданий {local['hits']}, промахов {local['misses']}, "
+                              f"записей {local['size']} из {local['max_entries']}")
+
+        if options['reset']:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS('Статистика кэша обнулена.'))
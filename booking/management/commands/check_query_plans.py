@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from booking.query_plans import explain_queries
+
+
+class Command(BaseCommand):
+    """
+    Проверка планов частых запросов к бронированиям и пользователям.
+
+    Выполняет EXPLAIN запросов из `booking.query_plans.hot_queries` на текущей
+    базе и завершается ошибкой, если какой-либо из них читает таблицу полным
+    просмотром вместо индекса. С флагом `--verbose` выводит планы всех запросов.
+
+    Пример:
+        python manage.py check_query_plans
+        python manage.py check_query_plans --verbose
+    """
+    help = 'Проверяет, что частые запросы используют индексы, а не полный просмотр таблиц'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose', action='store_true', help='Вывести планы всех запросов')
+
+    def handle(self, *args, **options):
+        failures = 0
+        for name, (tables, plan) in explain_queries().items():
+            if tables:
+                failures += 1
+                self.stderr.write(f"{name}: полный просмотр {', '.join(tables)}\n{plan}\n")
+            elif options['verbose']:
+                self.stdout.write(f'{name}:\n{plan}\n')
+
+        if failures:
+            raise CommandError(f'Запросов с полным просмотром таблиц: {failures}')
+        self.stdout.write(self.style.SUCCESS('Все запросы используют индексы.'))
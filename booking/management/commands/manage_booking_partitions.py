@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from booking.partitions import attached_partitions, is_partitioned, manage_partitions, partition_name
+
+
+class Command(BaseCommand):
+    """
+    Обслуживание секций таблицы бронирований (PostgreSQL).
+
+    Создает секции на `--months-ahead` месяцев вперед и отсоединяет секции старше
+    `--retention-months` месяцев (бронирования этих секций предварительно
+    переносятся в архив `BOOKING_ARCHIVE_DIR`, отсоединенная секция остается
+    отдельной таблицей). Те же действия ежедневно выполняет задача Celery
+    `manage_booking_partitions_task`. С флагом `--list` только выводит
+    присоединенные секции.
+
+    Пример:
+        python manage.py manage_booking_partitions
+        python manage.py manage_booking_partitions --months-ahead 24 --retention-months 36
+        python manage.py manage_booking_partitions --list
+    """
+    help = 'Создает будущие и отсоединяет старые секции таблицы бронирований'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, help='На сколько месяцев вперед создавать секции')
+        parser.add_argument('--retention-months', type=int,
+                            help='Сколько прошедших месяцев оставлять присоединенными (0 — не отсоединять)')
+        parser.add_argument('--list', action='store_true', help='Только вывести присоединенные секции')
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            raise CommandError('Таблица бронирований не секционирована (требуется PostgreSQL и миграция 0010)')
+
+        if options['list']:
+            for month in attached_partitions():
+                self.stdout.write(partition_name(month))
+            return
+
+        created, detached = manage_partitions(options['months_ahead'], options['retention_months'])
+        for month in created:
+            self.stdout.write(f'Создана секция {partition_name(month)}')
+        for month in detached:
+            self.stdout.write(f'Отсоединена секция {partition_name(month)}')
+        self.stdout.write(self.style.SUCCESS(f'Создано секций: {len(created)}, отсоединено: {len(detached)}'))
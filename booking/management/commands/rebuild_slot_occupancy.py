@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from booking.availability import availability_engine
+from booking.models import BookingTable, SlotOccupancy
+from booking.month_availability import invalidate_all_months
+from booking.occupancy import build_slot_occupancies, expected_slot_occupancy
+
+
+class Command(BaseCommand):
+    """
+    Пересборка и проверка предрассчитанной занятости слотов `SlotOccupancy`.
+
+    По умолчанию полностью пересобирает таблицу по данным `BookingTable` в одной
+    транзакции и проверяет результат. С флагом `--verify` только сравнивает
+    текущее содержимое с ожидаемым и завершается ошибкой при расхождениях.
+
+    Пример:
+        python manage.py rebuild_slot_occupancy
+        python manage.py rebuild_slot_occupancy --verify
+    """
+    help = 'Пересобирает и проверяет таблицу занятости слотов SlotOccupancy'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help='Только проверить, не изменяя данные')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Размер пакета чтения и записи')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+
+        if not options['verify']:
+            with transaction.atomic():
+                deleted, _ = SlotOccupancy.objects.all().delete()
+                created = 0
+                batch = []
+                rows = BookingTable.objects.only('id', 'table_id', 'start', 'end').iterator(chunk_size=chunk_size)
+                for row in rows:
+                    batch.append(row)
+                    if len(batch) >= chunk_size:
+                        created += len(SlotOccupancy.objects.bulk_create(build_slot_occupancies(batch)))
+                        batch = []
+                created += len(SlotOccupancy.objects.bulk_create(build_slot_occupancies(batch)))
+            availability_engine.clear()
+            invalidate_all_months()
+            self.stdout.write(f'Удалено строк: {deleted}, создано строк: {created}')
+
+        expected = expected_slot_occupancy(chunk_size=chunk_size)
+        actual = set(SlotOccupancy.objects.values_list('date', 'slot', 'table_id', 'booking_table_id').iterator(
+            chunk_size=chunk_size))
+        missing = expected - actual
+        extra = actual - expected
+        duplicates = SlotOccupancy.objects.count() - len(actual)
+
+        if missing or extra or duplicates:
+            raise CommandError(
+                f'Занятость слотов не совпадает с бронированиями: отсутствует {len(missing)}, '
+                f'лишних {len(extra)}, дубликатов {duplicates}. '
+                f'Пример отсутствующих: {sorted(missing)[:5]}, лишних: {sorted(extra)[:5]}'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Занятость слотов согласована: {len(actual)} строк'))
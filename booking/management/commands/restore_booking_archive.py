@@ -0,0 +1,29 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from booking.archive import restore_archive
+
+
+class Command(BaseCommand):
+    """
+    Восстановление бронирований из архива команды `archive_bookings`.
+
+    Бронирования восстанавливаются с прежними идентификаторами вместе со столами
+    и занятостью слотов. Уже существующие бронирования пропускаются, поэтому
+    команду можно безопасно запускать повторно.
+
+    Пример:
+        python manage.py restore_booking_archive booking_archive/bookings_before_2025-01-01_20260101T030000.jsonl.gz
+    """
+    help = 'Восстанавливает бронирования из gzip-архива'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к архиву')
+        parser.add_argument('--chunk-size', type=int, help='Размер пакета восстановления')
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['path']):
+            raise CommandError(f'Архив {options["path"]} не найден')
+        restored = restore_archive(options['path'], options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Восстановлено бронирований: {restored}'))
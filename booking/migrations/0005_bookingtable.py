@@ -0,0 +1,91 @@
+import django.db.models.deletion
+from datetime import datetime
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_booking_table_periods(apps, schema_editor):
+    """
+    Заполняет интервалы занятости столов для существующих бронирований.
+    """
+    BookingTable = apps.get_model('booking', 'BookingTable')
+    booking_tables = BookingTable.objects.using(schema_editor.connection.alias)
+    rows = booking_tables.select_related('booking')
+    batch = []
+    for row in rows.iterator(chunk_size=1000):
+        booking = row.booking
+        row.start = timezone.make_aware(datetime.combine(booking.date, booking.time))
+        row.end = row.start + booking.duration
+        batch.append(row)
+        if len(batch) >= 1000:
+            booking_tables.bulk_update(batch, ['start', 'end'])
+            batch = []
+    booking_tables.bulk_update(batch, ['start', 'end'])
+
+
+def add_no_overlap_constraint(apps, schema_editor):
+    """
+    Создает в PostgreSQL исключающее ограничение, запрещающее пересечение
+    интервалов бронирования одного стола.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    schema_editor.execute(
+        'ALTER TABLE booking_booking_tables ADD CONSTRAINT booking_table_no_overlap '
+        'EXCLUDE USING gist (table_id WITH =, tstzrange(start, "end") WITH &&) '
+        'WHERE (start IS NOT NULL AND "end" IS NOT NULL)'
+    )
+
+
+def drop_no_overlap_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('ALTER TABLE booking_booking_tables DROP CONSTRAINT IF EXISTS booking_table_no_overlap')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0004_alter_coverimage_options'),
+    ]
+
+    operations = [
+        # Таблица booking_booking_tables уже существует: переводим автоматическую
+        # промежуточную модель в явную только на уровне состояния миграций.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='BookingTable',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_tables', to='booking.booking', verbose_name='Бронирование')),
+                        ('table', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_tables', to='booking.table', verbose_name='Стол')),
+                    ],
+                    options={
+                        'verbose_name': 'Стол бронирования',
+                        'verbose_name_plural': 'Столы бронирований',
+                        'db_table': 'booking_booking_tables',
+                        'unique_together': {('booking', 'table')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='booking',
+                    name='tables',
+                    field=models.ManyToManyField(blank=True, related_name='related_reservations', through='booking.BookingTable', to='booking.table', verbose_name='Столы'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='bookingtable',
+            name='start',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Начало'),
+        ),
+        migrations.AddField(
+            model_name='bookingtable',
+            name='end',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Окончание'),
+        ),
+        migrations.RunPython(fill_booking_table_periods, migrations.RunPython.noop),
+        migrations.RunPython(add_no_overlap_constraint, drop_no_overlap_constraint),
+    ]
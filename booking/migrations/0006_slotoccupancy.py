@@ -0,0 +1,58 @@
+# Generated by Django 5.1.15 on 2026-10-16 23:31
+
+import django.db.models.deletion
+from datetime import datetime, time, timedelta
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_slot_occupancy(apps, schema_editor):
+    """
+    Заполняет занятость получасовых слотов для существующих строк BookingTable.
+    """
+    BookingTable = apps.get_model('booking', 'BookingTable')
+    SlotOccupancy = apps.get_model('booking', 'SlotOccupancy')
+    alias = schema_editor.connection.alias
+    slot = timedelta(minutes=30)
+    batch = []
+    rows = BookingTable.objects.using(alias).filter(start__isnull=False, end__isnull=False)
+    for row in rows.iterator(chunk_size=1000):
+        start = timezone.localtime(row.start)
+        day_start = timezone.make_aware(datetime.combine(start.date(), time.min))
+        first_slot = (start - day_start) // slot
+        last_slot = max(first_slot + 1, -(-(row.end - day_start) // slot))
+        for index in range(first_slot, last_slot):
+            batch.append(SlotOccupancy(
+                date=start.date() + timedelta(days=index // 48), slot=index % 48,
+                table_id=row.table_id, booking_table_id=row.pk
+            ))
+        if len(batch) >= 1000:
+            SlotOccupancy.objects.using(alias).bulk_create(batch)
+            batch = []
+    SlotOccupancy.objects.using(alias).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0005_bookingtable'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Дата')),
+                ('slot', models.PositiveSmallIntegerField(verbose_name='Слот')),
+                ('booking_table', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_occupancies', to='booking.bookingtable', verbose_name='Стол бронирования')),
+                ('table', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_occupancies', to='booking.table', verbose_name='Стол')),
+            ],
+            options={
+                'verbose_name': 'Занятость слота',
+                'verbose_name_plural': 'Занятость слотов',
+                'indexes': [models.Index(fields=['date', 'slot', 'table'], name='slot_occupancy_lookup_idx')],
+            },
+        ),
+        migrations.RunPython(fill_slot_occupancy, migrations.RunPython.noop),
+    ]
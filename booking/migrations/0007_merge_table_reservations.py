@@ -0,0 +1,79 @@
+import django.db.models.deletion
+from datetime import datetime, time, timedelta
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def merge_table_reservations(apps, schema_editor):
+    """
+    Переносит связи из таблицы `Table.reservations` в `BookingTable`.
+
+    Для перенесённых строк заполняются интервал и занятость слотов. Если стол в это
+    время уже занят другим бронированием, связь сохраняется без интервала, чтобы
+    не нарушить исключающее ограничение `booking_table_no_overlap`.
+    """
+    Table = apps.get_model('booking', 'Table')
+    BookingTable = apps.get_model('booking', 'BookingTable')
+    SlotOccupancy = apps.get_model('booking', 'SlotOccupancy')
+    alias = schema_editor.connection.alias
+    slot = timedelta(minutes=30)
+
+    existing = set(BookingTable.objects.using(alias).values_list('booking_id', 'table_id'))
+    legacy = Table.reservations.through.objects.using(alias).select_related('booking').order_by('id')
+    for link in legacy.iterator(chunk_size=1000):
+        if (link.booking_id, link.table_id) in existing:
+            continue
+        existing.add((link.booking_id, link.table_id))
+        booking = link.booking
+        start = timezone.make_aware(datetime.combine(booking.date, booking.time))
+        end = start + booking.duration
+        if BookingTable.objects.using(alias).filter(table_id=link.table_id, start__lt=end, end__gt=start).exists():
+            start = end = None
+        row = BookingTable.objects.using(alias).create(
+            booking_id=link.booking_id, table_id=link.table_id, start=start, end=end)
+        if start is None:
+            continue
+
+        local_start = timezone.localtime(start)
+        day_start = timezone.make_aware(datetime.combine(local_start.date(), time.min))
+        first_slot = (local_start - day_start) // slot
+        last_slot = max(first_slot + 1, -(-(end - day_start) // slot))
+        SlotOccupancy.objects.using(alias).bulk_create([
+            SlotOccupancy(date=local_start.date() + timedelta(days=index // 48), slot=index % 48,
+                          table_id=row.table_id, booking_table_id=row.pk)
+            for index in range(first_slot, last_slot)
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0006_slotoccupancy'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_table_reservations, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='table',
+            name='reservations',
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='tables',
+            field=models.ManyToManyField(blank=True, related_name='reservations', through='booking.BookingTable', to='booking.table', verbose_name='Столы'),
+        ),
+        migrations.AddIndex(
+            model_name='bookingtable',
+            index=models.Index(fields=['table', 'booking'], name='booking_table_table_idx'),
+        ),
+        migrations.AlterField(
+            model_name='bookingtable',
+            name='booking',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='booking_tables', to='booking.booking', verbose_name='Бронирование'),
+        ),
+        migrations.AlterField(
+            model_name='bookingtable',
+            name='table',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='booking_tables', to='booking.table', verbose_name='Стол'),
+        ),
+    ]
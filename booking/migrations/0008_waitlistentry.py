@@ -0,0 +1,42 @@
+# Generated by Django 5.1.15 on 2026-10-16 23:38
+
+import datetime
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0007_merge_table_reservations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Дата')),
+                ('time', models.TimeField(verbose_name='Время')),
+                ('slot', models.PositiveSmallIntegerField(editable=False, verbose_name='Слот')),
+                ('guests', models.IntegerField(verbose_name='Количество гостей')),
+                ('name', models.CharField(max_length=50, verbose_name='Имя')),
+                ('email', models.EmailField(max_length=254, verbose_name='Электронная почта')),
+                ('phone_number', models.CharField(max_length=20, verbose_name='Телефон')),
+                ('comments', models.TextField(blank=True, null=True, verbose_name='Комментарии')),
+                ('duration', models.DurationField(default=datetime.timedelta(seconds=7200), verbose_name='Продолжительность')),
+                ('status', models.CharField(choices=[('waiting', 'Ожидает'), ('promoted', 'Переведена в бронирование')], default='waiting', max_length=10, verbose_name='Статус')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создана')),
+                ('booking', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='waitlist_entry', to='booking.booking', verbose_name='Бронирование')),
+                ('customer_user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Запись в листе ожидания',
+                'verbose_name_plural': 'Лист ожидания',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(condition=models.Q(('status', 'waiting')), fields=['date', 'slot', 'created_at'], name='waitlist_waiting_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,131 @@
+import django.db.models.deletion
+from datetime import date
+from django.db import migrations, models
+from django.utils import timezone
+
+TABLE = 'booking_booking'
+SEQUENCE = 'booking_booking_partitioned_id_seq'
+
+# На сколько месяцев вперед создаются секции при секционировании.
+MONTHS_AHEAD = 12
+
+
+def _add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _table_definitions(cursor, table):
+    """
+    Возвращает определения индексов (кроме первичного ключа) и внешних ключей таблицы.
+    """
+    cursor.execute("""
+        SELECT pg_get_indexdef(indexrelid) FROM pg_index
+        WHERE indrelid = %s::regclass AND NOT indisprimary
+        AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conindid = indexrelid)
+    """, [table])
+    indexes = [row[0] for row in cursor.fetchall()]
+    cursor.execute("""
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype = 'f'
+    """, [table])
+    return indexes, cursor.fetchall()
+
+
+def _restore_definitions(schema_editor, indexes, foreign_keys):
+    for definition in indexes:
+        schema_editor.execute(definition)
+    for name, definition in foreign_keys:
+        schema_editor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT "{name}" {definition}')
+
+
+def partition_booking(apps, schema_editor):
+    """
+    Секционирует таблицу бронирований по месяцам поля `date` (только PostgreSQL).
+
+    Таблица пересоздается как секционированная с первичным ключом (id, date):
+    создаются секции с месяца самого раннего бронирования до MONTHS_AHEAD
+    месяцев вперед и секция по умолчанию, данные копируются, индексы и внешние
+    ключи пересоздаются с прежними именами, идентификаторы продолжают прежнюю
+    последовательность.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        indexes, foreign_keys = _table_definitions(cursor, TABLE)
+        cursor.execute(f'SELECT COALESCE(MAX(id), 0), MIN("date"), MAX("date") FROM {TABLE}')
+        max_id, first_date, last_date = cursor.fetchone()
+
+    current = timezone.localdate().replace(day=1)
+    month = min(filter(None, [first_date, current])).replace(day=1)
+    last_month = max(filter(None, [last_date, _add_months(current, MONTHS_AHEAD)])).replace(day=1)
+
+    schema_editor.execute(f'ALTER TABLE {TABLE} RENAME TO {TABLE}_legacy')
+    schema_editor.execute(
+        f'CREATE TABLE {TABLE} (LIKE {TABLE}_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+        f'PARTITION BY RANGE ("date")'
+    )
+    while month <= last_month:
+        schema_editor.execute(
+            f'CREATE TABLE {TABLE}_p{month.year:04}_{month.month:02} PARTITION OF {TABLE} '
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+    schema_editor.execute(f'CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT')
+
+    schema_editor.execute(f'INSERT INTO {TABLE} SELECT * FROM {TABLE}_legacy')
+    schema_editor.execute(f'DROP TABLE {TABLE}_legacy')
+    # Первичный ключ секционированной таблицы обязан включать ключ секционирования.
+    schema_editor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id, "date")')
+
+    schema_editor.execute(f'CREATE SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id')
+    schema_editor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+    schema_editor.execute(f"SELECT setval('{SEQUENCE}', {max_id + 1}, false)")
+
+    _restore_definitions(schema_editor, indexes, foreign_keys)
+
+
+def unpartition_booking(apps, schema_editor):
+    """
+    Возвращает обычную таблицу бронирований с данными присоединенных секций.
+
+    Отсоединенные секции остаются отдельными таблицами, их данные не переносятся.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        indexes, foreign_keys = _table_definitions(cursor, TABLE)
+
+    schema_editor.execute(f'ALTER TABLE {TABLE} RENAME TO {TABLE}_partitioned')
+    schema_editor.execute(f'CREATE TABLE {TABLE} (LIKE {TABLE}_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    schema_editor.execute(f'INSERT INTO {TABLE} SELECT * FROM {TABLE}_partitioned')
+    schema_editor.execute(f'ALTER SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id')
+    schema_editor.execute(f'DROP TABLE {TABLE}_partitioned')
+    schema_editor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id)')
+
+    _restore_definitions(schema_editor, indexes, foreign_keys)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0009_booking_indexes'),
+    ]
+
+    operations = [
+        # Внешний ключ на секционированную таблицу должен ссылаться на (id, date),
+        # поэтому ограничения ссылок на бронирование удаляются до секционирования.
+        migrations.AlterField(
+            model_name='bookingtable',
+            name='booking',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='booking_tables', to='booking.booking', verbose_name='Бронирование'),
+        ),
+        migrations.AlterField(
+            model_name='waitlistentry',
+            name='booking',
+            field=models.OneToOneField(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='waitlist_entry', to='booking.booking', verbose_name='Бронирование'),
+        ),
+        migrations.RunPython(partition_booking, unpartition_booking),
+    ]
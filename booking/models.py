@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import connections, models
 from django.contrib.auth import get_user_model
-from datetime import timedelta
+from django.contrib.postgres.fields import DateTimeRangeField
+from django.utils import timezone
+from datetime import datetime, time, timedelta
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 User = get_user_model()
@@ -10,12 +12,12 @@ class Table(models.Model):
     """
     Модель стола в ресторане.
 
-    Содержит информацию о номере стола, вместимости и связанных бронированиях.
+    Содержит информацию о номере стола и вместимости. Бронирования стола
+    доступны через обратную связь `reservations` поля `Booking.tables`.
 
     Поля:
     - `number` (`IntegerField`): Номер стола.
     - `capacity` (`IntegerField`): Вместимость стола. Валидация от 2 до 6.
-    - `reservations` (`ManyToManyField`): Связь с моделями бронирований.
 
     Метаданные:
     - `verbose_name`: "Стол"
@@ -34,12 +36,6 @@ class Table(models.Model):
         validators=[MinValueValidator(2), MaxValueValidator(6)],
         default=2
     )
-    reservations = models.ManyToManyField(
-        'Booking',
-        related_name='related_tables',
-        blank=True,
-        verbose_name="Бронирования"
-    )
 
     def __str__(self):
         return f'Стол {self.number} на {self.capacity} гостей'
@@ -66,17 +62,25 @@ class Booking(models.Model):
     - `email` (`EmailField`): Электронная почта клиента.
     - `phone_number` (`CharField`): Телефон клиента.
     - `comments` (`TextField`): Дополнительные комментарии.
-    - `tables` (`ManyToManyField`): Связь с моделями столов.
+    - `tables` (`ManyToManyField`): Связь с моделями столов через `BookingTable`.
     - `customer_user` (`ForeignKey`): Связь с пользователем, сделавшим бронирование.
     - `duration` (`DurationField`): Продолжительность бронирования.
 
     Метаданные:
     - `verbose_name`: "Бронирование"
     - `verbose_name_plural`: "Бронирования"
+    - `indexes`: (date, time) для выборок бронирований дня и интервала времени;
+      частичный индекс (customer_user, -date, -time) для списка бронирований
+      пользователя, он же заменяет индекс внешнего ключа `customer_user`.
+
+    В PostgreSQL таблица секционирована по месяцам поля `date` с первичным ключом
+    (id, date): запросы с условием по дате читают одну секцию. Секции создает и
+    отсоединяет команда `manage_booking_partitions` (см. `booking.partitions`).
 
     Методы:
     - `__str__`: Возвращает строковое представление бронирования в формате:
       'Бронирование {идентификатор} - {имя клиента}'.
+    - `get_period`: Возвращает начало и конец бронирования с учетом часового пояса.
     """
 
     objects = None
@@ -90,7 +94,8 @@ class Booking(models.Model):
     comments = models.TextField(blank=True, null=True, verbose_name="Комментарии")
     tables = models.ManyToManyField(
         'Table',
-        related_name='related_reservations',
+        through='BookingTable',
+        related_name='reservations',
         blank=True,
         verbose_name="Столы"
     )
@@ -99,6 +104,7 @@ class Booking(models.Model):
         on_delete=models.CASCADE,
         null=True,
         blank=True,
+        db_index=False,
         verbose_name="Пользователь"
     )
     duration = models.DurationField(default=timedelta(hours=2), verbose_name="Продолжительность")
@@ -106,10 +112,123 @@ class Booking(models.Model):
     class Meta:
         verbose_name = "Бронирование"
         verbose_name_plural = "Бронирования"
+        indexes = [
+            models.Index(fields=['date', 'time'], name='booking_date_time_idx'),
+            models.Index(
+                fields=['customer_user', '-date', '-time'],
+                name='booking_customer_recent_idx',
+                condition=models.Q(customer_user__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return f"Бронирование {self.id} - {self.name}"
 
+    def get_period(self):
+        """
+        Возвращает начало и конец бронирования в виде datetime с часовым поясом.
+        """
+        start_time = self.time if isinstance(self.time, time) else time.fromisoformat(self.time)
+        start = timezone.make_aware(datetime.combine(self.date, start_time))
+        return start, start + self.duration
+
+
+class TsTzRange(models.Func):
+    """
+    SQL-функция PostgreSQL `tstzrange(start, end)`.
+    """
+    function = 'TSTZRANGE'
+    output_field = DateTimeRangeField()
+
+
+class BookingTableQuerySet(models.QuerySet):
+    """
+    QuerySet для строк занятости столов.
+    """
+
+    def overlapping(self, start, end):
+        """
+        Возвращает строки, интервал которых пересекается с полуинтервалом [start, end).
+
+        В PostgreSQL сравнение выполняется оператором `&&` над `tstzrange(start, "end")`,
+        что позволяет использовать GiST-индекс ограничения `booking_table_no_overlap`.
+        """
+        queryset = self.filter(start__isnull=False, end__isnull=False)
+        if connections[self.db].vendor == 'postgresql':
+            return queryset.alias(period=TsTzRange('start', 'end')).filter(period__overlap=(start, end))
+        return queryset.filter(start__lt=end, end__gt=start)
+
+
+class BookingTable(models.Model):
+    """
+    Модель связи бронирования со столом.
+
+    Денормализованно хранит интервал бронирования для каждого занятого стола.
+    В PostgreSQL на таблице действует исключающее ограничение
+    `booking_table_no_overlap` (`table_id WITH =, tstzrange(start, "end") WITH &&`),
+    поэтому база данных сама отклоняет двойное бронирование стола.
+
+    Поля:
+    - `booking` (`ForeignKey`): Бронирование.
+    - `table` (`ForeignKey`): Стол.
+    - `start` (`DateTimeField`): Начало бронирования.
+    - `end` (`DateTimeField`): Окончание бронирования.
+
+    Поля `start` и `end` заполняются автоматически из бронирования
+    (см. `save` и обработчики в `booking.signals`).
+
+    Это единственная таблица связи столов и бронирований: поиск по бронированию
+    использует уникальный индекс (booking, table), поиск по столу — составной
+    индекс (table, booking), поэтому отдельные индексы внешних ключей не нужны.
+
+    Таблица бронирований в PostgreSQL секционирована по месяцам (см.
+    `booking.partitions`), а внешний ключ на секционированную таблицу может
+    ссылаться только на ключ, включающий дату. Поэтому ограничение внешнего ключа
+    `booking` в базе данных не создается, каскадное удаление выполняет Django.
+    Сама таблица связи не секционируется: исключающее ограничение должно
+    действовать на всех бронированиях стола, а не внутри одного месяца.
+
+    Метаданные:
+    - `verbose_name`: "Стол бронирования"
+    - `verbose_name_plural`: "Столы бронирований"
+    - `db_table`: 'booking_booking_tables'
+    """
+
+    booking = models.ForeignKey(
+        'Booking',
+        on_delete=models.CASCADE,
+        related_name='booking_tables',
+        db_index=False,
+        db_constraint=False,
+        verbose_name="Бронирование"
+    )
+    table = models.ForeignKey(
+        'Table',
+        on_delete=models.CASCADE,
+        related_name='booking_tables',
+        db_index=False,
+        verbose_name="Стол"
+    )
+    start = models.DateTimeField(null=True, blank=True, verbose_name="Начало")
+    end = models.DateTimeField(null=True, blank=True, verbose_name="Окончание")
+
+    objects = BookingTableQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Стол бронирования"
+        verbose_name_plural = "Столы бронирований"
+        db_table = 'booking_booking_tables'
+        unique_together = [('booking', 'table')]
+        indexes = [models.Index(fields=['table', 'booking'], name='booking_table_table_idx')]
+
+    def __str__(self):
+        return f"{self.table} - {self.booking}"
+
+    def save(self, *args, **kwargs):
+        if self.start is None or self.end is None:
+            self.start, self.end = self.booking.get_period()
+        super().save(*args, **kwargs)
+
 
 class CoverImage(models.Model):
     """
@@ -139,3 +258,145 @@ class CoverImage(models.Model):
 
     def __str__(self):
         return self.title
+
+
+class SlotOccupancy(models.Model):
+    """
+    Модель занятости стола в получасовом слоте.
+
+    Предрассчитанная таблица занятости: по одной строке на каждый слот каждого
+    стола бронирования. Поддерживается обработчиками сигналов в `booking.signals`
+    и пересобирается командой `rebuild_slot_occupancy`. Позволяет получить
+    занятость столов на дату одним запросом по индексу (date, slot, table).
+
+    Поля:
+    - `date` (`DateField`): Дата слота.
+    - `slot` (`PositiveSmallIntegerField`): Номер получасового слота от 0 до 47.
+    - `table` (`ForeignKey`): Занятый стол.
+    - `booking_table` (`ForeignKey`): Строка `BookingTable`, занимающая слот.
+      При её удалении строки занятости удаляются каскадно.
+
+    Метаданные:
+    - `verbose_name`: "Занятость слота"
+    - `verbose_name_plural`: "Занятость слотов"
+    """
+
+    date = models.DateField(verbose_name="Дата")
+    slot = models.PositiveSmallIntegerField(verbose_name="Слот")
+    table = models.ForeignKey(
+        'Table',
+        on_delete=models.CASCADE,
+        related_name='slot_occupancies',
+        verbose_name="Стол"
+    )
+    booking_table = models.ForeignKey(
+        'BookingTable',
+        on_delete=models.CASCADE,
+        related_name='slot_occupancies',
+        verbose_name="Стол бронирования"
+    )
+
+    class Meta:
+        verbose_name = "Занятость слота"
+        verbose_name_plural = "Занятость слотов"
+        indexes = [
+            models.Index(fields=['date', 'slot', 'table'], name='slot_occupancy_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} слот {self.slot} - стол {self.table_id}"
+
+
+class WaitlistEntry(models.Model):
+    """
+    Модель записи в листе ожидания.
+
+    Гость, которому не хватило столов, встает в лист ожидания на выбранные дату
+    и время. При отмене бронирования обработчик в `booking.signals` запускает
+    задачу `promote_waitlist_task`, которая переводит подходящие записи в
+    бронирования (см. `booking.waitlist`).
+
+    Поля:
+    - `date` (`DateField`): Дата бронирования.
+    - `time` (`TimeField`): Время бронирования.
+    - `slot` (`PositiveSmallIntegerField`): Номер получасового слота времени, заполняется автоматически.
+    - `guests` (`IntegerField`): Количество гостей.
+    - `name`, `email`, `phone_number`, `comments`: Контактные данные, как в `Booking`.
+    - `duration` (`DurationField`): Продолжительность бронирования.
+    - `customer_user` (`ForeignKey`): Пользователь, вставший в лист ожидания.
+    - `status` (`CharField`): Ожидает или переведена в бронирование.
+    - `booking` (`OneToOneField`): Бронирование, созданное из записи.
+    - `created_at` (`DateTimeField`): Время постановки в лист ожидания.
+
+    Метаданные:
+    - `verbose_name`: "Запись в листе ожидания"
+    - `verbose_name_plural`: "Лист ожидания"
+    - `ordering`: ['created_at']
+    - `indexes`: частичный индекс (date, slot, created_at) по ожидающим записям,
+      поэтому поиск гостей на освободившееся время выполняется за O(log n).
+    """
+
+    STATUS_WAITING = 'waiting'
+    STATUS_PROMOTED = 'promoted'
+    STATUS_CHOICES = [
+        (STATUS_WAITING, 'Ожидает'),
+        (STATUS_PROMOTED, 'Переведена в бронирование'),
+    ]
+
+    date = models.DateField(verbose_name="Дата")
+    time = models.TimeField(verbose_name="Время")
+    slot = models.PositiveSmallIntegerField(editable=False, verbose_name="Слот")
+    guests = models.IntegerField(verbose_name="Количество гостей")
+    name = models.CharField(max_length=50, verbose_name="Имя")
+    email = models.EmailField(max_length=254, verbose_name="Электронная почта")
+    phone_number = models.CharField(max_length=20, verbose_name="Телефон")
+    comments = models.TextField(blank=True, null=True, verbose_name="Комментарии")
+    duration = models.DurationField(default=timedelta(hours=2), verbose_name="Продолжительность")
+    customer_user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        verbose_name="Пользователь"
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_WAITING, verbose_name="Статус")
+    booking = models.OneToOneField(
+        'Booking',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_constraint=False,
+        related_name='waitlist_entry',
+        verbose_name="Бронирование"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создана")
+
+    class Meta:
+        verbose_name = "Запись в листе ожидания"
+        verbose_name_plural = "Лист ожидания"
+        ordering = ['created_at']
+        indexes = [
+            models.Index(
+                fields=['date', 'slot', 'created_at'],
+                name='waitlist_waiting_idx',
+                condition=models.Q(status='waiting'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"Ожидание {self.date} {self.time} - {self.name}"
+
+    def save(self, *args, **kwargs):
+        start_time = self.time if isinstance(self.time, time) else time.fromisoformat(self.time)
+        self.slot = (start_time.hour * 60 + start_time.minute) // 30
+        super().save(*args, **kwargs)
+
+    def to_booking(self):
+        """
+        Возвращает несохраненное бронирование с данными записи.
+        """
+        return Booking(
+            date=self.date, time=self.time, guests=self.guests, name=self.name, email=self.email,
+            phone_number=self.phone_number, comments=self.comments, duration=self.duration,
+            customer_user=self.customer_user
+        )
@@ -0,0 +1,178 @@
+from calendar import monthrange
+from datetime import date, time, timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from booking.availability import DAY_MASK, DEFAULT_DURATION, SLOT_MINUTES, SLOTS_PER_DAY, booking_slots
+from booking.models import SlotOccupancy, Table
+from config.db_router import primary_reads
+
+MONTH_CACHE_TIMEOUT = 60 * 60
+MONTH_VERSION_TIMEOUT = 60 * 60 * 24 * 60
+TABLES_VERSION_KEY = 'month_availability_version:tables'
+
+
+def _month_version_key(year, month):
+    return f'month_availability_version:{year}-{month:02}'
+
+
+def _bump(key):
+    if not cache.add(key, 2, MONTH_VERSION_TIMEOUT):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 2, MONTH_VERSION_TIMEOUT)
+
+
+def get_month_version(year, month):
+    """
+    Возвращает версию данных месяца, увеличиваемую при изменении бронирований
+    месяца или списка столов.
+    """
+    versions = cache.get_many([TABLES_VERSION_KEY, _month_version_key(year, month)])
+    return f'{versions.get(TABLES_VERSION_KEY, 1)}.{versions.get(_month_version_key(year, month), 1)}'
+
+
+def invalidate_all_months():
+    """
+    Сбрасывает кэш календаря для всех месяцев (например, при изменении столов).
+    """
+    _bump(TABLES_VERSION_KEY)
+
+
+def invalidate_months(*days):
+    """
+    Сбрасывает кэш календаря для месяцев, в которые попадают указанные даты.
+
+    Поздние слоты последнего дня месяца зависят от бронирований первого дня
+    следующего месяца, поэтому вместе с датой сбрасываются месяцы соседних дней.
+    """
+    months = set()
+    for day in days:
+        for current in (day - timedelta(days=1), day, day + timedelta(days=1)):
+            months.add((current.year, current.month))
+    for year, month in months:
+        _bump(_month_version_key(year, month))
+
+
+def _add_weighted(planes, mask, weight):
+    """
+    Прибавляет `weight` ко всем счётчикам, отмеченным битами `mask`.
+
+    Счётчики хранятся побитовыми срезами: `planes[i]` содержит i-й бит счётчика
+    каждой позиции, поэтому одно сложение обрабатывает сразу все слоты месяца.
+    """
+    bit = 0
+    while weight:
+        if weight & 1:
+            carry = mask
+            index = bit
+            while carry:
+                while index >= len(planes):
+                    planes.append(0)
+                planes[index], carry = planes[index] ^ carry, planes[index] & carry
+                index += 1
+        weight >>= 1
+        bit += 1
+
+
+def _at_least(planes, threshold, width_mask):
+    """
+    Возвращает маску позиций, счётчик которых не меньше `threshold`.
+    """
+    greater, equal = 0, width_mask
+    for index in reversed(range(max(len(planes), threshold.bit_length()))):
+        plane = planes[index] if index < len(planes) else 0
+        if threshold >> index & 1:
+            equal &= plane
+        else:
+            greater |= equal & plane
+            equal &= ~plane
+    return greater | equal
+
+
+def occupancy_matrix(year, month):
+    """
+    Строит матрицу занятости столов на месяц одним запросом к `SlotOccupancy`.
+
+    Каждая строка матрицы — целое число, в котором бит `день * 48 + слот` означает,
+    что стол занят в этом слоте. Матрица захватывает первый день следующего месяца,
+    так как поздние бронирования последнего дня заканчиваются после полуночи.
+
+    :return: Кортеж (столы, строки занятости в том же порядке, количество дней в месяце).
+    """
+    days_in_month = monthrange(year, month)[1]
+    first_day = date(year, month, 1)
+
+    tables = list(Table.objects.order_by('number', 'id').values_list('id', 'capacity'))
+    rows = {table_id: 0 for table_id, _ in tables}
+    occupied = SlotOccupancy.objects.filter(
+        date__range=(first_day, first_day + timedelta(days=days_in_month))
+    ).values_list('table_id', 'date', 'slot')
+    for table_id, day, slot in occupied:
+        if table_id in rows:
+            rows[table_id] |= 1 << ((day - first_day).days * SLOTS_PER_DAY + slot)
+    return tables, [rows[table_id] for table_id, _ in tables], days_in_month
+
+
+def _seatable_day_masks(year, month, guests, duration):
+    """
+    Возвращает для каждого дня месяца 48-битную маску слотов, в которые можно
+    рассадить компанию из `guests` гостей.
+
+    Для каждого стола маска «начало бронирования в этом слоте приведёт к
+    конфликту» получается сдвигами строки занятости на длину бронирования.
+    Свободные места по всем слотам месяца суммируются побитовыми срезами, после
+    чего сравнение с количеством гостей даёт маску подходящих слотов.
+    Свободных мест достаточно тогда и только тогда, когда компанию можно
+    рассадить (`assign_tables` найдёт комбинацию столов).
+    """
+    tables, rows, days_in_month = occupancy_matrix(year, month)
+    first_slot, last_slot = booking_slots(time.min, duration)
+    length = last_slot - first_slot
+    month_mask = (1 << (days_in_month * SLOTS_PER_DAY)) - 1
+
+    planes = []
+    for (_, capacity), row in zip(tables, rows):
+        conflicts = 0
+        for shift in range(length):
+            conflicts |= row >> shift
+        _add_weighted(planes, ~conflicts & month_mask, capacity)
+
+    seatable = _at_least(planes, guests, month_mask)
+    return [seatable >> (day * SLOTS_PER_DAY) & DAY_MASK for day in range(days_in_month)]
+
+
+def get_month_availability(year, month, guests, duration=DEFAULT_DURATION):
+    """
+    Возвращает доступность каждого дня месяца для компании из `guests` гостей.
+
+    Маски дней кэшируются под ключом с версией месяца, которая увеличивается
+    обработчиками сигналов при изменении бронирований месяца. Прошедшие слоты
+    отбрасываются при каждом вызове, поэтому кэш не устаревает со временем.
+
+    :return: Список словарей с ключами `date`, `available_slots` и `full`.
+    """
+    guests = max(1, guests)
+    key = (f'month_availability:{year}-{month:02}:v{get_month_version(year, month)}:'
+           f'{guests}:{int(duration.total_seconds())}')
+    day_masks = cache.get(key)
+    if day_masks is None:
+        # Данные для общего кэша читаются из основной БД, а не из отстающей реплики.
+        with primary_reads():
+            day_masks = _seatable_day_masks(year, month, guests, duration)
+        cache.set(key, day_masks, MONTH_CACHE_TIMEOUT)
+
+    now = timezone.localtime()
+    current_slot = (now.hour * 60 + now.minute) // SLOT_MINUTES + 1
+    result = []
+    for day_index, mask in enumerate(day_masks):
+        day = date(year, month, day_index + 1)
+        if day < now.date():
+            mask = 0
+        elif day == now.date():
+            mask &= DAY_MASK >> current_slot << current_slot
+        available_slots = mask.bit_count()
+        result.append({'date': day.isoformat(), 'available_slots': available_slots, 'full': not available_slots})
+    return result
@@ -0,0 +1,46 @@
+from booking.availability import period_slots
+from booking.models import BookingTable, SlotOccupancy
+
+
+def build_slot_occupancies(booking_tables):
+    """
+    Возвращает несохранённые строки `SlotOccupancy` для строк `BookingTable`.
+
+    Аргументы:
+        booking_tables (iterable[BookingTable]): Строки с заполненными `start` и `end`.
+
+    Возвращает:
+        list[SlotOccupancy]: Строки занятости по одной на каждый слот.
+    """
+    return [
+        SlotOccupancy(date=day, slot=slot, table_id=row.table_id, booking_table_id=row.pk)
+        for row in booking_tables
+        if row.start is not None and row.end is not None
+        for day, slot in period_slots(row.start, row.end)
+    ]
+
+
+def refresh_slot_occupancy(booking_tables):
+    """
+    Пересоздаёт строки занятости для указанных строк `BookingTable`.
+
+    Аргументы:
+        booking_tables (QuerySet[BookingTable]): Строки, занятость которых нужно обновить;
+            занятость записывается в БД этого запроса.
+    """
+    rows = list(booking_tables.only('id', 'table_id', 'start', 'end'))
+    occupancy = SlotOccupancy.objects.using(booking_tables.db)
+    occupancy.filter(booking_table__in=[row.pk for row in rows]).delete()
+    occupancy.bulk_create(build_slot_occupancies(rows), batch_size=1000)
+
+
+def expected_slot_occupancy(chunk_size=1000):
+    """
+    Возвращает множество ключей (дата, слот, стол, строка бронирования), которые
+    должны присутствовать в `SlotOccupancy` по данным `BookingTable`.
+    """
+    rows = BookingTable.objects.only('id', 'table_id', 'start', 'end').iterator(chunk_size=chunk_size)
+    return {
+        (item.date, item.slot, item.table_id, item.booking_table_id)
+        for item in build_slot_occupancies(rows)
+    }
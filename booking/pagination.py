@@ -0,0 +1,160 @@
+import json
+from datetime import date, time
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+# Порядок, по которому пагинируются бронирования. `id` делает ключ уникальным.
+KEYSET_ORDERING = ('date', 'time', 'id')
+
+
+def encode_cursor(booking):
+    """
+    Возвращает курсор страницы — ключ (дата, время, id) бронирования в виде строки.
+    """
+    return f'{booking.date.isoformat()}_{booking.time.isoformat()}_{booking.id}'
+
+
+def decode_cursor(cursor):
+    """
+    Разбирает курсор, созданный `encode_cursor`.
+
+    Возвращает:
+        tuple[date, time, int] | None: Ключ бронирования или None для некорректного курсора.
+    """
+    try:
+        day, start, pk = cursor.split('_')
+        return date.fromisoformat(day), time.fromisoformat(start), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def keyset_filter(key, reverse=False):
+    """
+    Возвращает условие «(date, time, id) больше ключа» (при `reverse=True` — меньше).
+
+    Условие по одной дате дублирует первую часть сравнения, чтобы планировщик
+    ограничил просмотр индекса (date, time) диапазоном.
+    """
+    day, start, pk = key
+    if reverse:
+        return Q(date__lte=day) & (Q(date__lt=day) | Q(date=day, time__lt=start) | Q(date=day, time=start, id__lt=pk))
+    return Q(date__gte=day) & (Q(date__gt=day) | Q(date=day, time__gt=start) | Q(date=day, time=start, id__gt=pk))
+
+
+class KeysetPage:
+    """
+    Страница бронирований при пагинации по ключу (seek-пагинация).
+
+    Вместо OFFSET страница выбирается условием «ключ больше (меньше) ключа
+    крайней записи предыдущей страницы» и читается по индексу, поэтому любая
+    страница стоит столько же, сколько первая. Номеров страниц и общего
+    количества нет: переход возможен только на соседние страницы по курсорам.
+
+    Атрибуты:
+        object_list (list[Booking]): Бронирования страницы.
+        next_cursor (str | None): Курсор следующей страницы.
+        previous_cursor (str | None): Курсор предыдущей страницы.
+    """
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def keyset_paginate(queryset, per_page, after=None, before=None):
+    """
+    Возвращает страницу бронирований в порядке (date, time, id).
+
+    Аргументы:
+        queryset (QuerySet): Отфильтрованные бронирования.
+        per_page (int): Размер страницы.
+        after (str | None): Курсор: страница после этого бронирования.
+        before (str | None): Курсор: страница перед этим бронированием.
+
+    Возвращает:
+        KeysetPage: Страница с курсорами соседних страниц.
+    """
+    after_key, before_key = decode_cursor(after), decode_cursor(before)
+
+    if before_key is not None:
+        # Страница назад читается в обратном порядке и разворачивается.
+        rows = list(queryset.filter(keyset_filter(before_key, reverse=True)).order_by(*(f'-{field}' for field in KEYSET_ORDERING))
+                    [:per_page + 1])
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        has_next = True
+    else:
+        if after_key is not None:
+            queryset = queryset.filter(keyset_filter(after_key))
+        rows = list(queryset.order_by(*KEYSET_ORDERING)[:per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_previous = after_key is not None
+
+    return KeysetPage(
+        rows,
+        next_cursor=encode_cursor(rows[-1]) if rows and has_next else None,
+        previous_cursor=encode_cursor(rows[0]) if rows and has_previous else None,
+    )
+
+
+def estimated_count(queryset):
+    """
+    Возвращает приблизительное количество строк запроса по статистике PostgreSQL.
+
+    Для запроса без условий используется `pg_class.reltuples` таблицы, для
+    запроса с условиями — оценка строк из плана (EXPLAIN). Оба значения
+    обновляются ANALYZE/autovacuum и не требуют чтения таблицы, в отличие от
+    COUNT(*). Для других СУБД и таблиц без статистики возвращает None.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    if not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        # reltuples = -1, если таблица еще не анализировалась.
+        return int(row[0]) if row and row[0] >= 0 else None
+
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор, который для больших таблиц берет количество строк из статистики PostgreSQL.
+
+    Если оценка `estimated_count` превышает `ESTIMATED_COUNT_THRESHOLD`, точный
+    COUNT(*) не выполняется: номера последних страниц становятся приблизительными,
+    зато список открывается без полного чтения таблицы. Небольшие выборки и
+    другие СУБД считаются точно.
+    """
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list) if hasattr(self.object_list, 'query') else None
+        if estimate is not None and estimate > settings.ESTIMATED_COUNT_THRESHOLD:
+            return estimate
+        return super().count
@@ -0,0 +1,179 @@
+import logging
+import re
+from datetime import date
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from booking.models import Booking
+
+logger = logging.getLogger(__name__)
+
+# Секция по умолчанию принимает строки, для месяца которых секция еще не создана.
+DEFAULT_PARTITION_SUFFIX = 'default'
+
+PARTITION_NAME = re.compile(r'_p(\d{4})_(\d{2})$')
+
+
+class PartitionNotEmptyError(Exception):
+    """
+    Исключение, возникающее при попытке отсоединить секцию, в которой остались бронирования.
+    """
+
+
+def parent_table():
+    return Booking._meta.db_table
+
+
+def month_start(day):
+    """
+    Возвращает первый день месяца даты.
+    """
+    return day.replace(day=1)
+
+
+def add_months(day, months):
+    """
+    Возвращает первый день месяца, отстоящего от месяца даты на `months` месяцев.
+    """
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    """
+    Возвращает имя секции бронирований месяца, например `booking_booking_p2030_01`.
+    """
+    return f'{parent_table()}_p{month.year:04}_{month.month:02}'
+
+
+def is_partitioned(using='default'):
+    """
+    Проверяет, секционирована ли таблица бронирований (только PostgreSQL).
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [parent_table()])
+        row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def attached_partitions(using='default'):
+    """
+    Возвращает первые дни месяцев, для которых к таблице бронирований присоединены секции.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute("""
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s)
+        """, [parent_table()])
+        names = [row[0] for row in cursor.fetchall()]
+    months = []
+    for name in names:
+        match = PARTITION_NAME.search(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def create_partition(month, using='default'):
+    """
+    Создает и присоединяет секцию бронирований месяца.
+
+    Бронирования этого месяца, попавшие в секцию по умолчанию, переносятся в
+    новую секцию в той же транзакции: иначе PostgreSQL не даст присоединить
+    секцию, диапазон которой пересекается со строками секции по умолчанию.
+    """
+    name, parent = partition_name(month), parent_table()
+    default = f'{parent}_{DEFAULT_PARTITION_SUFFIX}'
+    bounds = [month, add_months(month, 1)]
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.execute(f'CREATE TABLE "{name}" (LIKE "{parent}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(f"""
+            WITH moved AS (DELETE FROM "{default}" WHERE "date" >= %s AND "date" < %s RETURNING *)
+            INSERT INTO "{name}" SELECT * FROM moved
+        """, bounds)
+        cursor.execute(f'ALTER TABLE "{parent}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)', bounds)
+    logger.info(f"Создана секция бронирований {name}")
+
+
+def detach_partition(month, using='default'):
+    """
+    Отсоединяет секцию бронирований месяца.
+
+    Отсоединяется только пустая секция: строки столов, занятости слотов и листа
+    ожидания ссылаются на бронирования без ограничений внешнего ключа и после
+    отсоединения остались бы без бронирований. Поэтому бронирования месяца
+    сначала переносятся в архив (см. `manage_partitions`), иначе вызывается
+    `PartitionNotEmptyError`. Секция остается отдельной таблицей с прежним именем.
+    """
+    name = partition_name(month)
+    if Booking.objects.using(using).filter(date__gte=month, date__lt=add_months(month, 1)).exists():
+        raise PartitionNotEmptyError(f"В секции {name} есть бронирования, сначала перенесите их в архив")
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{parent_table()}" DETACH PARTITION "{name}"')
+    logger.info(f"Отсоединена секция бронирований {name}")
+
+
+def manage_partitions(months_ahead=None, retention_months=None, today=None, using='default'):
+    """
+    Создает секции на `months_ahead` месяцев вперед и отсоединяет секции старше `retention_months` месяцев.
+
+    Перед отсоединением бронирования до границы хранения вместе со строками
+    столов и занятости слотов переносятся в архив (`booking.archive.archive_bookings`),
+    поэтому отсоединяются уже пустые секции.
+
+    Аргументы:
+        months_ahead (int | None): Количество будущих месяцев, по умолчанию
+            `BOOKING_PARTITION_MONTHS_AHEAD`.
+        retention_months (int | None): Сколько прошедших месяцев оставлять
+            присоединенными, по умолчанию `BOOKING_PARTITION_RETENTION_MONTHS`;
+            0 — не отсоединять секции.
+        today (date | None): Текущая дата.
+        using (str): Псевдоним базы данных.
+
+    Возвращает:
+        tuple[list[date], list[date]]: Месяцы созданных и отсоединенных секций.
+    """
+    if not is_partitioned(using):
+        return [], []
+    if months_ahead is None:
+        months_ahead = settings.BOOKING_PARTITION_MONTHS_AHEAD
+    if retention_months is None:
+        retention_months = settings.BOOKING_PARTITION_RETENTION_MONTHS
+    current = month_start(today or timezone.localdate())
+
+    attached = set(attached_partitions(using))
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month not in attached:
+            create_partition(month, using)
+            created.append(month)
+
+    detached = []
+    if retention_months:
+        oldest = add_months(current, -retention_months)
+        expired = [month for month in sorted(attached) if month < oldest]
+        if expired:
+            from booking.archive import archive_bookings
+
+            archive_bookings(before=oldest)
+        for month in expired:
+            detach_partition(month, using)
+            detached.append(month)
+    return created, detached
+
+
+def scanned_partitions(queryset):
+    """
+    Возвращает секции бронирований, которые читает запрос по плану PostgreSQL.
+
+    Запрос с условием по `date` должен после отсечения секций читать одну секцию.
+    """
+    pattern = re.compile(rf'\bon ({re.escape(parent_table())}_(?:p\d{{4}}_\d{{2}}|{DEFAULT_PARTITION_SUFFIX}))\b')
+    return sorted(set(pattern.findall(queryset.explain())))
@@ -0,0 +1,107 @@
+import re
+from datetime import time, timedelta
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from booking.models import Booking, BookingTable
+from booking.pagination import KEYSET_ORDERING, keyset_filter
+from users.models import User
+
+# Строка плана SQLite с полным просмотром таблицы: `SCAN <таблица>` без `USING INDEX`.
+SQLITE_SCAN = re.compile(r'\bSCAN (\w+)(?! USING)\s*$')
+
+# Узел плана PostgreSQL с последовательным просмотром таблицы.
+POSTGRES_SCAN = re.compile(r'\bSeq Scan on (\w+)')
+
+
+def hot_queries(day, user=None, token=''):
+    """
+    Возвращает частые запросы приложения в том виде, в каком их строят представления и сервисы.
+
+    Аргументы:
+        day (date): Дата, по которой выбираются бронирования.
+        user (User | None): Пользователь для списка его бронирований.
+        token (str): Токен верификации пользователя.
+
+    Возвращает:
+        dict[str, QuerySet]: Запросы по названиям.
+    """
+    return {
+        # services.get_bookings_from_cache
+        'bookings_of_day': Booking.objects.filter(date=day).order_by('time', 'id'),
+        'booking_tables_of_day': BookingTable.objects.filter(booking__date=day).values_list('booking_id', 'table_id'),
+        # бронирования дня в интервале времени и на точное время
+        'bookings_in_time_range': Booking.objects.filter(date=day, time__range=(time(12), time(14))),
+        'bookings_at_time': Booking.objects.filter(date=day, time=time(19)),
+        # AllReservationsView: страница после курсора
+        'all_reservations_page': Booking.objects.filter(keyset_filter((day, time(19), 0))).order_by(
+            *KEYSET_ORDERING)[:11],
+        # ReservationListView
+        'customer_bookings': Booking.objects.filter(customer_user=user).order_by('-date', '-time'),
+        # users.views.verify_view
+        'user_by_token': User.objects.filter(token=token),
+    }
+
+
+def sequential_scans(queryset):
+    """
+    Выполняет EXPLAIN запроса и возвращает таблицы, которые читаются полным просмотром.
+
+    В PostgreSQL последовательный просмотр на время EXPLAIN запрещается
+    (`enable_seqscan = off`): на небольших тестовых данных планировщик выбирает
+    его и при наличии индекса, а при запрете остается на нем, только если
+    подходящего индекса нет.
+
+    Возвращает:
+        tuple[list[str], str]: Таблицы с полным просмотром и текст плана.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        with transaction.atomic(using=queryset.db), connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = queryset.explain()
+        return POSTGRES_SCAN.findall(plan), plan
+
+    plan = queryset.explain()
+    return [match.group(1) for line in plan.splitlines() if (match := SQLITE_SCAN.search(line))], plan
+
+
+def explain_queries(queries=None):
+    """
+    Выполняет EXPLAIN запросов и возвращает таблицы с полным просмотром и план для каждого.
+
+    Без аргументов проверяет `hot_queries` по последней дате бронирований,
+    первому пользователю и первому заданному токену текущей базы.
+
+    Возвращает:
+        dict[str, tuple[list[str], str]]: Таблицы с полным просмотром и план по названиям запросов.
+    """
+    if queries is None:
+        queries = hot_queries(
+            Booking.objects.order_by('-date').values_list('date', flat=True).first() or timezone.localdate(),
+            User.objects.order_by('pk').first(),
+            User.objects.filter(token__isnull=False).values_list('token', flat=True).first() or '',
+        )
+    return {name: sequential_scans(queryset) for name, queryset in queries.items()}
+
+
+def seed_bookings(days=30, per_day=20, users=10):
+    """
+    Заполняет базу бронированиями и пользователями для проверки планов запросов.
+
+    Возвращает:
+        tuple[date, User]: Одна из заполненных дат и один из пользователей.
+    """
+    User.objects.bulk_create([
+        User(email=f'plan-{index}@example.com', token=f'plan{index:06}') for index in range(users)
+    ])
+    created_users = list(User.objects.filter(email__startswith='plan-').order_by('pk'))
+    start = timezone.localdate()
+    Booking.objects.bulk_create([
+        Booking(date=start + timedelta(days=day), time=time(10 + index % 12, 30 * (index % 2)), guests=2,
+                name='План', email='plan@example.com', phone_number='+79990000000',
+                customer_user=created_users[index % len(created_users)])
+        for day in range(days) for index in range(per_day)
+    ])
+    return start, created_users[0]
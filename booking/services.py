@@ -1,75 +1,174 @@
-from django.core.cache import cache
-from booking.models import Table, Booking, CoverImage
+import logging
+import random
+import time
+from datetime import timedelta
+from django.db import IntegrityError, OperationalError, connections, transaction
+from django.utils import timezone
+from booking.availability import TableInfo
+from booking.caching import get_or_build
+from booking.models import Table, Booking, BookingTable, CoverImage
 from config.settings import CACHE_ENABLED
 
+logger = logging.getLogger(__name__)
+
+# Пространство имён рекомендательных блокировок PostgreSQL для бронирований.
+BOOKING_LOCK_NAMESPACE = 7301
+
+# Пространства имен версионированного кэша (см. `booking.caching`).
+TABLES_NAMESPACE = 'tables'
+COVER_IMAGES_NAMESPACE = 'cover_images'
+
+
+def bookings_namespace(day):
+    """
+    Возвращает пространство имен кэша бронирований на дату.
+    """
+    return f'bookings:{day.isoformat()}'
+
 
 def get_tables_from_cache():
     """
     Получение списка столов с использованием кэширования.
 
-    Проверяет, включено ли кэширование. Если кэширование отключено, выполняется запрос к базе данных для получения
-    всех столов. Если кэширование включено, сначала пытается извлечь данные из кэша. Если данные не найдены в кэше,
-    выполняется запрос к базе данных, и результат сохраняется в кэше.
+    Проверяет, включено ли кэширование. Если кэширование отключено, выполняется запрос к базе данных. Если
+    кэширование включено, список берется из кэша процесса или Redis под ключом с версией, которая
+    увеличивается при сохранении и удалении столов (см. `booking.signals`).
 
     Возвращаемое значение:
-        QuerySet: Список всех столов, полученный из кэша или базы данных.
+        list[TableInfo]: Столы в порядке номеров.
     """
-    if not CACHE_ENABLED:
-        return Table.objects.all()
-    else:
-        key = 'tables_list'
-        tables = cache.get(key)
-        if tables is not None:
-            return tables
-        else:
-            tables = Table.objects.all()
-            cache.set(key, tables)
-            return tables
-
-
-def get_bookings_from_cache():
+    def build():
+        return list(Table.objects.order_by('number', 'id').values_list('id', 'number', 'capacity'))
+
+    rows = get_or_build(TABLES_NAMESPACE, 'list', build, local=True) if CACHE_ENABLED else build()
+    return [TableInfo(*row) for row in rows]
+
+
+def get_bookings_from_cache(day):
     """
-    Получение списка бронирований с использованием кэширования.
+    Получение списка бронирований на дату с использованием кэширования.
+
+    Бронирования кэшируются отдельно по каждой дате, поэтому изменение бронирования сбрасывает только его
+    дату. В кэше хранятся словари с полями бронирования и идентификаторами столов.
 
-    Проверяет, включено ли кэширование. Если кэширование отключено, выполняется запрос к базе данных для получения
-     всех бронирований. Если кэширование включено, сначала пытается извлечь данные из кэша. Если данные не найдены
-     в кэше, выполняется запрос к базе данных, и результат сохраняется в кэше.
+    Аргументы:
+        day (date): Дата бронирований.
 
     Возвращаемое значение:
-        QuerySet: Список всех бронирований, полученный из кэша или базы данных.
+        list[dict]: Бронирования на дату в порядке времени.
     """
-    if not CACHE_ENABLED:
-        return Booking.objects.all()
-    else:
-        key = 'bookings_list'
-        bookings = cache.get(key)
-        if bookings is not None:
-            return bookings
-        else:
-            bookings = Booking.objects.all()
-            cache.set(key, bookings)
-            return bookings
+    def build():
+        bookings = list(Booking.objects.filter(date=day).order_by('time', 'id').values(
+            'id', 'date', 'time', 'duration', 'guests', 'name', 'email', 'phone_number', 'comments',
+            'customer_user_id'))
+        table_ids = {}
+        for booking_id, table_id in BookingTable.objects.filter(booking__date=day).values_list(
+                'booking_id', 'table_id'):
+            table_ids.setdefault(booking_id, []).append(table_id)
+        for booking in bookings:
+            booking['table_ids'] = sorted(table_ids.get(booking['id'], []))
+        return bookings
+
+    return get_or_build(bookings_namespace(day), 'list', build) if CACHE_ENABLED else build()
 
 
 def get_cover_images_from_cache():
     """
     Получение списка обложек с использованием кэширования.
 
-    Проверяет, включено ли кэширование. Если кэширование отключено, выполняется запрос к базе данных для
-    получения всех обложек. Если кэширование включено, сначала пытается извлечь данные из кэша. Если данные
-    не найдены в кэше, выполняется запрос к базе данных, и результат сохраняется в кэше.
+    Проверяет, включено ли кэширование. Если кэширование отключено, выполняется запрос к базе данных. Если
+    кэширование включено, список берется из кэша процесса или Redis под ключом с версией, которая
+    увеличивается при сохранении и удалении обложек.
 
     Возвращаемое значение:
-        QuerySet: Список всех обложек, полученный из кэша или базы данных.
+        list[dict]: Обложки с полями `id`, `title` и `image` (путь к файлу).
+    """
+    def build():
+        return list(CoverImage.objects.order_by('id').values('id', 'title', 'image'))
+
+    return get_or_build(COVER_IMAGES_NAMESPACE, 'list', build, local=True) if CACHE_ENABLED else build()
+
+
+class TablesUnavailableError(Exception):
+    """
+    Исключение, возникающее, когда для бронирования не нашлось свободных столов.
     """
-    if not CACHE_ENABLED:
-        return CoverImage.objects.all()
-    else:
-        key = 'cover_images_list'
-        cover_images = cache.get(key)
-        if cover_images is not None:
-            return cover_images
-        else:
-            cover_images = CoverImage.objects.all()
-            cache.set(key, cover_images)
-            return cover_images
+
+
+def lock_booking_dates(start, end, using='default'):
+    """
+    Блокирует создание бронирований на даты, которых касается интервал [start, end).
+
+    В PostgreSQL берёт транзакционные рекомендательные блокировки по каждой дате
+    (в порядке возрастания, чтобы избежать взаимоблокировок). В остальных СУБД
+    блокирует строки столов через `select_for_update`. Должна вызываться
+    внутри `transaction.atomic`.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        list(Table.objects.using(using).select_for_update().order_by('id').values_list('id', flat=True))
+        return
+
+    day = timezone.localdate(start)
+    last_day = timezone.localdate(end - timedelta(microseconds=1))
+    with connection.cursor() as cursor:
+        while day <= last_day:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [BOOKING_LOCK_NAMESPACE, day.toordinal()])
+            day += timedelta(days=1)
+
+
+def create_booking(reservation, select_tables, attempts=3, backoff=0.05, using='default'):
+    """
+    Атомарно сохраняет бронирование и назначает ему столы.
+
+    Внутри транзакции блокирует даты бронирования, заново определяет свободные
+    столы по базе данных (а не по кэшу движка доступности), выбирает столы и
+    сохраняет бронирование. Если транзакция проиграла гонку (нарушение
+    исключающего ограничения или взаимоблокировка), повторяет попытку с
+    экспоненциальной задержкой.
+
+    Аргументы:
+        reservation (Booking): Несохранённое бронирование.
+        select_tables (callable): Функция, принимающая список свободных столов
+            (`TableInfo`) и возвращающая идентификаторы выбранных столов или None.
+        attempts (int): Максимальное количество попыток.
+        backoff (float): Базовая задержка между попытками в секундах.
+        using (str): Псевдоним базы данных.
+
+    Возвращает:
+        Booking: Сохранённое бронирование.
+
+    Исключения:
+        TablesUnavailableError: Если свободных столов недостаточно.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            with transaction.atomic(using=using):
+                start, end = reservation.get_period()
+                lock_booking_dates(start, end, using=using)
+
+                busy_ids = set(BookingTable.objects.using(using).overlapping(start, end).values_list(
+                    'table_id', flat=True))
+                free_tables = [
+                    TableInfo(*row) for row in Table.objects.using(using).order_by('number', 'id').values_list(
+                        'id', 'number', 'capacity')
+                    if row[0] not in busy_ids
+                ]
+                table_ids = select_tables(free_tables)
+                if not table_ids:
+                    raise TablesUnavailableError("Нет доступных столиков для указанного времени.")
+
+                reservation.save(using=using)
+                # Строки столов пишутся в БД бронирования (см. `ReplicaRouter.db_for_write`).
+                reservation.tables.set(table_ids)
+                return reservation
+        except (IntegrityError, OperationalError) as error:
+            # Транзакция откатилась: бронирование нужно сохранять заново.
+            reservation.pk = None
+            reservation._state.adding = True
+            if attempt == attempts:
+                raise TablesUnavailableError("Не удалось забронировать столики, попробуйте ещё раз.") from error
+            delay = backoff * 2 ** (attempt - 1) * (1 + random.random())
+            logger.warning(f"Конфликт при бронировании на {reservation.date} {reservation.time}, "
+                           f"попытка {attempt} из {attempts}, повтор через {delay:.3f} с: {error}")
+            time.sleep(delay)
@@ -0,0 +1,211 @@
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from booking.availability import AVAILABILITY_NAMESPACE_PREFIX, availability_engine, publish_invalidation
+from booking.caching import bump_generation
+from booking.invalidation import publish, register_handler, register_prefix_handler
+from booking.models import Booking, BookingTable, CoverImage, Table
+from booking.month_availability import invalidate_all_months, invalidate_months
+from booking.occupancy import refresh_slot_occupancy
+from booking.services import COVER_IMAGES_NAMESPACE, TABLES_NAMESPACE, bookings_namespace
+from booking.tasks import promote_waitlist_task
+
+
+def _affected_days(*days):
+    """
+    Возвращает даты, на которые влияет бронирование, включая следующий день
+    для бронирований, заканчивающихся после полуночи.
+    """
+    result = set()
+    for day in days:
+        if day is not None:
+            result.update((day, day + timedelta(days=1)))
+    return result
+
+
+def _invalidate_bookings_cache(*days):
+    """
+    Сбрасывает кэш бронирований на указанные даты.
+    """
+    bump_generation(*(bookings_namespace(day) for day in set(days) if day is not None))
+
+
+def _invalidate_days(days):
+    """
+    Сбрасывает данные движка доступности и кэш календаря месяцев сразу и повторно
+    после фиксации транзакции, чтобы параллельные запросы не закэшировали
+    незафиксированное состояние. После фиксации сброс дат движка публикуется для
+    остальных процессов.
+    """
+    def invalidate():
+        availability_engine.invalidate(*days)
+        invalidate_months(*days)
+
+    def invalidate_and_publish():
+        invalidate()
+        publish_invalidation(*days)
+
+    invalidate()
+    transaction.on_commit(invalidate_and_publish)
+
+
+@receiver(post_init, sender=Booking)
+def remember_booking_schedule(sender, instance, **kwargs):
+    """
+    Запоминает исходные дату, время и продолжительность бронирования,
+    чтобы после сохранения определить, что изменилось.
+    """
+    # Читаем через __dict__, чтобы не вызывать загрузку отложенных полей.
+    instance._original_schedule = (
+        instance.__dict__.get('date'),
+        instance.__dict__.get('time'),
+        instance.__dict__.get('duration'),
+    )
+
+
+@receiver(post_save, sender=Booking)
+def sync_booking_schedule(sender, instance, created, **kwargs):
+    """
+    Переносит новый интервал бронирования в строки `BookingTable` и `SlotOccupancy`
+    и сбрасывает доступность столов на затронутые даты.
+    """
+    schedule = (instance.date, instance.time, instance.duration)
+    if not created and schedule != instance._original_schedule:
+        start, end = instance.get_period()
+        BookingTable.objects.filter(booking=instance).update(start=start, end=end)
+        refresh_slot_occupancy(BookingTable.objects.filter(booking=instance))
+    _invalidate_days(_affected_days(instance._original_schedule[0], instance.date))
+    _invalidate_bookings_cache(instance._original_schedule[0], instance.date)
+    instance._original_schedule = schedule
+
+
+@receiver(post_delete, sender=Booking)
+def invalidate_booking_availability(sender, instance, **kwargs):
+    """
+    Сбрасывает доступность столов и кэш бронирований на даты удалённого бронирования.
+    """
+    _invalidate_days(_affected_days(instance._original_schedule[0], instance.date))
+    _invalidate_bookings_cache(instance._original_schedule[0], instance.date)
+
+
+@receiver(post_delete, sender=Booking)
+def promote_waitlist_on_cancel(sender, instance, **kwargs):
+    """
+    После фиксации отмены бронирования запускает перевод листа ожидания в
+    бронирования на освободившееся время. Удаление уже закончившегося
+    бронирования (например, при архивации) ничего не освобождает.
+    """
+    if instance.get_period()[1] <= timezone.now():
+        return
+    args = (instance.date.isoformat(), str(instance.time), int(instance.duration.total_seconds()))
+    transaction.on_commit(lambda: promote_waitlist_task.delay(*args))
+
+
+@receiver(m2m_changed, sender=Booking.tables.through)
+def sync_booking_tables(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """
+    Заполняет интервалы и занятость слотов (`SlotOccupancy`) новых строк
+    `BookingTable` и поддерживает движок доступности в актуальном состоянии при
+    изменении столов бронирования. При удалении строк `BookingTable` занятость
+    слотов удаляется каскадно. Кэш бронирований затронутых дат сбрасывается.
+
+    Интервал записывается отдельным UPDATE в ту же БД (`using`), что и строки
+    связи, поэтому в PostgreSQL исключающее ограничение срабатывает внутри той же
+    транзакции, что и добавление столов.
+    """
+    if reverse and action == 'pre_clear':
+        # После очистки связей со стороны стола даты его бронирований уже не получить.
+        instance._cleared_booking_dates = set(instance.reservations.values_list('date', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if reverse:
+        if action == 'post_clear':
+            _invalidate_bookings_cache(*getattr(instance, '_cleared_booking_dates', ()))
+        else:
+            _invalidate_bookings_cache(*Booking.objects.filter(pk__in=pk_set).values_list('date', flat=True))
+        if action == 'post_add':
+            for booking in Booking.objects.using(using).filter(pk__in=pk_set):
+                start, end = booking.get_period()
+                BookingTable.objects.using(using).filter(booking=booking, table=instance).update(start=start, end=end)
+            refresh_slot_occupancy(BookingTable.objects.using(using).filter(table=instance, booking_id__in=pk_set))
+        # Изменение со стороны стола затрагивает бронирования на произвольные даты,
+        # поэтому остальные процессы сбрасывают движок целиком событием сброса столов.
+        availability_engine.clear()
+        invalidate_all_months()
+        transaction.on_commit(lambda: publish(TABLES_NAMESPACE))
+        return
+
+    _invalidate_bookings_cache(instance.date)
+    if action == 'post_add':
+        start, end = instance.get_period()
+        booking_tables = BookingTable.objects.using(using).filter(booking=instance, table_id__in=pk_set)
+        booking_tables.filter(start__isnull=True).update(start=start, end=end)
+        refresh_slot_occupancy(booking_tables)
+        availability_engine.occupy(instance.date, instance.time, instance.duration, pk_set)
+        days = _affected_days(instance.date)
+        transaction.on_commit(lambda: publish_invalidation(*days))
+    else:
+        _invalidate_days(_affected_days(instance.date))
+
+
+@receiver(post_save, sender=BookingTable)
+def refresh_booking_table_occupancy(sender, instance, **kwargs):
+    """
+    Обновляет занятость слотов при прямом сохранении строки `BookingTable`
+    (например, во встроенной форме администратора).
+    """
+    refresh_slot_occupancy(BookingTable.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=BookingTable)
+@receiver(post_delete, sender=BookingTable)
+def invalidate_booking_table(sender, instance, **kwargs):
+    """
+    Сбрасывает доступность столов и кэш бронирований при прямом сохранении или
+    удалении строки `BookingTable` (например, во встроенной форме администратора).
+    """
+    if instance.start is not None:
+        _invalidate_days(_affected_days(timezone.localdate(instance.start)))
+        _invalidate_bookings_cache(timezone.localdate(instance.start))
+    else:
+        _invalidate_bookings_cache(*Booking.objects.filter(pk=instance.booking_id).values_list('date', flat=True))
+
+
+@receiver(post_save, sender=Table)
+@receiver(post_delete, sender=Table)
+def invalidate_tables(sender, instance, **kwargs):
+    """
+    Сбрасывает движок доступности, кэш календаря и кэш списка столов при
+    изменении списка столов. Остальные процессы сбрасывают движок доступности по
+    событию сброса кэша (см. обработчик, зарегистрированный ниже).
+    """
+    availability_engine.clear()
+    invalidate_all_months()
+    bump_generation(TABLES_NAMESPACE, broadcast=True)
+
+
+def _invalidate_published_day(day):
+    """
+    Сбрасывает дату движка доступности по событию из другого процесса (см. `publish_invalidation`).
+    """
+    availability_engine.invalidate(date.fromisoformat(day))
+
+
+# Движок доступности других процессов сбрасывается по событию сброса кэша столов,
+# а отдельные даты — по событиям сброса дат.
+register_handler(TABLES_NAMESPACE, availability_engine.clear)
+register_prefix_handler(AVAILABILITY_NAMESPACE_PREFIX, _invalidate_published_day)
+
+
+@receiver(post_save, sender=CoverImage)
+@receiver(post_delete, sender=CoverImage)
+def invalidate_cover_images(sender, instance, **kwargs):
+    """
+    Сбрасывает кэш обложек при их изменении.
+    """
+    bump_generation(COVER_IMAGES_NAMESPACE, broadcast=True)
@@ -1,6 +1,7 @@
 from celery import shared_task
 from django.core.mail import send_mail
 from django.conf import settings
+from datetime import date, timedelta
 import logging
 
 # Создаем логгер для отслеживания событий отправки электронных писем.
@@ -39,3 +40,63 @@ def send_confirmation_email_task(subject, message, recipient_list):
         recipient_list,
         fail_silently=False,
     )
+
+
+@shared_task
+def promote_waitlist_task(booking_date, booking_time, duration_seconds):
+    """
+    Задача Celery для перевода записей листа ожидания в бронирования.
+
+    Запускается после отмены бронирования и передает освободившийся интервал в
+    `booking.waitlist.promote_waitlist`.
+
+    Параметры:
+    - `booking_date` (`str`): Дата отмененного бронирования в формате ISO.
+    - `booking_time` (`str`): Время отмененного бронирования в формате ISO.
+    - `duration_seconds` (`int`): Продолжительность отмененного бронирования в секундах.
+
+    Возвращает:
+    - Идентификаторы созданных бронирований.
+    """
+    from booking.waitlist import promote_waitlist
+
+    promoted = promote_waitlist(date.fromisoformat(booking_date), booking_time, timedelta(seconds=duration_seconds))
+    return [entry.booking_id for entry in promoted]
+
+
+@shared_task
+def manage_booking_partitions_task():
+    """
+    Задача Celery для обслуживания секций таблицы бронирований.
+
+    Запускается ежедневно по расписанию Celery beat: создает секции на
+    `BOOKING_PARTITION_MONTHS_AHEAD` месяцев вперед и отсоединяет секции старше
+    `BOOKING_PARTITION_RETENTION_MONTHS` месяцев, предварительно перенося их
+    бронирования в архив (см. `booking.partitions`).
+
+    Возвращает:
+    - Словарь с месяцами созданных и отсоединенных секций.
+    """
+    from booking.partitions import manage_partitions
+
+    created, detached = manage_partitions()
+    return {'created': [month.isoformat() for month in created],
+            'detached': [month.isoformat() for month in detached]}
+
+
+@shared_task
+def archive_bookings_task():
+    """
+    Задача Celery для архивации прошедших бронирований.
+
+    Запускается ежедневно по расписанию Celery beat: переносит бронирования
+    старше `BOOKING_ARCHIVE_AFTER_DAYS` дней в gzip-архив в `BOOKING_ARCHIVE_DIR`
+    и удаляет их из базы данных (см. `booking.archive`).
+
+    Возвращает:
+    - Словарь с путем к архиву и количеством удаленных бронирований.
+    """
+    from booking.archive import archive_bookings
+
+    path, deleted = archive_bookings()
+    return {'path': path, 'deleted': deleted}
@@ -1,8 +1,40 @@
-from django.test import TestCase, Client
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, Client, override_settings
 from django.urls import reverse
 from users.models import User
-from booking.models import Booking, Table
-from datetime import datetime, timedelta
+from booking.assignment import assign_tables
+from booking.availability import TableInfo, availability_engine, availability_namespace, interval_masks
+from booking.models import Booking, BookingTable, CoverImage, SlotOccupancy, Table, WaitlistEntry
+from booking.views import ReservationListView
+from booking.tasks import promote_waitlist_task, send_confirmation_email_task
+from booking.waitlist import promote_waitlist, waiting_candidates
+from django.core import mail
+from django.core.management import CommandError, call_command
+from io import StringIO
+from booking.holds import (HOLD_SESSION_KEY, RedisHoldStore, acquire_hold, get_hold, get_hold_store, held_table_ids,
+                           hold_day_ranges, release_hold)
+from booking.month_availability import get_month_availability
+from booking.pagination import EstimatedCountPaginator
+from booking.query_plans import explain_queries, hot_queries, seed_bookings, sequential_scans
+from booking.cache_backends import InstrumentedLocMemCache, key_prefix, latency_bucket
+from booking.services import (TablesUnavailableError, create_booking, get_bookings_from_cache,
+                              get_cover_images_from_cache, get_tables_from_cache)
+from django.core.cache import cache
+from booking import archive, caching, invalidation, partitions
+import json
+import redis
+import threading
+import time as time_module
+from unittest import mock, skipUnless
+from django.db import IntegrityError, connection, connections, transaction
+from config.db_router import REPLICA_PIN_SESSION_KEY, primary_reads, replica_reads
+from config.query_budget import QueryBudgetTestMixin, views_without_budget
+from config.query_profiler import find_repeated_queries, normalize_sql
+from config.slow_queries import params_shape
+from config.query_tracking import QueryRecorder
+import os
+import tempfile
+from django.utils import timezone
+from datetime import date, datetime, time, timedelta
 
 
 class ReservationCreateViewTest(TestCase):
@@ -71,12 +103,13 @@ class ReservationCreateViewTest(TestCase):
         """
         valid_time = "20:00"
         # Создаем бронирование, чтобы занять все столики
-        Booking.objects.create(
+        booking = Booking.objects.create(
             date=(datetime.now() + timedelta(days=1)).date(),
             time=valid_time,
             guests=4,
             email='existing@example.com'
         )
+        booking.tables.set(Table.objects.all())
 
         data = {
             'date': (datetime.now() + timedelta(days=1)).date(),  # Дата на завтра
@@ -103,3 +136,1629 @@ class ReservationCreateViewTest(TestCase):
         self.client.logout()  # Выходим из системы
         response = self.client.get(self.url)
         self.assertRedirects(response, f'/users/login/?next={self.url}')
+
+
+class AvailabilityEngineTest(TestCase):
+    """
+    Тесты для движка доступности столов на битовых масках.
+    """
+
+    def setUp(self):
+        """
+        Создает три стола и сбрасывает состояние движка доступности.
+        """
+        self.tables = [Table.objects.create(number=i, capacity=2) for i in range(1, 4)]
+        self.day = date.today() + timedelta(days=1)
+        availability_engine.clear()
+
+    def book(self, day, start, *tables, duration=timedelta(hours=2)):
+        """
+        Создает бронирование указанных столов.
+        """
+        booking = Booking.objects.create(date=day, time=start, guests=2, duration=duration)
+        booking.tables.set(tables)
+        return booking
+
+    def free_numbers(self, day, start):
+        """
+        Возвращает номера свободных столов.
+        """
+        return [table.number for table in availability_engine.free_tables(day, start)]
+
+    def test_interval_masks(self):
+        """
+        Проверяет построение масок, включая переход через полночь.
+        """
+        self.assertEqual(interval_masks(time(20, 0)), (0b1111 << 40, 0))
+        self.assertEqual(interval_masks(time(23, 0)), (0b11 << 46, 0b11))
+        self.assertEqual(interval_masks(time(20, 15), timedelta(hours=1)), (0b111 << 40, 0))
+
+    def test_booking_started_earlier_blocks_table(self):
+        """
+        Бронирование, начавшееся раньше запрошенного слота, занимает стол.
+        """
+        self.book(self.day, time(19, 0), self.tables[0])
+        self.assertEqual(self.free_numbers(self.day, "20:00"), [2, 3])
+        self.assertEqual(self.free_numbers(self.day, "21:00"), [1, 2, 3])
+
+    def test_booking_past_midnight(self):
+        """
+        Бронирование после полуночи учитывается на следующий день и наоборот.
+        """
+        next_day = self.day + timedelta(days=1)
+        self.book(self.day, time(23, 30), self.tables[0])
+        self.book(next_day, time(0, 30), self.tables[1])
+        self.assertEqual(self.free_numbers(next_day, "00:00"), [3])
+        self.assertEqual(self.free_numbers(self.day, "23:00"), [3])
+
+    def test_engine_follows_booking_changes(self):
+        """
+        Изменения и удаление бронирования сразу отражаются в доступности.
+        """
+        booking = self.book(self.day, time(20, 0), self.tables[0])
+        self.assertEqual(self.free_numbers(self.day, "20:00"), [2, 3])
+
+        booking.tables.add(self.tables[1])
+        self.assertEqual(self.free_numbers(self.day, "20:00"), [3])
+
+        booking.time = time(12, 0)
+        booking.save()
+        self.assertEqual(self.free_numbers(self.day, "20:00"), [1, 2, 3])
+
+        booking.time = time(20, 0)
+        booking.save()
+        booking.delete()
+        self.assertEqual(self.free_numbers(self.day, "20:00"), [1, 2, 3])
+
+    def test_check_view_on_last_supported_date(self):
+        """
+        Проверка столов на последний день `date` возвращает 0, а не ошибку сервера.
+        """
+        response = self.client.get(reverse('booking:check_available_tables'),
+                                   {'date': '9999-12-31', 'time': '23:30', 'guests': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'count': 0})
+
+
+class BookingTableTest(TestCase):
+    """
+    Тесты для интервалов занятости столов в `BookingTable`.
+    """
+
+    def setUp(self):
+        """
+        Создает стол и бронирование на завтра в 20:00.
+        """
+        self.table = Table.objects.create(number=1, capacity=2)
+        self.day = date.today() + timedelta(days=1)
+        self.booking = Booking.objects.create(date=self.day, time=time(20, 0), guests=2)
+        self.booking.tables.set([self.table])
+
+    def test_period_filled_on_assignment(self):
+        """
+        При назначении стола интервал заполняется из бронирования.
+        """
+        row = BookingTable.objects.get(booking=self.booking)
+        start = timezone.make_aware(datetime.combine(self.day, time(20, 0)))
+        self.assertEqual((row.start, row.end), (start, start + timedelta(hours=2)))
+
+    def test_period_follows_booking_update(self):
+        """
+        Изменение времени бронирования переносится в интервалы столов.
+        """
+        self.booking.time = time(23, 30)
+        self.booking.save()
+        row = BookingTable.objects.get(booking=self.booking)
+        self.assertEqual(timezone.localtime(row.end).date(), self.day + timedelta(days=1))
+
+    def test_overlapping(self):
+        """
+        Поиск пересечений учитывает бронирования, начавшиеся раньше запрошенного интервала.
+        """
+        start = timezone.make_aware(datetime.combine(self.day, time(21, 0)))
+        self.assertTrue(BookingTable.objects.overlapping(start, start + timedelta(hours=2)).exists())
+        self.assertFalse(BookingTable.objects.overlapping(
+            start + timedelta(hours=1), start + timedelta(hours=3)).exists())
+
+    def test_single_join_table(self):
+        """
+        Связь со стороны стола и со стороны бронирования хранится в одной таблице.
+        """
+        other = Booking.objects.create(date=self.day, time=time(12, 0), guests=2)
+        self.table.reservations.add(other)
+        self.assertEqual(set(self.table.reservations.all()), {self.booking, other})
+        self.assertEqual(list(other.tables.all()), [self.table])
+        self.assertEqual(BookingTable.objects.filter(table=self.table).count(), 2)
+        self.assertIsNotNone(BookingTable.objects.get(booking=other).start)
+
+
+class CreateBookingServiceTest(TestCase):
+    """
+    Тесты для транзакционного сервиса бронирования `create_booking`.
+    """
+
+    def setUp(self):
+        """
+        Создает два стола и заготовку бронирования на завтра.
+        """
+        self.tables = [Table.objects.create(number=i, capacity=2) for i in range(1, 3)]
+        self.day = date.today() + timedelta(days=1)
+
+    def make_reservation(self, guests=2):
+        """
+        Возвращает несохранённое бронирование на 20:00.
+        """
+        return Booking(date=self.day, time=time(20, 0), guests=guests, name='Test', email='test@example.com')
+
+    def test_books_free_tables(self):
+        """
+        Сервис сохраняет бронирование и назначает свободный стол.
+        """
+        reservation = create_booking(self.make_reservation(), lambda free: assign_tables(free, 2))
+        self.assertIsNotNone(reservation.pk)
+        self.assertEqual(list(reservation.tables.all()), [self.tables[0]])
+
+    def test_rechecks_availability_in_database(self):
+        """
+        Занятые столы не назначаются повторно, а при их нехватке бронирование не сохраняется.
+        """
+        create_booking(self.make_reservation(4), lambda free: assign_tables(free, 4))
+        with self.assertRaises(TablesUnavailableError):
+            create_booking(self.make_reservation(), lambda free: assign_tables(free, 2))
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_retries_after_lost_race(self):
+        """
+        После конфликта транзакции сервис повторяет попытку.
+        """
+        calls = []
+
+        def select(free_tables):
+            calls.append(len(free_tables))
+            if len(calls) == 1:
+                raise IntegrityError('conflicting key value violates exclusion constraint')
+            return assign_tables(free_tables, 2)
+
+        with self.assertLogs('booking.services', 'WARNING'):
+            reservation = create_booking(self.make_reservation(), select, backoff=0)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(Booking.objects.filter(pk=reservation.pk).count(), 1)
+
+
+class AssignTablesTest(TestCase):
+    """
+    Тесты для подбора столов по вместимости `assign_tables`.
+    """
+
+    @staticmethod
+    def floor(*capacities):
+        """
+        Возвращает зал из столов указанной вместимости, пронумерованных по порядку.
+        """
+        return [TableInfo(number, number, capacity) for number, capacity in enumerate(capacities, start=1)]
+
+    def test_prefers_least_wasted_seats(self):
+        """
+        Компания из 6 гостей садится за один стол на 6, а не за три стола.
+        """
+        self.assertEqual(assign_tables(self.floor(6, 6, 6, 2, 4), 6), [1])
+        self.assertEqual(assign_tables(self.floor(6, 2, 4), 5), [1])
+        self.assertEqual(assign_tables(self.floor(4, 4, 2), 6), [1, 3])
+
+    def test_prefers_fewer_tables_on_equal_waste(self):
+        """
+        При одинаковом количестве пустых мест выбирается меньше столов.
+        """
+        self.assertEqual(assign_tables(self.floor(2, 2, 2, 6), 6), [4])
+
+    def test_not_enough_seats(self):
+        """
+        Если мест недостаточно, возвращается None.
+        """
+        self.assertIsNone(assign_tables(self.floor(2, 4), 7))
+        self.assertIsNone(assign_tables([], 2))
+
+
+class DayAvailabilityViewTest(TestCase):
+    """
+    Тесты для представления доступности слотов даты `DayAvailabilityView`.
+    """
+
+    def setUp(self):
+        """
+        Создает два стола на двоих и бронирование первого стола на завтра в 20:00.
+        """
+        availability_engine.clear()
+        self.tables = [Table.objects.create(number=i, capacity=2) for i in range(1, 3)]
+        self.day = date.today() + timedelta(days=1)
+        booking = Booking.objects.create(date=self.day, time=time(20, 0), guests=2)
+        booking.tables.set([self.tables[0]])
+        self.url = reverse('booking:day_availability')
+
+    def get_slots(self, guests):
+        """
+        Возвращает доступность слотов в виде словаря по времени.
+        """
+        response = self.client.get(self.url, {'date': self.day.isoformat(), 'guests': guests})
+        self.assertEqual(response.status_code, 200)
+        return {slot['time']: slot for slot in response.json()['slots']}
+
+    def test_returns_all_slots(self):
+        """
+        Ответ содержит все 48 слотов с учетом занятых столов.
+        """
+        slots = self.get_slots(2)
+        self.assertEqual(len(slots), 48)
+        self.assertEqual(slots['20:00'], {'time': '20:00', 'count': 1, 'available': True})
+        self.assertEqual(slots['12:00']['count'], 2)
+
+    def test_marks_slots_where_party_does_not_fit(self):
+        """
+        Слоты, где компанию нельзя рассадить, отмечаются недоступными.
+        """
+        slots = self.get_slots(4)
+        self.assertFalse(slots['18:30']['available'])
+        self.assertFalse(slots['21:30']['available'])
+        self.assertTrue(slots['22:00']['available'])
+
+    def test_single_request_is_served_from_memory(self):
+        """
+        Повторный запрос той же даты не обращается к базе данных.
+        """
+        self.get_slots(2)
+        with self.assertNumQueries(0):
+            self.get_slots(4)
+
+    def test_invalid_date(self):
+        """
+        Некорректная дата возвращает ошибку 400.
+        """
+        response = self.client.get(self.url, {'date': 'завтра', 'guests': 2})
+        self.assertEqual(response.status_code, 400)
+
+    def test_date_out_of_range(self):
+        """
+        Дата в крайнем поддерживаемом году возвращает ошибку 400, а не ошибку сервера.
+        """
+        for value in ('9999-12-31', '0001-01-01'):
+            response = self.client.get(self.url, {'date': value, 'guests': 2})
+            self.assertEqual(response.status_code, 400, value)
+
+    def test_invalid_guests(self):
+        """
+        Количество гостей меньше одного возвращает ошибку 400.
+        """
+        for guests in (-3, 0):
+            response = self.client.get(self.url, {'date': self.day.isoformat(), 'guests': guests})
+            self.assertEqual(response.status_code, 400, guests)
+
+
+class MonthAvailabilityTest(TestCase):
+    """
+    Тесты для календаря доступности на месяц.
+    """
+
+    def setUp(self):
+        """
+        Создает стол на двоих и выбирает следующий месяц.
+        """
+        self.table = Table.objects.create(number=1, capacity=2)
+        first_of_month = date.today().replace(day=1)
+        self.month_start = (first_of_month + timedelta(days=32)).replace(day=1)
+
+    def book_whole_day(self, day):
+        """
+        Бронирует единственный стол на все слоты дня.
+        """
+        for hour in range(0, 24, 2):
+            booking = Booking.objects.create(date=day, time=time(hour, 0), guests=2)
+            booking.tables.set([self.table])
+
+    def days(self, guests=2):
+        """
+        Возвращает доступность дней месяца в виде словаря по дате.
+        """
+        days = get_month_availability(self.month_start.year, self.month_start.month, guests)
+        return {item['date']: item for item in days}
+
+    def test_free_and_full_days(self):
+        """
+        Полностью занятый день отмечается как full, остальные дни свободны.
+        """
+        full_day = self.month_start + timedelta(days=4)
+        self.book_whole_day(full_day)
+        days = self.days()
+        self.assertTrue(days[full_day.isoformat()]['full'])
+        self.assertEqual(days[self.month_start.isoformat()]['available_slots'], 48)
+        self.assertTrue(days[self.month_start.isoformat()]['full'] is False)
+
+    def test_cache_invalidated_on_booking_change(self):
+        """
+        Изменение бронирования в месяце сбрасывает кэш календаря.
+        """
+        day = self.month_start + timedelta(days=2)
+        self.assertEqual(self.days()[day.isoformat()]['available_slots'], 48)
+
+        booking = Booking.objects.create(date=day, time=time(20, 0), guests=2)
+        booking.tables.set([self.table])
+        # Слоты 18:30-21:30 конфликтуют с бронированием на 20:00-22:00.
+        self.assertEqual(self.days()[day.isoformat()]['available_slots'], 41)
+
+        booking.delete()
+        self.assertEqual(self.days()[day.isoformat()]['available_slots'], 48)
+
+    def test_party_larger_than_free_seats(self):
+        """
+        Компанию больше вместимости зала нельзя рассадить ни в один день.
+        """
+        self.assertTrue(all(day['full'] for day in self.days(guests=3).values()))
+
+    def test_view(self):
+        """
+        Представление возвращает все дни месяца.
+        """
+        response = self.client.get(reverse('booking:month_availability'),
+                                   {'month': self.month_start.strftime('%Y-%m'), 'guests': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['days']), len(self.days()))
+
+    def test_view_rejects_invalid_parameters(self):
+        """
+        Месяц за пределами поддерживаемых годов и количество гостей меньше одного отклоняются с ошибкой 400.
+        """
+        month = self.month_start.strftime('%Y-%m')
+        for params in ({'month': '9999-12'}, {'month': '0001-01'}, {'month': '2030-13'},
+                       {'month': month, 'guests': -2}, {'month': month, 'guests': 0}):
+            response = self.client.get(reverse('booking:month_availability'), params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class SlotOccupancyTest(TestCase):
+    """
+    Тесты для инкрементального обновления занятости слотов `SlotOccupancy`.
+    """
+
+    def setUp(self):
+        """
+        Создает два стола и бронирование на завтра в 23:00 на первый стол.
+        """
+        self.tables = [Table.objects.create(number=i, capacity=2) for i in range(1, 3)]
+        self.day = date.today() + timedelta(days=1)
+        self.booking = Booking.objects.create(date=self.day, time=time(23, 0), guests=2)
+        self.booking.tables.set([self.tables[0]])
+
+    def occupancy(self):
+        """
+        Возвращает занятость слотов в виде отсортированного списка.
+        """
+        return sorted(SlotOccupancy.objects.values_list('date', 'slot', 'table__number'))
+
+    def test_rows_follow_bookings(self):
+        """
+        Занятость создается, переносится и удаляется вместе с бронированием.
+        """
+        next_day = self.day + timedelta(days=1)
+        self.assertEqual(self.occupancy(), [(self.day, 46, 1), (self.day, 47, 1), (next_day, 0, 1), (next_day, 1, 1)])
+
+        self.booking.tables.add(self.tables[1])
+        self.booking.time = time(12, 0)
+        self.booking.save()
+        self.assertEqual(self.occupancy(), [(self.day, slot, number) for slot in range(24, 28) for number in (1, 2)])
+
+        self.booking.tables.remove(self.tables[0])
+        self.assertEqual({number for _, _, number in self.occupancy()}, {2})
+
+        self.booking.delete()
+        self.assertEqual(self.occupancy(), [])
+
+    def test_rebuild_command(self):
+        """
+        Команда обнаруживает расхождения и восстанавливает занятость.
+        """
+        call_command('rebuild_slot_occupancy', '--verify', stdout=StringIO())
+
+        SlotOccupancy.objects.filter(slot=46).delete()
+        with self.assertRaises(CommandError):
+            call_command('rebuild_slot_occupancy', '--verify', stdout=StringIO())
+
+        call_command('rebuild_slot_occupancy', stdout=StringIO())
+        self.assertEqual(len(self.occupancy()), 4)
+
+
+class TableHoldTest(TestCase):
+    """
+    Тесты для удержания столов, пока гость заполняет форму бронирования.
+    """
+
+    def setUp(self):
+        """
+        Создает два стола на двоих и авторизованного пользователя.
+        """
+        availability_engine.clear()
+        get_hold_store().clear()
+        self.tables = [Table.objects.create(number=i, capacity=2) for i in range(1, 3)]
+        self.free_tables = [TableInfo(table.id, table.number, table.capacity) for table in self.tables]
+        self.day = date.today() + timedelta(days=1)
+        User.objects.create_user(email='guest@example.com', password='12345')
+        self.client.login(email='guest@example.com', password='12345')
+
+    def test_held_tables_are_not_offered_twice(self):
+        """
+        Второй гость получает другой стол, третьему столов не остается до снятия удержания.
+        """
+        first = acquire_hold(self.day, '23:00', 2, self.free_tables)
+        second = acquire_hold(self.day, '22:00', 2, self.free_tables)
+        self.assertEqual(first.table_ids, [self.tables[0].id])
+        self.assertEqual(second.table_ids, [self.tables[1].id])
+        self.assertIsNone(acquire_hold(self.day, '23:30', 2, self.free_tables))
+
+        # Удержание после полуночи учитывается на следующую дату
+        self.assertEqual(held_table_ids(self.day + timedelta(days=1), '00:30'), {self.tables[0].id})
+        self.assertEqual(held_table_ids(self.day, '23:00', exclude_token=first.token), {self.tables[1].id})
+
+        release_hold(first.token)
+        self.assertIsNone(get_hold(first.token))
+        self.assertEqual(acquire_hold(self.day, '23:30', 2, self.free_tables).table_ids, [self.tables[0].id])
+
+    def test_hold_on_last_supported_date(self):
+        """
+        Удержание на последний день `date` отклоняется с ошибкой 400, а не ошибкой сервера.
+        """
+        response = self.client.post(reverse('booking:hold_tables'),
+                                    {'date': '9999-12-31', 'time': '23:30', 'guests': 2})
+        self.assertEqual(response.status_code, 400)
+
+    def test_expired_hold_is_ignored(self):
+        """
+        Истекшее удержание не блокирует столы.
+        """
+        with self.settings(TABLE_HOLD_TTL=-1):
+            hold = acquire_hold(self.day, '20:00', 4, self.free_tables)
+        self.assertIsNone(get_hold(hold.token))
+        self.assertEqual(held_table_ids(self.day, '20:00'), set())
+
+    def test_hold_becomes_booking(self):
+        """
+        Удержание из сессии превращается в бронирование тех же столов и снимается,
+        а другим гостям удержанный стол не предлагается.
+        """
+        other = acquire_hold(self.day, '20:00', 2, self.free_tables)
+        response = self.client.post(reverse('booking:hold_tables'),
+                                    {'date': self.day.isoformat(), 'time': '20:00', 'guests': 2})
+        self.assertEqual(response.json()['tables'], 1)
+        token = self.client.session[HOLD_SESSION_KEY]
+        self.assertEqual(get_hold(token).table_ids, [self.tables[1].id])
+
+        slots = self.client.get(reverse('booking:day_availability'),
+                                {'date': self.day.isoformat(), 'guests': 2}).json()['slots']
+        self.assertEqual(slots[40], {'time': '20:00', 'count': 1, 'available': True})
+
+        response = self.client.post(reverse('booking:reservation_new'), {
+            'date': self.day.isoformat(), 'time': '20:00', 'guests': 2, 'name': 'Guest',
+            'phone_number': '1234567890', 'email': 'guest@example.com',
+        })
+        self.assertEqual(response.status_code, 302)
+        booking = Booking.objects.get(email='guest@example.com')
+        self.assertEqual(list(booking.tables.values_list('id', flat=True)), [self.tables[1].id])
+        self.assertIsNone(get_hold(token))
+        self.assertNotIn(HOLD_SESSION_KEY, self.client.session)
+        self.assertIsNotNone(get_hold(other.token))
+
+
+# Redis для проверки Lua-скриптов удержаний; отдельная база, чтобы не задеть данные приложения.
+REDIS_TEST_URL = os.getenv('REDIS_TEST_URL') or 'redis://localhost:6379/15'
+
+
+def redis_available():
+    """
+    Проверяет, доступен ли Redis по адресу `REDIS_TEST_URL`.
+    """
+    try:
+        return redis.from_url(REDIS_TEST_URL, socket_connect_timeout=0.5).ping()
+    except redis.RedisError:
+        return False
+
+
+@skipUnless(redis_available(), 'Redis недоступен')
+class RedisHoldStoreTest(SimpleTestCase):
+    """
+    Тесты для Lua-скриптов удержания столов в Redis (`RedisHoldStore`).
+    """
+
+    def setUp(self):
+        self.client = redis.from_url(REDIS_TEST_URL)
+        self.store = RedisHoldStore(self.client)
+        self.day = date(2099, 1, 1)
+        self.days = [self.day, self.day + timedelta(days=1)]
+        self.addCleanup(self.client.delete, *[f'table_holds:{day.isoformat()}' for day in self.days],
+                        'table_hold:first', 'table_hold:second')
+
+    def test_acquire_and_conflict(self):
+        """
+        Пересекающееся удержание того же стола другим гостем отклоняется с номером стола,
+        удержание другого стола или другого времени записывается.
+        """
+        ranges = hold_day_ranges(self.day, time(23, 0))
+        self.assertEqual(self.store.acquire('first', ranges, [1], 'record', 60), 0)
+        self.assertEqual(self.store.record('first'), b'record')
+        self.assertEqual(self.store.members(self.days), [['first:1:46:48'], ['first:1:0:2']])
+
+        self.assertEqual(self.store.acquire('second', hold_day_ranges(self.day, time(22, 0)), [1], 'record', 60), 1)
+        self.assertEqual(self.store.acquire('second', hold_day_ranges(self.day, time(18, 0)), [1], 'record', 60), 0)
+        self.assertEqual(self.store.acquire('second', ranges, [2], 'record', 60), 0)
+        # Повторный захват тем же гостем заменяет его прежние удержания
+        self.assertEqual(sorted(self.store.members(self.days)[0]), ['first:1:46:48', 'second:2:46:48'])
+
+    def test_expired_hold_is_removed(self):
+        """
+        Истекшее удержание не мешает захвату стола и не возвращается.
+        """
+        ranges = hold_day_ranges(self.day, time(20, 0))
+        self.store.acquire('first', ranges, [1], 'record', 0.001)
+        time_module.sleep(0.01)
+        self.assertIsNone(self.store.record('first'))
+        self.assertEqual(self.store.members([self.day]), [[]])
+        self.assertEqual(self.store.acquire('second', ranges, [1], 'record', 60), 0)
+        self.assertEqual(self.store.members([self.day]), [['second:1:40:44']])
+
+    def test_release(self):
+        """
+        Освобождение удаляет описание и удержания только этого гостя на всех датах.
+        """
+        self.store.acquire('first', hold_day_ranges(self.day, time(23, 0)), [1], 'record', 60)
+        self.store.acquire('second', hold_day_ranges(self.day, time(12, 0)), [2], 'record', 60)
+        self.store.release('first', self.days)
+        self.assertIsNone(self.store.record('first'))
+        self.assertEqual(self.store.members(self.days), [['second:2:24:28'], []])
+        self.assertEqual(self.store.record('second'), b'record')
+
+
+class WaitlistTest(TestCase):
+    """
+    Тесты для листа ожидания и перевода записей в бронирования при отмене.
+    """
+
+    def setUp(self):
+        """
+        Создает стол на четверых, занятый бронированием на завтра в 20:00.
+        """
+        availability_engine.clear()
+        get_hold_store().clear()
+        self.table = Table.objects.create(number=1, capacity=4)
+        self.day = date.today() + timedelta(days=1)
+        self.user = User.objects.create_user(email='guest@example.com', password='12345')
+        self.client.login(email='guest@example.com', password='12345')
+        self.booking = Booking.objects.create(date=self.day, time=time(20, 0), guests=4, customer_user=self.user)
+        self.booking.tables.set([self.table])
+
+    def add_entry(self, start, guests, day=None):
+        return WaitlistEntry.objects.create(date=day or self.day, time=start, guests=guests, name='Guest',
+                                            email=f'wait{guests}@example.com', phone_number='123')
+
+    def test_candidates_overlap_freed_interval(self):
+        """
+        Кандидаты выбираются по дате и слоту с учетом перехода через полночь.
+        """
+        early = self.add_entry(time(18, 30), 2)
+        late = self.add_entry(time(21, 30), 2)
+        self.add_entry(time(18, 0), 2)
+        after = self.add_entry(time(22, 0), 2)
+        self.assertEqual(list(waiting_candidates(self.day, time(20, 0))), [early, late])
+
+        next_day = self.add_entry(time(0, 30), 2, day=self.day + timedelta(days=1))
+        self.add_entry(time(1, 0), 2, day=self.day + timedelta(days=1))
+        self.assertEqual(list(waiting_candidates(self.day, time(23, 0))), [late, after, next_day])
+
+    def test_cancel_promotes_best_fit(self):
+        """
+        Отмена бронирования переводит в бронирование компанию, лучше всего
+        занимающую освободившийся стол, и отправляет гостю письмо.
+        """
+        small = self.add_entry(time(20, 0), 2)
+        large = self.add_entry(time(20, 30), 4)
+
+        # Задачи Celery выполняются синхронно, как их выполнил бы воркер после фиксации транзакции.
+        with mock.patch('booking.signals.promote_waitlist_task.delay', side_effect=promote_waitlist_task) as promote, \
+                mock.patch('booking.waitlist.send_confirmation_email_task.delay',
+                           side_effect=send_confirmation_email_task):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse('booking:cancel_reservation', kwargs={'pk': self.booking.pk}))
+                promote.assert_not_called()
+        self.assertEqual(response.status_code, 302)
+        promote.assert_called_once_with(self.day.isoformat(), '20:00:00', 7200)
+
+        large.refresh_from_db()
+        small.refresh_from_db()
+        self.assertEqual(large.status, WaitlistEntry.STATUS_PROMOTED)
+        self.assertEqual(list(large.booking.tables.all()), [self.table])
+        self.assertEqual(small.status, WaitlistEntry.STATUS_WAITING)
+        self.assertEqual([message.to for message in mail.outbox], [['wait4@example.com']])
+
+    def test_promotion_reads_primary_database(self):
+        """
+        Свободные столы для перевода берутся из базы данных, а не из устаревшего
+        движка доступности процесса, выполняющего задачу.
+        """
+        entry = self.add_entry(time(20, 0), 4)
+        self.booking.delete()
+        with mock.patch.object(availability_engine, 'free_tables', return_value=[]):
+            self.assertEqual(promote_waitlist(self.day, time(20, 0)), [entry])
+        entry.refresh_from_db()
+        self.assertEqual(list(entry.booking.tables.all()), [self.table])
+
+    def test_join_waitlist(self):
+        """
+        Гость без свободных столов получает кнопку листа ожидания и встает в него.
+        """
+        data = {'date': self.day.isoformat(), 'time': '20:00', 'guests': 4, 'name': 'Guest',
+                'phone_number': '123', 'email': 'guest@example.com'}
+        response = self.client.post(reverse('booking:reservation_new'), data)
+        self.assertEqual(response.context['waitlist_url'], reverse('booking:waitlist_new'))
+
+        response = self.client.post(reverse('booking:waitlist_new'), data)
+        self.assertRedirects(response, reverse('booking:reservation_list'))
+        entry = WaitlistEntry.objects.get()
+        self.assertEqual((entry.slot, entry.customer_user), (40, self.user))
+
+
+@mock.patch('booking.services.CACHE_ENABLED', True)
+class ServicesCacheTest(TestCase):
+    """
+    Тесты для версионированного кэша столов, бронирований и обложек в `booking.services`.
+    """
+
+    def setUp(self):
+        """
+        Создает стол и бронирование на завтра.
+        """
+        cache.clear()
+        self.table = Table.objects.create(number=1, capacity=2)
+        self.day = date.today() + timedelta(days=1)
+        self.booking = Booking.objects.create(date=self.day, time=time(20, 0), guests=2, name='Guest')
+        self.booking.tables.set([self.table])
+
+    def test_tables_invalidated_on_change(self):
+        """
+        Список столов берется из кэша и обновляется после изменения стола.
+        """
+        self.assertEqual(get_tables_from_cache(), [TableInfo(self.table.id, 1, 2)])
+        with self.assertNumQueries(0):
+            get_tables_from_cache()
+
+        self.table.capacity = 4
+        self.table.save()
+        self.assertEqual(get_tables_from_cache(), [TableInfo(self.table.id, 1, 4)])
+
+    def test_bookings_cached_per_date(self):
+        """
+        Бронирования кэшируются по датам: изменение другой даты не сбрасывает кэш,
+        а изменение бронирования даты сразу видно.
+        """
+        bookings = get_bookings_from_cache(self.day)
+        self.assertEqual([(booking['name'], booking['table_ids']) for booking in bookings],
+                         [('Guest', [self.table.id])])
+
+        Booking.objects.create(date=self.day + timedelta(days=1), time=time(20, 0), guests=2)
+        with self.assertNumQueries(0):
+            get_bookings_from_cache(self.day)
+
+        self.booking.name = 'Edited'
+        self.booking.save()
+        self.assertEqual(get_bookings_from_cache(self.day)[0]['name'], 'Edited')
+
+        self.booking.tables.clear()
+        self.assertEqual(get_bookings_from_cache(self.day)[0]['table_ids'], [])
+
+        self.booking.date = self.day + timedelta(days=2)
+        self.booking.save()
+        self.assertEqual(get_bookings_from_cache(self.day), [])
+
+    def test_cover_images_invalidated_on_delete(self):
+        """
+        Список обложек обновляется после удаления обложки.
+        """
+        cover = CoverImage.objects.create(title='Обложка', image='covers/cover.jpg')
+        self.assertEqual(get_cover_images_from_cache(),
+                         [{'id': cover.id, 'title': 'Обложка', 'image': 'covers/cover.jpg'}])
+        cover.delete()
+        self.assertEqual(get_cover_images_from_cache(), [])
+
+
+class GetOrBuildTest(TestCase):
+    """
+    Тесты для защиты от одновременного пересчета в `booking.caching.get_or_build`.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def builder(self, value='fresh', delay=0):
+        """
+        Возвращает функцию пересчета, считающую свои вызовы.
+        """
+        def build():
+            self.calls += 1
+            time_module.sleep(delay)
+            return value
+        return build
+
+    def store_expired(self, value):
+        """
+        Сохраняет значение, срок которого истек, но которое еще можно отдавать.
+        """
+        key = f'test:v{caching.get_generation("test")}:key'
+        cache.set(key, (value, time_module.time() - 1, 0.1), 60)
+        return key
+
+    def test_single_flight_on_cold_key(self):
+        """
+        При одновременных промахах значение вычисляет только один поток.
+        """
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            caching.get_or_build('test', 'key', self.builder(delay=0.2)))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['fresh'] * 8)
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_value_served_while_other_worker_rebuilds(self):
+        """
+        Пока другой процесс пересчитывает значение, отдается прежнее.
+        """
+        key = self.store_expired('stale')
+        cache.add(f'{key}:lock', 1, 10)
+        self.assertEqual(caching.get_or_build('test', 'key', self.builder()), 'stale')
+        self.assertEqual(self.calls, 0)
+
+    def test_cold_key_wait_is_capped(self):
+        """
+        Без прежнего значения запрос ждет чужой пересчет не дольше `LOCK_WAIT_TIMEOUT`,
+        а затем вычисляет значение сам, не сохраняя его в кэш.
+        """
+        key = f'test:v{caching.get_generation("test")}:key'
+        cache.add(f'{key}:lock', 1, 10)
+        started = time_module.monotonic()
+        with mock.patch.object(caching, 'LOCK_WAIT_TIMEOUT', 0.1):
+            self.assertEqual(caching.get_or_build('test', 'key', self.builder()), 'fresh')
+        self.assertLess(time_module.monotonic() - started, 1)
+        self.assertEqual(self.calls, 1)
+        self.assertIsNone(cache.get(key))
+
+    def test_expired_value_rebuilt(self):
+        """
+        Истекшее значение пересчитывается и сохраняется.
+        """
+        self.store_expired('stale')
+        self.assertEqual(caching.get_or_build('test', 'key', self.builder()), 'fresh')
+        self.assertEqual(caching.get_or_build('test', 'key', self.builder('other')), 'fresh')
+        self.assertEqual(self.calls, 1)
+
+    def test_new_generation_never_serves_stale(self):
+        """
+        После увеличения версии прежнее значение не отдается.
+        """
+        caching.get_or_build('test', 'key', self.builder('old'))
+        caching.bump_generation('test')
+        self.assertEqual(caching.get_or_build('test', 'key', self.builder()), 'fresh')
+
+
+class LocalCacheTest(TestCase):
+    """
+    Тесты для LRU-кэша процесса `booking.caching.LocalCache`.
+    """
+
+    def test_lru_eviction_ttl_and_counters(self):
+        """
+        Кэш вытесняет самую давно использованную запись, учитывает время жизни и считает попадания.
+        """
+        local = caching.LocalCache(max_entries=2, timeout=60)
+        local.set('tables', 'a', 1)
+        local.set('tables', 'b', 2)
+        self.assertEqual(local.get('tables', 'a'), 1)
+        local.set('covers', 'c', 3)
+        self.assertIsNone(local.get('tables', 'b'))
+        self.assertEqual(local.stats(), {'hits': 1, 'misses': 1, 'size': 2, 'max_entries': 2})
+
+        local.delete_namespace('tables')
+        self.assertIsNone(local.get('tables', 'a'))
+        self.assertEqual(local.get('covers', 'c'), 3)
+
+        expired = caching.LocalCache(max_entries=2, timeout=-1)
+        expired.set('tables', 'a', 1)
+        self.assertIsNone(expired.get('tables', 'a'))
+
+    def test_eviction_during_read_is_not_lost(self):
+        """
+        Значение, прочитанное до сброса пространства имен, не сохраняется в кэше процесса.
+        """
+        cache.clear()
+        caching.local_cache.clear()
+
+        def build():
+            # Событие сброса пришло, пока значение читалось из Redis
+            caching.local_cache.delete_namespace('test')
+            return 'old'
+
+        self.assertEqual(caching.get_or_build('test', 'key', build, local=True), 'old')
+        self.assertIsNone(caching.local_cache.get('test', 'key'))
+        caching.bump_generation('test')
+        self.assertEqual(caching.get_or_build('test', 'key', lambda: 'new', local=True), 'new')
+        self.assertEqual(caching.local_cache.get('test', 'key'), 'new')
+
+    @mock.patch('booking.services.CACHE_ENABLED', True)
+    def test_home_page_skips_redis(self):
+        """
+        Главная страница берет обложку из кэша процесса без обращения к Redis и базе данных.
+        """
+        cache.clear()
+        caching.local_cache.clear()
+        CoverImage.objects.create(title='Обложка', image='covers/cover.jpg')
+        self.assertContains(self.client.get(reverse('booking:home')), 'covers/cover.jpg')
+        with mock.patch.object(cache, 'get') as cache_get, self.assertNumQueries(0):
+            self.client.get(reverse('booking:home'))
+        cache_get.assert_not_called()
+
+
+class InvalidationBusTest(TestCase):
+    """
+    Тесты для сброса кэшей процессов через Redis pub/sub (`booking.invalidation`).
+    """
+
+    def setUp(self):
+        caching.local_cache.clear()
+
+    def test_message_evicts_local_data(self):
+        """
+        Событие сброса удаляет записи пространства имен и сбрасывает движок доступности.
+        """
+        caching.local_cache.set('tables', 'list', [(1, 1, 2)])
+        caching.local_cache.set('cover_images', 'list', [])
+        availability_engine.tables()
+
+        invalidation.handle_message({'type': 'message', 'data': json.dumps({'namespaces': ['tables']})})
+        self.assertIsNone(caching.local_cache.get('tables', 'list'))
+        self.assertEqual(caching.local_cache.get('cover_images', 'list'), [])
+        self.assertIsNone(availability_engine._tables)
+
+    def test_model_change_published_after_commit(self):
+        """
+        Изменение стола публикуется для других процессов только после фиксации транзакции.
+        """
+        client = mock.Mock()
+        with self.settings(CACHE_ENABLED=True), mock.patch.object(invalidation, 'get_client', return_value=client):
+            with self.captureOnCommitCallbacks(execute=True):
+                Table.objects.create(number=1, capacity=2)
+                client.publish.assert_not_called()
+        client.publish.assert_called_once_with(invalidation.CHANNEL, json.dumps({'namespaces': ['tables']}))
+
+    def test_day_message_invalidates_availability(self):
+        """
+        Событие сброса даты сбрасывает в движке доступности только эту дату.
+        """
+        day = timezone.localdate() + timedelta(days=7)
+        other_day = day + timedelta(days=1)
+        availability_engine.day_masks(day)
+        availability_engine.day_masks(other_day)
+
+        message = json.dumps({'namespaces': [availability_namespace(day)]})
+        invalidation.handle_message({'type': 'message', 'data': message})
+        self.assertNotIn(day, availability_engine._days)
+        self.assertIn(other_day, availability_engine._days)
+
+    def test_booking_days_published_after_commit(self):
+        """
+        Изменение бронирования публикует сброс его дат для других процессов после фиксации транзакции.
+        """
+        day = timezone.localdate() + timedelta(days=7)
+        table = Table.objects.create(number=1, capacity=2)
+        client = mock.Mock()
+        with self.settings(CACHE_ENABLED=True), mock.patch.object(invalidation, 'get_client', return_value=client):
+            with self.captureOnCommitCallbacks(execute=True):
+                booking = Booking.objects.create(date=day, time=time(20, 0), guests=2)
+                booking.tables.add(table)
+                client.publish.assert_not_called()
+        published = {
+            namespace for call in client.publish.call_args_list
+            for namespace in json.loads(call.args[1])['namespaces']
+        }
+        self.assertIn(availability_namespace(day), published)
+        self.assertIn(availability_namespace(day + timedelta(days=1)), published)
+
+
+class CacheStatsTest(TestCase):
+    """
+    Тесты для статистики кэша по префиксам ключей (`booking.cache_backends`).
+    """
+
+    def setUp(self):
+        self.backend = InstrumentedLocMemCache('cache-stats-test', {})
+        self.backend.clear()
+
+    def test_counts_by_prefix(self):
+        """
+        Попадания, промахи, записи и задержки считаются по префиксу ключа.
+        """
+        self.backend.set('tables:v1:list', [1, 2, 3])
+        self.backend.get('tables:v1:list')
+        self.backend.get('tables:v1:missing')
+        self.backend.get_many(['bookings:2030-01-01:v1:list', 'tables:v1:list'])
+
+        stats = self.backend.read_stats()
+        self.assertEqual(stats['tables']['hits'], 2)
+        self.assertEqual(stats['tables']['misses'], 1)
+        self.assertEqual(stats['tables']['sets'], 1)
+        self.assertGreater(stats['tables']['set_bytes'], 0)
+        self.assertEqual(stats['tables']['get_calls'], 2)
+        self.assertAlmostEqual(stats['tables']['hit_ratio'], 2 / 3, places=3)
+        self.assertEqual(stats['bookings']['misses'], 1)
+
+        self.backend.reset_stats()
+        self.assertEqual(self.backend.read_stats(), {})
+
+    def test_helpers(self):
+        """
+        Префикс — часть ключа до двоеточия, задержки раскладываются по интервалам гистограммы.
+        """
+        self.assertEqual(key_prefix('cache_generation:tables'), 'cache_generation')
+        self.assertEqual(latency_bucket(0.3), 'le_0.5')
+        self.assertEqual(latency_bucket(3), 'le_5')
+        self.assertEqual(latency_bucket(1000), 'inf')
+
+    def test_view_staff_only(self):
+        """
+        Статистика доступна только сотрудникам.
+        """
+        User.objects.create_user(email='guest@example.com', password='12345')
+        User.objects.create_superuser(email='admin@example.com', password='12345')
+        client = Client()
+        url = reverse('booking:cache_stats')
+
+        client.login(email='guest@example.com', password='12345')
+        self.assertEqual(client.get(url).status_code, 302)
+
+        client.login(email='admin@example.com', password='12345')
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('prefixes', response.json())
+        self.assertIn('hits', response.json()['local'])
+
+    def test_command(self):
+        """
+        Команда выводит статистику в виде таблицы и JSON.
+        """
+        out = StringIO()
+        call_command('cache_stats', stdout=out)
+        self.assertIn('Кэш процесса', out.getvalue())
+
+        out = StringIO()
+        call_command('cache_stats', '--json', '--reset', stdout=out)
+        self.assertIn('"local"', out.getvalue())
+        self.assertIn('обнулена', out.getvalue())
+
+
+class QueryPlanTest(TestCase):
+    """
+    Тесты для планов частых запросов (`booking.query_plans`): запросы должны использовать индексы.
+    """
+
+    def setUp(self):
+        self.day, self.user = seed_bookings()
+
+    def test_hot_queries_use_indexes(self):
+        """
+        Ни один из частых запросов не читает таблицу полным просмотром.
+        """
+        for name, (tables, plan) in explain_queries(hot_queries(self.day, self.user, self.user.token)).items():
+            with self.subTest(name):
+                self.assertEqual(tables, [], plan)
+
+    def test_detects_sequential_scan(self):
+        """
+        Запрос по неиндексированному полю определяется как полный просмотр.
+        """
+        tables, _ = sequential_scans(Booking.objects.filter(name='План'))
+        self.assertEqual(tables, [Booking._meta.db_table])
+
+    def test_command(self):
+        """
+        Команда завершается успешно, если все запросы используют индексы.
+        """
+        out = StringIO()
+        call_command('check_query_plans', '--verbose', stdout=out)
+        self.assertIn('customer_bookings', out.getvalue())
+
+
+class AllReservationsViewTest(TestCase):
+    """
+    Тесты для списка всех бронирований с пагинацией по ключу и фильтрами.
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='12345')
+        self.guest = User.objects.create_user(email='guest@example.com', password='12345')
+        self.client = Client()
+        self.client.login(email='admin@example.com', password='12345')
+        self.url = reverse('booking:all_reservations')
+        day = date(2030, 1, 1)
+        # Одинаковые дата и время у нескольких бронирований проверяют порядок по id.
+        Booking.objects.bulk_create([
+            Booking(date=day + timedelta(days=index // 6), time=time(12 + index % 3), guests=2, name=f'Гость {index}',
+                    email='guest@example.com', phone_number='+79990000000',
+                    customer_user=self.guest if index % 2 else None)
+            for index in range(25)
+        ])
+        self.ordered = list(Booking.objects.order_by('date', 'time', 'id').values_list('id', flat=True))
+
+    def ids(self, response):
+        return [reservation.id for reservation in response.context['reservations']]
+
+    def test_pages_follow_key_order(self):
+        """
+        Страницы вперед и назад проходят все бронирования в порядке (date, time, id) без пропусков.
+        """
+        response = self.client.get(self.url)
+        pages = [self.ids(response)]
+        while response.context['page_obj'].has_next():
+            response = self.client.get(self.url, {'after': response.context['page_obj'].next_cursor})
+            pages.append(self.ids(response))
+        self.assertEqual([pk for page in pages for pk in page], self.ordered)
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+
+        response = self.client.get(self.url, {'before': response.context['page_obj'].previous_cursor})
+        self.assertEqual(self.ids(response), pages[1])
+        self.assertTrue(response.context['page_obj'].has_next())
+        response = self.client.get(self.url, {'before': response.context['page_obj'].previous_cursor})
+        self.assertEqual(self.ids(response), pages[0])
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_filters(self):
+        """
+        Бронирования фильтруются по периоду и пользователю.
+        """
+        response = self.client.get(self.url, {'date_from': '2030-01-02', 'date_to': '2030-01-03'})
+        self.assertEqual(len(self.ids(response)), 10)
+        self.assertTrue(all(date(2030, 1, 2) <= reservation.date <= date(2030, 1, 3)
+                            for reservation in response.context['reservations']))
+
+        response = self.client.get(self.url, {'customer': 'guest@example.com'})
+        self.assertTrue(all(reservation.customer_user_id == self.guest.id
+                            for reservation in response.context['reservations']))
+        self.assertIn('customer=guest%40example.com', response.content.decode())
+
+        response = self.client.get(self.url, {'customer': 'nobody@example.com'})
+        self.assertEqual(self.ids(response), [])
+
+    def test_invalid_cursor_shows_first_page(self):
+        """
+        Некорректный курсор не ломает страницу, показывается начало списка.
+        """
+        response = self.client.get(self.url, {'after': 'garbage'})
+        self.assertEqual(self.ids(response), self.ordered[:10])
+        self.assertIsNone(response.context['estimated_count'])
+
+
+class BookingAdminTest(TestCase):
+    """
+    Тесты для административного интерфейса бронирований.
+    """
+
+    def setUp(self):
+        User.objects.create_superuser(email='admin@example.com', password='12345')
+        self.client = Client()
+        self.client.login(email='admin@example.com', password='12345')
+        self.table = Table.objects.create(number=7, capacity=4)
+        self.booking = Booking.objects.create(date=date(2030, 1, 1), time=time(19), guests=2, name='Гость',
+                                              email='guest@example.com', phone_number='+79990000000')
+
+    def test_changelist_and_change_form(self):
+        """
+        Список открывается с фильтрами по дате, форма не выводит списки всех столов и пользователей.
+        """
+        url = reverse('admin:booking_booking_changelist')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.get(url, {'date__year': 2030, 'date__month': 1, 'customer_user__isempty': 1})
+        self.assertContains(response, 'Гость')
+
+        response = self.client.get(reverse('admin:booking_booking_change', args=[self.booking.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'admin-autocomplete')
+
+    def test_table_autocomplete(self):
+        """
+        Пользователи и столы выбираются с автодополнением, столы ищутся по точному номеру.
+        """
+        response = self.client.get(reverse('admin:autocomplete'), {
+            'term': '7', 'app_label': 'booking', 'model_name': 'booking', 'field_name': 'customer_user'})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('admin:autocomplete'), {
+            'term': '7', 'app_label': 'booking', 'model_name': 'bookingtable', 'field_name': 'table'})
+        self.assertEqual([item['id'] for item in response.json()['results']], [str(self.table.pk)])
+
+    def test_paginator_counts_exactly_without_statistics(self):
+        """
+        Без статистики PostgreSQL пагинатор считает строки точно.
+        """
+        self.assertEqual(EstimatedCountPaginator(Booking.objects.order_by('id'), 10).count, 1)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Реплика имитируется отдельным файлом SQLite')
+class ReplicaRouterTest(TransactionTestCase):
+    """
+    Тесты для чтения из реплики (`config.db_router`) на двух файлах SQLite.
+
+    Второй файл играет роль реплики без репликации: данные, созданные в основной
+    БД, в нем не появляются, что позволяет увидеть, из какой БД прочитаны данные.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        handle, cls.replica_path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        connections.settings['replica_test'] = {**connections.settings['default'], 'NAME': cls.replica_path}
+        cls.databases = cls.databases | {'replica_test'}
+        call_command('migrate', database='replica_test', verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica_test'].close()
+        del connections['replica_test']
+        connections.settings.pop('replica_test')
+        os.remove(cls.replica_path)
+
+    def setUp(self):
+        override = self.settings(REPLICA_DATABASES=['replica_test'])
+        override.enable()
+        self.addCleanup(override.disable)
+
+        # Пользователь «реплицирован» в обе БД, бронирование есть только в основной.
+        self.user = User.objects.create_user(email='guest@example.com', password='12345')
+        User.objects.using('replica_test').bulk_create([User(pk=self.user.pk, email=self.user.email,
+                                                             password=self.user.password)])
+        self.booking = Booking.objects.create(date=date(2030, 1, 1), time=time(19), guests=2, name='Гость',
+                                              email='guest@example.com', phone_number='+79990000000',
+                                              customer_user=self.user)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_list_reads_from_replica_until_pinned(self):
+        """
+        Список бронирований читается из реплики, а после записи пользователя — из основной БД.
+        """
+        response = self.client.get(reverse('booking:reservation_list'))
+        self.assertEqual(list(response.context['reservations']), [])
+
+        response = self.client.post(reverse('booking:contact'), {
+            'name': 'Гость', 'email': 'guest@example.com', 'phone': '+79990000000', 'message': 'Вопрос'})
+        self.assertEqual(response.status_code, 302)
+        self.assertGreater(self.client.session[REPLICA_PIN_SESSION_KEY], time_module.time())
+
+        response = self.client.get(reverse('booking:reservation_list'))
+        self.assertEqual([reservation.pk for reservation in response.context['reservations']], [self.booking.pk])
+
+    def test_routing_rules(self):
+        """
+        Записи, транзакции и данные для общего кэша используют основную БД.
+        """
+        self.assertEqual(Booking.objects.all().db, 'default')
+        with replica_reads():
+            self.assertEqual(Booking.objects.all().db, 'replica_test')
+            self.assertFalse(Booking.objects.exists())
+            with primary_reads():
+                self.assertEqual(Booking.objects.all().db, 'default')
+            with transaction.atomic():
+                self.assertEqual(Booking.objects.all().db, 'default')
+
+            Table.objects.create(number=1, capacity=2)
+            self.assertEqual(Booking.objects.all().db, 'default')
+
+        with self.settings(REPLICA_DATABASES=[]), replica_reads():
+            self.assertEqual(Booking.objects.all().db, 'default')
+
+    def test_create_booking_writes_tables_to_its_database(self):
+        """
+        Бронирование, создаваемое в другой БД, получает строки столов и занятость слотов в той же БД.
+        """
+        with self.settings(REPLICA_DATABASES=[]):
+            table = Table.objects.using('replica_test').create(number=1, capacity=2)
+            reservation = Booking(date=date(2030, 1, 2), time=time(19), guests=2, name='Гость',
+                                  email='guest@example.com', phone_number='+79990000000')
+            create_booking(reservation, lambda free_tables: [free_tables[0].id], using='replica_test')
+
+        self.assertEqual(list(BookingTable.objects.using('replica_test').filter(booking_id=reservation.pk)
+                              .values_list('table_id', flat=True)), [table.pk])
+        self.assertTrue(SlotOccupancy.objects.using('replica_test').filter(table_id=table.pk).exists())
+        self.assertFalse(BookingTable.objects.filter(booking_id=reservation.pk).exists())
+
+    def test_availability_engine_loads_from_primary(self):
+        """
+        Представление, читающее из реплики, заполняет движок доступности данными основной БД.
+        """
+        table = Table.objects.create(number=1, capacity=2)
+        self.booking.tables.add(table)
+        availability_engine.clear()
+
+        response = self.client.get(reverse('booking:day_availability'), {'date': '2030-01-01', 'guests': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(availability_engine.tables(), (TableInfo(table.id, 1, 2),))
+        self.assertEqual(availability_engine.day_masks(date(2030, 1, 1)), {table.id: 0b1111 << 38})
+        self.assertFalse(response.json()['slots'][38]['available'])
+
+
+class BookingPartitionTest(TestCase):
+    """
+    Тесты для секционирования таблицы бронирований по месяцам (`booking.partitions`).
+    """
+
+    def test_month_helpers(self):
+        """
+        Месяцы секций считаются через границу года.
+        """
+        self.assertEqual(partitions.add_months(date(2030, 11, 15), 2), date(2031, 1, 1))
+        self.assertEqual(partitions.add_months(date(2030, 1, 31), -1), date(2029, 12, 1))
+        self.assertEqual(partitions.partition_name(date(2030, 1, 1)), 'booking_booking_p2030_01')
+
+    @skipUnless(connection.vendor != 'postgresql', 'Проверка поведения без секционирования')
+    def test_noop_without_postgres(self):
+        """
+        Без PostgreSQL таблица не секционирована, обслуживание секций ничего не делает.
+        """
+        self.assertFalse(partitions.is_partitioned())
+        self.assertEqual(partitions.manage_partitions(), ([], []))
+        with self.assertRaises(CommandError):
+            call_command('manage_booking_partitions')
+
+    @skipUnless(connection.vendor == 'postgresql', 'Секционирование есть только в PostgreSQL')
+    def test_date_filter_prunes_to_one_partition(self):
+        """
+        Запрос с условием по дате читает одну секцию, новые секции создаются и отсоединяются.
+        """
+        self.assertTrue(partitions.is_partitioned())
+        today = timezone.localdate()
+        booking = Booking.objects.create(date=today, time=time(19), guests=2, name='Гость',
+                                         email='guest@example.com', phone_number='+79990000000')
+        self.assertEqual(Booking.objects.get(pk=booking.pk).date, today)
+        self.assertEqual(partitions.scanned_partitions(Booking.objects.filter(date=today)),
+                         [partitions.partition_name(partitions.month_start(today))])
+
+        far_month = partitions.add_months(today, 30)
+        created, _ = partitions.manage_partitions(months_ahead=30, retention_months=0)
+        self.assertIn(far_month, created)
+        self.assertIn(far_month, partitions.attached_partitions())
+
+        # Секция с бронированием не отсоединяется, пока бронирование не перенесено в архив
+        booking.tables.add(Table.objects.create(number=1, capacity=2))
+        with self.assertRaises(partitions.PartitionNotEmptyError):
+            partitions.detach_partition(partitions.month_start(today))
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with self.settings(BOOKING_ARCHIVE_DIR=directory.name):
+            _, detached = partitions.manage_partitions(months_ahead=0, retention_months=1,
+                                                       today=partitions.add_months(far_month, 1))
+        self.assertIn(partitions.month_start(today), detached)
+        self.assertFalse(Booking.objects.filter(pk=booking.pk).exists())
+        self.assertFalse(BookingTable.objects.filter(booking_id=booking.pk).exists())
+        self.assertFalse(SlotOccupancy.objects.filter(booking_table__booking_id=booking.pk).exists())
+        self.assertEqual(len(os.listdir(directory.name)), 1)
+
+
+class BookingArchiveTest(TestCase):
+    """
+    Тесты для архивации и восстановления прошедших бронирований (`booking.archive`).
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.user = User.objects.create_user(email='guest@example.com', password='12345')
+        self.table = Table.objects.create(number=1, capacity=4)
+        self.today = timezone.localdate()
+        self.old = self.create_booking(self.today - timedelta(days=400), customer_user=self.user)
+        self.recent = self.create_booking(self.today - timedelta(days=10))
+
+    def create_booking(self, day, **kwargs):
+        booking = Booking.objects.create(date=day, time=time(19), guests=2, name='Гость',
+                                         email='guest@example.com', phone_number='+79990000000', **kwargs)
+        booking.tables.add(self.table)
+        return booking
+
+    def test_archive_and_restore(self):
+        """
+        Старые бронирования выгружаются в архив и удаляются, восстановление возвращает их со столами.
+        """
+        entry = WaitlistEntry.objects.create(date=self.old.date, time=time(19), guests=2, name='Guest',
+                                             email='wait@example.com', phone_number='123',
+                                             status=WaitlistEntry.STATUS_PROMOTED, booking=self.old)
+        occupancy = list(SlotOccupancy.objects.filter(booking_table__booking=self.old)
+                         .values_list('date', 'slot', 'table_id'))
+
+        availability_engine.day_masks(self.old.date)
+
+        with mock.patch('booking.tasks.promote_waitlist_task.delay') as promote:
+            with self.captureOnCommitCallbacks(execute=True):
+                path, deleted = archive.archive_bookings(chunk_size=1, directory=self.directory)
+
+        self.assertEqual(deleted, 1)
+        promote.assert_not_called()
+        self.assertEqual(os.listdir(self.directory), [os.path.basename(path)])
+        rows = list(archive.iter_archive(path))
+        self.assertEqual([row['id'] for row in rows], [self.old.pk])
+        self.assertEqual(rows[0]['tables'][0]['table_id'], self.table.pk)
+        self.assertFalse(Booking.objects.filter(pk=self.old.pk).exists())
+        self.assertFalse(BookingTable.objects.filter(booking_id=self.old.pk).exists())
+        self.assertFalse(SlotOccupancy.objects.filter(date=self.old.date).exists())
+        self.assertTrue(Booking.objects.filter(pk=self.recent.pk).exists())
+        self.assertNotIn(self.old.date, availability_engine._days)
+        entry.refresh_from_db()
+        self.assertIsNone(entry.booking_id)
+
+        out = StringIO()
+        call_command('restore_booking_archive', path, stdout=out)
+        self.assertIn('Восстановлено бронирований: 1', out.getvalue())
+        restored = Booking.objects.get(pk=self.old.pk)
+        self.assertEqual((restored.date, restored.time, restored.duration, restored.customer_user),
+                         (self.old.date, self.old.time, self.old.duration, self.user))
+        self.assertEqual(list(restored.tables.all()), [self.table])
+        self.assertEqual(sorted(SlotOccupancy.objects.filter(booking_table__booking=restored)
+                                .values_list('date', 'slot', 'table_id')), sorted(occupancy))
+
+        self.assertEqual(archive.restore_archive(path), 0)
+
+    def test_nothing_to_archive(self):
+        """
+        Без старых бронирований архив не создается.
+        """
+        self.old.delete()
+        self.assertEqual(archive.archive_bookings(directory=self.directory), (None, 0))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_restore_without_deleted_user(self):
+        """
+        Ссылка на удаленного после архивации пользователя обнуляется при восстановлении.
+        """
+        path, _ = archive.archive_bookings(directory=self.directory)
+        self.user.delete()
+        self.assertEqual(archive.restore_archive(path), 1)
+        self.assertIsNone(Booking.objects.get(pk=self.old.pk).customer_user_id)
+
+    def test_command(self):
+        """
+        Команда архивирует бронирования раньше указанной даты.
+        """
+        out = StringIO()
+        call_command('archive_bookings', before=self.today, directory=self.directory, stdout=out)
+        self.assertIn('Заархивировано и удалено бронирований: 2', out.getvalue())
+        self.assertFalse(Booking.objects.exists())
+
+
+class BookingQueryBudgetTest(QueryBudgetTestMixin, TestCase):
+    """
+    Тесты бюджетов запросов представлений бронирования (`config.query_budget`).
+    """
+
+    def setUp(self):
+        cache.clear()
+        caching.local_cache.clear()
+        availability_engine.clear()
+        self.user = User.objects.create_superuser(email='admin@example.com', password='12345')
+        self.client.login(email='admin@example.com', password='12345')
+        self.tables = [Table.objects.create(number=number, capacity=4) for number in range(1, 6)]
+        self.day = timezone.localdate() + timedelta(days=1)
+        for index in range(3):
+            booking = Booking.objects.create(date=self.day, time=time(12 + index), guests=2, name='Гость',
+                                             email='guest@example.com', phone_number='+79990000000',
+                                             customer_user=self.user)
+            booking.tables.add(*self.tables[index:index + 2])
+        self.booking = booking
+        self.form = {'date': self.day.isoformat(), 'time': '20:00', 'guests': 2, 'name': 'Гость',
+                     'phone_number': '+79990000000', 'email': 'guest@example.com'}
+
+    def test_all_views_have_budget(self):
+        """
+        У каждого представления бронирования задан бюджет запросов.
+        """
+        self.assertEqual(views_without_budget('booking'), [])
+
+    def test_pages_within_budget(self):
+        """
+        Страницы бронирования укладываются в бюджет при пустом кэше.
+        """
+        day = self.day.isoformat()
+        for url in [
+            reverse('booking:home'),
+            reverse('booking:reservation_new'),
+            reverse('booking:waitlist_new'),
+            reverse('booking:reservation_detail', args=[self.booking.pk]),
+            reverse('booking:reservation_list'),
+            reverse('booking:cancel_reservation', args=[self.booking.pk]),
+            reverse('booking:edit_reservation', args=[self.booking.pk]),
+            f"{reverse('booking:check_available_tables')}?date={day}&time=20:00&guests=2",
+            f"{reverse('booking:day_availability')}?date={day}&guests=2",
+            f"{reverse('booking:month_availability')}?month={day[:7]}&guests=2",
+            reverse('booking:cache_stats'),
+            reverse('booking:my_view'),
+            reverse('booking:contact'),
+            reverse('booking:all_reservations'),
+        ]:
+            with self.subTest(url=url):
+                self.assertEqual(self.assertQueryBudget(url).status_code, 200)
+
+    def test_changes_within_budget(self):
+        """
+        Создание, изменение, отмена бронирования, удержание столов и лист ожидания укладываются в бюджет.
+        """
+        response = self.assertQueryBudget(reverse('booking:hold_tables'), 'post', self.form)
+        self.assertTrue(response.json()['held'])
+        self.assertEqual(self.assertQueryBudget(reverse('booking:reservation_new'), 'post', self.form).status_code,
+                         302)
+        self.assertEqual(self.assertQueryBudget(reverse('booking:edit_reservation', args=[self.booking.pk]), 'post',
+                                                dict(self.form, time='22:00')).status_code, 302)
+        self.assertEqual(self.assertQueryBudget(reverse('booking:cancel_reservation', args=[self.booking.pk]),
+                                                'post').status_code, 302)
+        self.assertEqual(self.assertQueryBudget(reverse('booking:waitlist_new'), 'post',
+                                                dict(self.form, time='12:00', guests=20)).status_code, 302)
+
+    def test_budget_exceeded_fails(self):
+        """
+        Превышение бюджета завершает тест ошибкой с местами выполнения запросов.
+        """
+        with mock.patch.object(ReservationListView, 'query_budget', 1):
+            with self.assertRaises(AssertionError) as error:
+                self.assertQueryBudget(reverse('booking:reservation_list'))
+        self.assertIn('booking/reservation_list.html', str(error.exception))
+
+    @override_settings(DEBUG=True)
+    def test_middleware_logs_violation(self):
+        """
+        В режиме отладки промежуточный слой записывает превышение бюджета в журнал.
+        """
+        client = Client()
+        client.login(email='admin@example.com', password='12345')
+        with mock.patch.object(ReservationListView, 'query_budget', 1):
+            with self.assertLogs('config.query_budget', 'WARNING') as logs:
+                client.get(reverse('booking:reservation_list'))
+        self.assertIn('booking.views.ReservationListView', logs.output[0])
+        self.assertIn('при бюджете 1', logs.output[0])
+
+    def test_recorder_call_sites(self):
+        """
+        Запросы приписываются месту в коде проекта, вызвавшему ORM.
+        """
+        with QueryRecorder() as recorder:
+            list(Booking.objects.filter(date=self.day))
+        self.assertEqual(len(recorder), 1)
+        self.assertTrue(recorder.queries[0]['call_site'].startswith('booking/tests.py:'))
+
+
+class NPlusOneDetectionTest(TestCase):
+    """
+    Тесты поиска запросов N+1 (`config.query_profiler`).
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='guest@example.com', password='12345')
+        tables = [Table.objects.create(number=number, capacity=4) for number in range(1, 5)]
+        for index in range(3):
+            booking = Booking.objects.create(date=date(2030, 1, 1), time=time(12 + index), guests=2, name='Гость',
+                                             email='guest@example.com', phone_number='+79990000000',
+                                             customer_user=self.user)
+            booking.tables.add(tables[index])
+
+    def repeated(self, action):
+        with QueryRecorder() as recorder:
+            action()
+        return find_repeated_queries(recorder.queries, threshold=3)
+
+    def test_normalize_sql(self):
+        """
+        Запросы, отличающиеся значениями и длиной списка IN, имеют одну форму.
+        """
+        self.assertEqual(normalize_sql('SELECT * FROM "t" WHERE "t"."id" IN (%s, %s) LIMIT 21'),
+                         normalize_sql('SELECT * FROM "t"\n WHERE "t"."id" IN (%s) LIMIT 5'))
+
+    def test_many_to_many_suggests_prefetch(self):
+        """
+        Обращение к столам каждого бронирования подсказывает prefetch_related('tables').
+        """
+        repeated = self.repeated(lambda: [list(booking.tables.all()) for booking in Booking.objects.all()])
+        self.assertEqual(len(repeated), 1)
+        self.assertEqual(repeated[0]['count'], 3)
+        self.assertTrue(repeated[0]['call_site'].startswith('booking/tests.py:'))
+        self.assertEqual(repeated[0]['suggestion'], "prefetch_related('tables') для booking.Booking")
+        self.assertEqual(self.repeated(
+            lambda: [list(booking.tables.all()) for booking in Booking.objects.prefetch_related('tables')]), [])
+
+    def test_reverse_and_forward_relations(self):
+        """
+        Обратная связь подсказывает prefetch_related, внешний ключ — select_related.
+        """
+        repeated = self.repeated(lambda: [list(booking.booking_tables.all()) for booking in Booking.objects.all()])
+        self.assertEqual(repeated[0]['suggestion'], "prefetch_related('booking_tables') для booking.Booking")
+        repeated = self.repeated(lambda: [booking.customer_user.email for booking in Booking.objects.all()])
+        self.assertIn('booking.Booking.customer_user', repeated[0]['suggestion'])
+        self.assertTrue(repeated[0]['suggestion'].startswith('select_related()'))
+
+    @override_settings(DEBUG=True, N_PLUS_ONE_DETECTION=True)
+    def test_middleware_writes_report(self):
+        """
+        В режиме отладки для запроса с повторяющимися запросами сохраняется JSON-отчет.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        original = ReservationListView.get_context_data
+
+        def get_context_data(view, **kwargs):
+            context = original(view, **kwargs)
+            for reservation in context['reservations']:
+                list(reservation.tables.all())
+            return context
+
+        client = Client()
+        client.login(email='guest@example.com', password='12345')
+        with override_settings(N_PLUS_ONE_REPORT_DIR=directory.name), \
+                mock.patch.object(ReservationListView, 'get_context_data', get_context_data), \
+                self.assertLogs('config', 'WARNING') as logs:
+            client.get(reverse('booking:reservation_list'))
+        self.assertTrue(any(line.startswith('WARNING:config.query_profiler:') for line in logs.output))
+        [name] = os.listdir(directory.name)
+        with open(os.path.join(directory.name, name), encoding='utf-8') as file:
+            report = json.load(file)
+        self.assertEqual(report['view'], 'booking.views.ReservationListView')
+        self.assertEqual(report['repeated'][0]['count'], 3)
+        self.assertEqual(report['repeated'][0]['suggestion'], "prefetch_related('tables') для booking.Booking")
+
+
+class SlowQueryLogTest(TestCase):
+    """
+    Тесты журнала медленных запросов (`config.slow_queries`).
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='guest@example.com', password='12345')
+        self.client.login(email='guest@example.com', password='12345')
+
+    def test_params_shape(self):
+        """
+        В журнал попадают типы параметров, а не значения.
+        """
+        self.assertEqual(params_shape(('guest@example.com', 5, [1, 2])), ['str', 'int', 'list[2]'])
+        self.assertEqual(params_shape([(1, 'a'), (2, 'b')], many=True), {'rows': 2, 'params': ['int', 'str']})
+        self.assertIsNone(params_shape(None))
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=1, SLOW_QUERY_SAMPLE_RATE=1.0)
+    def test_slow_query_logged_with_view_and_call_site(self):
+        """
+        Запрос дольше порога записывается с представлением, местом в коде и формой параметров.
+        """
+        client = Client()
+        client.login(email='guest@example.com', password='12345')
+        with mock.patch('config.slow_queries.time.perf_counter', side_effect=[0, 1] * 100), \
+                self.assertLogs('config.slow_queries', 'WARNING') as logs:
+            client.get(reverse('booking:reservation_list'))
+        line = next(line for line in logs.output if 'booking_booking' in line)
+        self.assertIn('Медленный запрос 1000.0 мс (default) в booking.views.ReservationListView', line)
+        self.assertIn('из booking/', line)
+        self.assertNotIn('guest@example.com', line)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=1, SLOW_QUERY_SAMPLE_RATE=1.0)
+    def test_fast_and_unsampled_queries_not_logged(self):
+        """
+        Быстрые запросы и запросы вне выборки не записываются.
+        """
+        client = Client()
+        client.login(email='guest@example.com', password='12345')
+        with mock.patch('config.slow_queries.time.perf_counter', side_effect=[0, 0] * 100), \
+                self.assertNoLogs('config.slow_queries', 'WARNING'):
+            client.get(reverse('booking:reservation_list'))
+        with mock.patch('config.slow_queries.random.random', return_value=0.99), \
+                override_settings(SLOW_QUERY_SAMPLE_RATE=0.5), \
+                mock.patch('config.slow_queries.time.perf_counter', side_effect=[0, 1] * 100), \
+                self.assertNoLogs('config.slow_queries', 'WARNING'):
+            client.get(reverse('booking:reservation_list'))
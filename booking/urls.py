@@ -2,13 +2,17 @@ from django.urls import path
 from django.views.decorators.cache import cache_page
 from .views import (
     ReservationCreateView,
+    WaitlistCreateView,
     CancelReservationView,
     ReservationDetailView,
     ReservationListView,
     HomeView,
     ReservationUpdateView,
     CheckAvailableTablesView,
-    MyView, ContactFormView, AllReservationsView
+    DayAvailabilityView,
+    TableHoldView,
+    MonthAvailabilityView,
+    MyView, ContactFormView, AllReservationsView, CacheStatsView
 )
 from booking.apps import BookingConfig
 
@@ -17,11 +21,16 @@ app_name = BookingConfig.name
 urlpatterns = [
     path('', HomeView.as_view(), name='home'),
     path('reservation/new/', ReservationCreateView.as_view(), name='reservation_new'),
+    path('waitlist/new/', WaitlistCreateView.as_view(), name='waitlist_new'),
     path('reservation/<int:pk>/', ReservationDetailView.as_view(), name='reservation_detail'),
     path('reservations/', ReservationListView.as_view(), name='reservation_list'),
     path('reservation/<int:pk>/cancel/', CancelReservationView.as_view(), name='cancel_reservation'),
     path('reservation/edit/<int:pk>/', ReservationUpdateView.as_view(), name='edit_reservation'),
     path('check-available-tables/', CheckAvailableTablesView.as_view(), name='check_available_tables'),
+    path('day-availability/', DayAvailabilityView.as_view(), name='day_availability'),
+    path('hold-tables/', TableHoldView.as_view(), name='hold_tables'),
+    path('month-availability/', MonthAvailabilityView.as_view(), name='month_availability'),
+    path('cache-stats/', CacheStatsView.as_view(), name='cache_stats'),
     path('my-view/', cache_page(60 * 15)(MyView.as_view()), name='my_view'),
     path('contact/', ContactFormView.as_view(), name='contact'),
     path('all-reservations/', AllReservationsView.as_view(), name='all_reservations'),
@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import MAXYEAR, MINYEAR, date, datetime
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
@@ -7,14 +7,25 @@ from django.contrib.messages.views import SuccessMessageMixin
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.mail import send_mail
+from django.db import IntegrityError, transaction
 from django.http import HttpResponseRedirect, JsonResponse
 from django.shortcuts import render
 from django.urls import reverse, reverse_lazy
+from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.views.generic import CreateView, DeleteView, UpdateView, DetailView, ListView, FormView
-from booking.models import Booking, Table, CoverImage
-from .forms import ReservationForm, ContactForm
+from booking.assignment import assign_tables
+from booking.availability import availability_engine, parse_time, slot_to_time
+from booking.caching import get_cache_stats
+from booking.holds import HOLD_SESSION_KEY, acquire_hold, get_hold, held_ranges, held_table_ids, release_hold
+from booking.models import Booking, CoverImage, WaitlistEntry
+from config.db_router import ReplicaReadMixin
+from users.models import User
+from booking.month_availability import get_month_availability
+from booking.pagination import estimated_count, keyset_paginate
+from .forms import ReservationForm, ContactForm, ReservationFilterForm, WaitlistForm
+from .services import TablesUnavailableError, create_booking, get_cover_images_from_cache
 from .tasks import send_confirmation_email_task
 
 
@@ -32,10 +43,14 @@ class ReservationCreateView(LoginRequiredMixin, SuccessMessageMixin, CreateView)
         success_message (str): Сообщение об успехе после создания бронирования.
 
     Методы:
-        form_valid(form): Проверяет доступные столики и отправляет подтверждающее письмо.
+        form_valid(form): Берёт столы из удержания гостя (или подбирает свободные), атомарно сохраняет
+            бронирование и отправляет подтверждающее письмо.
         get_success_url(): Возвращает URL для перенаправления после успешного создания бронирования.
-        get_available_tables(date, time, guests): Возвращает доступные столики для заданной даты и времени.
+        get_context_data(**kwargs): Добавляет ссылку на лист ожидания, если бронирование не удалось.
+        get_available_tables(date, time, guests, exclude_token): Возвращает доступные столики для заданной даты и
+            времени без столов, удерживаемых другими гостями.
     """
+    query_budget = 18
     model = Booking
     form_class = ReservationForm
     template_name = 'booking/reservation_form.html'
@@ -44,15 +59,35 @@ class ReservationCreateView(LoginRequiredMixin, SuccessMessageMixin, CreateView)
     def form_valid(self, form):
         form.instance.customer_user = self.request.user
         reservation = form.save(commit=False)
-        tables = self.get_available_tables(
-            form.cleaned_data.get('date'),
-            form.cleaned_data.get('time'),
-            form.cleaned_data.get('guests')
-        )
+        selected_date = form.cleaned_data.get('date')
+        selected_time = form.cleaned_data.get('time')
+        guests = form.cleaned_data.get('guests')
+
+        # Столы, удержанные за гостем при выборе времени, используются без повторного подбора
+        token = self.request.session.get(HOLD_SESSION_KEY)
+        hold = get_hold(token)
+        if hold is not None and (hold.date, hold.time, hold.guests) != (
+                selected_date.isoformat(), selected_time, guests):
+            hold = None
+        tables = hold.table_ids if hold else self.get_available_tables(
+            selected_date, selected_time, guests, exclude_token=token)
+
+        def select_tables(free_tables):
+            if hold is not None and {table.id for table in free_tables}.issuperset(hold.table_ids):
+                return hold.table_ids
+            busy = held_table_ids(selected_date, selected_time, exclude_token=token)
+            return assign_tables([table for table in free_tables if table.id not in busy], guests)
 
         if tables:
-            reservation.save()
-            reservation.tables.set(tables)
+            # Столы проверяются повторно внутри транзакции с блокировкой даты,
+            # так как параллельный запрос мог занять их после проверки.
+            try:
+                create_booking(reservation, select_tables)
+            except TablesUnavailableError as error:
+                form.add_error(None, str(error))
+                return self.form_invalid(form)
+            release_hold(token)
+            self.request.session.pop(HOLD_SESSION_KEY, None)
             form.save_m2m()
             self.object = reservation
 
@@ -107,38 +142,61 @@ class ReservationCreateView(LoginRequiredMixin, SuccessMessageMixin, CreateView)
         """
         return reverse_lazy('booking:reservation_list')
 
-    def get_available_tables(self, date, time, guests):
+    def get_context_data(self, **kwargs):
+        """
+        Добавляет ссылку на лист ожидания, если бронирование не удалось.
+        """
+        context = super().get_context_data(**kwargs)
+        form = context.get('form')
+        if form is not None and form.is_bound and form.non_field_errors():
+            context['waitlist_url'] = reverse('booking:waitlist_new')
+        return context
+
+    def get_available_tables(self, date, time, guests, exclude_token=None):
         """
         Метод для получения доступных столиков на определенное время и дату с учетом количества гостей.
 
         Аргументы:
             date (date): Дата бронирования.
-            time (time): Время бронирования.
+            time (str): Время бронирования в формате 'ЧЧ:ММ'.
             guests (int): Количество гостей.
+            exclude_token (str): Токен удержания текущего гостя, столы которого не считаются занятыми.
 
         Возвращает:
-            QuerySet: Доступные столики или None, если нет доступных столиков.
+            list: Идентификаторы доступных столиков или None, если нет доступных столиков.
         """
-        time = datetime.strptime(time, "%H:%M").time()
-        datetime_booking = datetime.combine(date, time)
-        end_time = (datetime_booking + timedelta(hours=2)).time()
-        datetime_end_booking = datetime.combine(date, end_time)
+        busy = held_table_ids(date, time, exclude_token=exclude_token)
+        available_tables = [table for table in availability_engine.free_tables(date, time) if table.id not in busy]
 
-        # Поиск конфликтующих бронирований
-        conflicting_bookings = Booking.objects.filter(
-            date=date,
-            time__lt=datetime_end_booking,
-            time__gte=datetime_booking
-        )
+        # Подбор столиков с минимальным количеством пустых мест
+        return assign_tables(available_tables, guests)
 
-        reserved_tables = conflicting_bookings.values_list('tables', flat=True)
-        available_tables = Table.objects.exclude(id__in=reserved_tables)
 
-        # Выбор столиков по количеству гостей
-        tables_needed = (guests + 1) // 2
-        if available_tables.count() >= tables_needed:
-            return available_tables[:tables_needed]
-        return None
+class WaitlistCreateView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
+    """
+    Представление для постановки в лист ожидания.
+
+    Форма бронирования отправляется сюда кнопкой «Встать в лист ожидания», если
+    свободных столов нет. При отмене подходящего бронирования запись переводится
+    в бронирование автоматически (см. `booking.waitlist`).
+
+    Атрибуты:
+        model (Model): Модель, связанная с представлением, в данном случае `WaitlistEntry`.
+        form_class (Form): Форма для постановки в лист ожидания, `WaitlistForm`.
+        template_name (str): Путь к шаблону формы бронирования.
+        success_url (str): URL для перенаправления после постановки в лист ожидания.
+        success_message (str): Сообщение об успехе после постановки в лист ожидания.
+    """
+    query_budget = 3
+    model = WaitlistEntry
+    form_class = WaitlistForm
+    template_name = 'booking/reservation_form.html'
+    success_url = reverse_lazy('booking:reservation_list')
+    success_message = "Вы в листе ожидания. Мы пришлем письмо, как только освободится столик."
+
+    def form_valid(self, form):
+        form.instance.customer_user = self.request.user
+        return super().form_valid(form)
 
 
 @method_decorator(login_required, name='dispatch')
@@ -157,6 +215,7 @@ class CancelReservationView(SuccessMessageMixin, DeleteView):
     Методы:
         delete(request, *args, **kwargs): Удаляет бронирование и добавляет сообщение об успехе.
     """
+    query_budget = 8
     model = Booking
     template_name = 'booking/reservation_confirm_delete.html'
     success_url = reverse_lazy('booking:reservation_list')
@@ -181,6 +240,7 @@ class ReservationDetailView(LoginRequiredMixin, DetailView):
         template_name (str): Путь к шаблону для отображения страницы деталей бронирования.
         context_object_name (str): Имя контекста для объекта бронирования.
     """
+    query_budget = 3
     model = Booking
     template_name = 'booking/reservation_detail.html'
     context_object_name = 'reservation'
@@ -195,11 +255,13 @@ class ReservationDetailView(LoginRequiredMixin, DetailView):
 
 
 @method_decorator(login_required, name='dispatch')
-class ReservationListView(LoginRequiredMixin, ListView):
+class ReservationListView(ReplicaReadMixin, LoginRequiredMixin, ListView):
     """
     Представление для отображения списка бронирований текущего пользователя.
 
-    Требует аутентификации пользователя.
+    Требует аутентификации пользователя. Список читается из реплики БД, если она
+    настроена; после собственных изменений пользователь видит данные основной БД
+    (см. `config.db_router`).
 
     Атрибуты:
         model (Model): Модель, связанная с представлением, в данном случае `Booking`.
@@ -209,6 +271,7 @@ class ReservationListView(LoginRequiredMixin, ListView):
     Методы:
         get_queryset(): Возвращает список бронирований текущего пользователя, отсортированный по дате и времени.
     """
+    query_budget = 3
     model = Booking
     template_name = 'booking/reservation_list.html'
     context_object_name = 'reservations'
@@ -232,15 +295,17 @@ class HomeView(SuccessMessageMixin, ListView):
     Методы:
         get_queryset(): Возвращает первый объект `CoverImage` для главной страницы.
     """
+    query_budget = 3
     model = CoverImage
     template_name = 'booking/home_page.html'
     context_object_name = 'cover_image'
 
     def get_queryset(self):
         """
-        Возвращает первый объект `CoverImage`.
+        Возвращает первый объект `CoverImage`, восстановленный из закэшированных полей без запроса к базе.
         """
-        return CoverImage.objects.first()
+        cover_images = get_cover_images_from_cache()
+        return CoverImage(**cover_images[0]) if cover_images else None
 
 
 class ReservationUpdateView(LoginRequiredMixin, SuccessMessageMixin, UpdateView):
@@ -259,6 +324,7 @@ class ReservationUpdateView(LoginRequiredMixin, SuccessMessageMixin, UpdateView)
         form_valid(form): Сохраняет обновленное бронирование и отображает сообщение об успехе.
         get_success_url(): Возвращает URL для перенаправления после успешного обновления бронирования.
     """
+    query_budget = 11
     model = Booking
     form_class = ReservationForm
     template_name = 'booking/reservation_form.html'
@@ -270,11 +336,17 @@ class ReservationUpdateView(LoginRequiredMixin, SuccessMessageMixin, UpdateView)
         """
         form.instance.customer_user = self.request.user
         reservation = form.save(commit=False)
-        reservation.save()
-
-        if 'tables' in form.cleaned_data:
-            reservation.tables.set(form.cleaned_data['tables'])
-        form.save_m2m()
+        try:
+            with transaction.atomic():
+                reservation.save()
+
+                if 'tables' in form.cleaned_data:
+                    reservation.tables.set(form.cleaned_data['tables'])
+                form.save_m2m()
+        except IntegrityError:
+            # Столы бронирования уже заняты на новое время (исключающее ограничение PostgreSQL).
+            form.add_error(None, "Столы бронирования заняты в выбранное время.")
+            return self.form_invalid(form)
 
         self.object = reservation
         messages.success(self.request, self.success_message)
@@ -287,15 +359,18 @@ class ReservationUpdateView(LoginRequiredMixin, SuccessMessageMixin, UpdateView)
         return reverse('booking:reservation_detail', kwargs={'pk': self.object.pk})
 
 
-class CheckAvailableTablesView(View):
+class CheckAvailableTablesView(ReplicaReadMixin, View):
     """
     Представление для проверки доступных столиков через AJAX запрос.
 
-    Возвращает количество доступных столиков для заданной даты, времени и количества гостей.
+    Возвращает количество свободных столиков на заданные дату и время, если компанию
+    из заданного количества гостей можно за ними рассадить, иначе 0. Занятость
+    читается из реплики БД, если она настроена.
 
     Методы:
         get(request): Обрабатывает GET-запрос и возвращает количество доступных столиков в формате JSON.
     """
+    query_budget = 3
 
     def get(self, request):
         selected_date = request.GET.get('date')
@@ -307,24 +382,151 @@ class CheckAvailableTablesView(View):
         if selected_date and selected_time and guests:
             try:
                 guests_count = int(guests)
+                selected_date = date.fromisoformat(selected_date)
+                busy = held_table_ids(selected_date, selected_time,
+                                      exclude_token=request.session.get(HOLD_SESSION_KEY))
+                free_tables = [table for table in availability_engine.free_tables(selected_date, selected_time)
+                               if table.id not in busy]
+
+                # Свободные столы показываются, только если компанию можно рассадить
+                if assign_tables(free_tables, guests_count):
+                    available_tables_count = len(free_tables)
+
+            # OverflowError — дата в последний день `date`: свободные столы ищутся и на следующий день.
+            except (ValueError, ValidationError, OverflowError):
+                pass
 
-                # Получение списка занятых столов
-                reserved_tables = Booking.objects.filter(
-                    date=selected_date,
-                    time=selected_time
-                ).values_list('tables__id', flat=True)
+        return JsonResponse({'count': available_tables_count})
 
-                # Фильтрация доступных столов по количеству гостей
-                available_tables_count = Table.objects.filter(
-                    capacity__gte=guests_count
-                ).exclude(
-                    id__in=reserved_tables
-                ).count()
 
-            except (ValueError, ValidationError):
-                pass
+class DayAvailabilityView(ReplicaReadMixin, View):
+    """
+    Представление для получения доступности всех слотов даты через AJAX запрос.
 
-        return JsonResponse({'count': available_tables_count})
+    Возвращает доступность всех 48 получасовых слотов выбранной даты одним ответом,
+    чтобы форма бронирования могла отключать занятые слоты без запроса на каждое
+    изменение полей. Данные берутся из движка доступности, который загружает дату
+    одним запросом к базе данных (к реплике, если она настроена); столы, удерживаемые
+    другими гостями, считаются занятыми.
+
+    Методы:
+        get(request): Обрабатывает GET-запрос и возвращает доступность слотов в формате JSON.
+    """
+    query_budget = 3
+
+    def get(self, request):
+        try:
+            selected_date = date.fromisoformat(request.GET.get('date', ''))
+            guests_count = int(request.GET.get('guests') or 1)
+            # Слоты учитывают бронирования следующего дня, поэтому крайние годы `date` недопустимы.
+            if not MINYEAR < selected_date.year < MAXYEAR or guests_count < 1:
+                raise ValueError
+        except ValueError:
+            return JsonResponse({'error': 'Некорректные дата или количество гостей.'}, status=400)
+
+        now = timezone.localtime()
+        holds = held_ranges(selected_date, exclude_token=request.session.get(HOLD_SESSION_KEY))
+        slots = []
+        for slot, free_tables in enumerate(availability_engine.day_slots(selected_date)):
+            slot_time = slot_to_time(slot)
+            if holds:
+                busy = held_table_ids(selected_date, slot_time, ranges=holds)
+                free_tables = [table for table in free_tables if table.id not in busy]
+            is_past = (selected_date, slot_time) <= (now.date(), now.time())
+            available = not is_past and assign_tables(free_tables, guests_count) is not None
+            slots.append({
+                'time': slot_time.strftime('%H:%M'),
+                'count': len(free_tables) if available else 0,
+                'available': available,
+            })
+
+        return JsonResponse({'date': selected_date.isoformat(), 'guests': guests_count, 'slots': slots})
+
+
+class TableHoldView(LoginRequiredMixin, View):
+    """
+    Представление для удержания столов, пока гость заполняет форму бронирования.
+
+    При выборе даты, времени и количества гостей подбирает столы и атомарно
+    удерживает их в Redis на `TABLE_HOLD_TTL` секунд (см. `booking.holds`), чтобы
+    их не предложили другому гостю. Токен удержания сохраняется в сессии, и
+    `ReservationCreateView` превращает удержание в бронирование. Предыдущее
+    удержание гостя снимается.
+
+    Методы:
+        post(request): Обрабатывает POST-запрос и возвращает результат удержания в формате JSON.
+    """
+    query_budget = 7
+
+    def post(self, request):
+        try:
+            selected_date = date.fromisoformat(request.POST.get('date', ''))
+            selected_time = parse_time(request.POST.get('time', ''))
+            guests_count = int(request.POST.get('guests') or 0)
+            # Удержание и подбор столов учитывают следующий день, поэтому крайние годы `date` недопустимы.
+            if not MINYEAR < selected_date.year < MAXYEAR:
+                raise ValueError
+        except ValueError:
+            return JsonResponse({'error': 'Некорректные дата, время или количество гостей.'}, status=400)
+
+        release_hold(request.session.pop(HOLD_SESSION_KEY, None))
+
+        hold = None
+        start = timezone.make_aware(datetime.combine(selected_date, selected_time))
+        if start > timezone.now():
+            hold = acquire_hold(selected_date, selected_time, guests_count,
+                                availability_engine.free_tables(selected_date, selected_time))
+        if hold is None:
+            return JsonResponse({'held': False, 'tables': 0})
+
+        request.session[HOLD_SESSION_KEY] = hold.token
+        return JsonResponse({'held': True, 'tables': len(hold.table_ids), 'expires_in': settings.TABLE_HOLD_TTL})
+
+
+class MonthAvailabilityView(View):
+    """
+    Представление календаря доступности на месяц для выбора даты бронирования.
+
+    Возвращает для каждого дня месяца количество слотов, в которые можно рассадить
+    компанию, и признак полностью занятого дня. Все бронирования месяца читаются
+    одним запросом, результат кэшируется по месяцу (см. `booking.month_availability`).
+
+    Методы:
+        get(request): Обрабатывает GET-запрос с параметрами `month` (ГГГГ-ММ) и `guests`.
+    """
+    query_budget = 2
+
+    def get(self, request):
+        try:
+            year, month = (int(part) for part in request.GET.get('month', '').split('-'))
+            date(year, month, 1)
+            guests_count = int(request.GET.get('guests') or 1)
+            # Календарь читает бронирования соседних дней, поэтому крайние годы `date` недопустимы.
+            if not MINYEAR < year < MAXYEAR or guests_count < 1:
+                raise ValueError
+        except ValueError:
+            return JsonResponse({'error': 'Некорректный месяц или количество гостей.'}, status=400)
+
+        days = get_month_availability(year, month, guests_count)
+        return JsonResponse({'month': f'{year}-{month:02}', 'guests': guests_count, 'days': days})
+
+
+@method_decorator(user_passes_test(lambda u: u.is_staff), name='dispatch')
+class CacheStatsView(View):
+    """
+    Представление статистики кэша для сотрудников.
+
+    Возвращает в формате JSON попадания, промахи, размеры записей и гистограммы
+    задержек по префиксам ключей кэша (см. `booking.cache_backends`), а также
+    счетчики кэша процесса.
+
+    Методы:
+        get(request): Обрабатывает GET-запрос и возвращает статистику кэша в формате JSON.
+    """
+    query_budget = 2
+
+    def get(self, request):
+        return JsonResponse(get_cache_stats())
 
 
 class MyView(View):
@@ -334,6 +536,7 @@ class MyView(View):
     Методы: get(request): Обрабатывает GET-запрос, получает значение из кэша или устанавливает новое, если значение
     отсутствует.
     """
+    query_budget = 0
 
     def get(self, request):
         message = cache.get('my_key')
@@ -359,6 +562,7 @@ class ContactFormView(FormView):
         form_valid(form): Обрабатывает успешную отправку формы, отправляет email и отображает сообщение об успешной
         отправке.
     """
+    query_budget = 0
     template_name = 'booking/contact.html'
     form_class = ContactForm
     success_url = reverse_lazy('booking:home')
@@ -386,12 +590,16 @@ class ContactFormView(FormView):
 
 
 @method_decorator(user_passes_test(lambda u: u.is_superuser), name='dispatch')
-class AllReservationsView(ListView):
+class AllReservationsView(ReplicaReadMixin, ListView):
     """
     Представление для отображения всех бронирований.
 
     Данное представление предназначено для суперпользователей и отображает список всех
-    бронирований в виде таблицы. Данные пагинируются по 10 элементов на страницу.
+    бронирований в виде таблицы в порядке даты и времени. Список фильтруется по периоду
+    и пользователю и пагинируется по ключу (date, time, id) по 10 элементов на страницу:
+    соседние страницы выбираются по курсорам `after` и `before` без OFFSET и COUNT(*),
+    поэтому любая страница загружается так же быстро, как первая. Данные читаются
+    из реплики БД, если она настроена.
 
     Атрибуты:
     - `model` (`Booking`): Модель, данные которой будут отображены в представлении.
@@ -407,10 +615,42 @@ class AllReservationsView(ListView):
 
     Методы:
     - `get_queryset()`:
-      Возвращает queryset объектов модели `Booking`, который будет использоваться для отображения
-      в представлении.
+      Возвращает бронирования, отфильтрованные по параметрам `date_from`, `date_to` и `customer`.
+    - `paginate_queryset(queryset, page_size)`:
+      Возвращает страницу `KeysetPage` по курсорам из параметров запроса.
+    - `get_context_data(**kwargs)`:
+      Добавляет в контекст форму фильтров и приблизительное количество бронирований.
     """
+    query_budget = 4
     model = Booking
     template_name = 'booking/all_reservations.html'
     context_object_name = 'reservations'
     paginate_by = 10
+
+    def get_queryset(self):
+        queryset = Booking.objects.all()
+        self.filter_form = ReservationFilterForm(self.request.GET or None)
+        if not self.filter_form.is_valid():
+            return queryset
+
+        data = self.filter_form.cleaned_data
+        if data['date_from']:
+            queryset = queryset.filter(date__gte=data['date_from'])
+        if data['date_to']:
+            queryset = queryset.filter(date__lte=data['date_to'])
+        if data['customer']:
+            # Пользователь находится по уникальному индексу почты, бронирования — по индексу customer_user.
+            user_id = User.objects.filter(email=data['customer']).values_list('id', flat=True).first()
+            queryset = queryset.filter(customer_user_id=user_id) if user_id else queryset.none()
+        return queryset
+
+    def paginate_queryset(self, queryset, page_size):
+        page = keyset_paginate(queryset, page_size, after=self.request.GET.get('after'),
+                               before=self.request.GET.get('before'))
+        return None, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['filter_form'] = self.filter_form
+        context['estimated_count'] = estimated_count(self.object_list)
+        return context
@@ -0,0 +1,155 @@
+import logging
+from datetime import datetime, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from booking.assignment import assign_tables
+from booking.availability import DEFAULT_DURATION, SLOTS_PER_DAY, TableInfo, booking_slots
+from booking.holds import held_table_ids
+from booking.models import BookingTable, Table, WaitlistEntry
+from booking.services import TablesUnavailableError, create_booking
+from booking.tasks import send_confirmation_email_task
+
+logger = logging.getLogger(__name__)
+
+
+def waiting_candidates(day, start, duration=DEFAULT_DURATION):
+    """
+    Возвращает ожидающие записи, интервал которых может пересекаться с освободившимся.
+
+    Записи ищутся по частичному индексу (date, slot, created_at): для каждой
+    затронутой даты — диапазон слотов, начинающихся не раньше чем за длину
+    бронирования до освободившегося интервала и не позже его конца. Поздние
+    записи предыдущего дня и ранние записи следующего дня учитываются, если
+    интервал переходит через полночь.
+    """
+    first_slot, last_slot = booking_slots(start, duration)
+    span = booking_slots('00:00', DEFAULT_DURATION)[1]
+    low, high = first_slot - span + 1, last_slot - 1
+
+    condition = Q()
+    for offset in range(low // SLOTS_PER_DAY, high // SLOTS_PER_DAY + 1):
+        day_low = max(low - offset * SLOTS_PER_DAY, 0)
+        day_high = min(high - offset * SLOTS_PER_DAY, SLOTS_PER_DAY - 1)
+        condition |= Q(date=day + timedelta(days=offset), slot__range=(day_low, day_high))
+
+    return WaitlistEntry.objects.filter(condition, status=WaitlistEntry.STATUS_WAITING).order_by('created_at')
+
+
+def _free_tables(entry, tables):
+    """
+    Возвращает столы, свободные на время записи, по данным основной БД.
+
+    Движок доступности не используется: задача выполняется в процессе Celery,
+    данные движка которого могут еще не знать об отмене, ради которой она запущена.
+    """
+    start = timezone.make_aware(datetime.combine(entry.date, entry.time))
+    busy = set(BookingTable.objects.overlapping(start, start + entry.duration).values_list('table_id', flat=True))
+    busy |= held_table_ids(entry.date, entry.time, entry.duration)
+    return [table for table in tables if table.id not in busy]
+
+
+def _best_fit(entries):
+    """
+    Выбирает запись, которую можно рассадить с наименьшим количеством пустых мест.
+
+    При равенстве предпочитается большая компания, затем гость, раньше вставший в
+    лист ожидания.
+
+    :return: Кортеж (запись, идентификаторы столов) или None.
+    """
+    tables = [TableInfo(*row) for row in Table.objects.order_by('number', 'id').values_list('id', 'number', 'capacity')]
+    best, best_key = None, None
+    for entry in entries:
+        free_tables = _free_tables(entry, tables)
+        table_ids = assign_tables(free_tables, entry.guests)
+        if table_ids is None:
+            continue
+        capacity = sum(table.capacity for table in free_tables if table.id in table_ids)
+        key = (capacity - entry.guests, -entry.guests)
+        if best_key is None or key < best_key:
+            best, best_key = (entry, table_ids), key
+    return best
+
+
+def notify_promoted(entry):
+    """
+    Отправляет гостю подтверждение бронирования, созданного из листа ожидания.
+    """
+    booking = entry.booking
+    send_confirmation_email_task.delay(
+        "Подтверждение бронирования из листа ожидания",
+        f"""
+        Здравствуйте, {booking.name}!
+
+        Освободился столик, и ваше бронирование из листа ожидания подтверждено.
+        Дата: {booking.date}
+        Время: {booking.time}
+        Количество гостей: {booking.guests}
+        Комментарии: {booking.comments}
+
+        Если планы изменились, отмените бронирование в личном кабинете.
+
+        С уважением,
+        Ваша команда
+        """,
+        [booking.email]
+    )
+
+
+def promote_waitlist(day, start, duration=DEFAULT_DURATION):
+    """
+    Переводит записи листа ожидания в бронирования после освобождения столов.
+
+    Пока освободившихся столов хватает, выбирает наиболее подходящую запись
+    (`_best_fit`), атомарно переводит её в статус «переведена», создает
+    бронирование на подобранные столы через `create_booking` и уведомляет гостя.
+    Если столы за это время занял другой запрос, запись возвращается в ожидание.
+
+    Аргументы:
+        day (date): Дата освободившегося бронирования.
+        start (time | str): Время начала освободившегося бронирования.
+        duration (timedelta): Продолжительность освободившегося бронирования.
+
+    Возвращает:
+        list[WaitlistEntry]: Переведенные в бронирования записи.
+    """
+    now = timezone.localtime()
+    candidates = [
+        entry for entry in waiting_candidates(day, start, duration)
+        if timezone.make_aware(datetime.combine(entry.date, entry.time)) > now
+    ]
+
+    promoted = []
+    while candidates:
+        best = _best_fit(candidates)
+        if best is None:
+            break
+        entry, table_ids = best
+        candidates.remove(entry)
+
+        # Запись захватывается условным UPDATE, чтобы параллельные задачи не перевели её дважды.
+        claimed = WaitlistEntry.objects.filter(pk=entry.pk, status=WaitlistEntry.STATUS_WAITING).update(
+            status=WaitlistEntry.STATUS_PROMOTED)
+        if not claimed:
+            continue
+
+        def select_tables(free_tables):
+            return table_ids if {table.id for table in free_tables}.issuperset(table_ids) else None
+
+        booking = entry.to_booking()
+        try:
+            create_booking(booking, select_tables)
+        except TablesUnavailableError:
+            WaitlistEntry.objects.filter(pk=entry.pk).update(status=WaitlistEntry.STATUS_WAITING)
+            continue
+
+        entry.status = WaitlistEntry.STATUS_PROMOTED
+        entry.booking = booking
+        entry.save(update_fields=['status', 'booking'])
+        notify_promoted(entry)
+        logger.info(f"Запись листа ожидания {entry.pk} переведена в бронирование {booking.pk}")
+        promoted.append(entry)
+
+    return promoted
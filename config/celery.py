@@ -3,6 +3,8 @@
 from __future__ import absolute_import, unicode_literals
 import os
 from celery import Celery
+from celery.signals import task_postrun, task_prerun
+from django.db import close_old_connections
 
 # Установка переменной окружения для настроек проекта
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
@@ -15,3 +17,16 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 
 # Автоматическое обнаружение и регистрация задач из файлов tasks.py в приложениях Django
 app.autodiscover_tasks()
+
+
+@task_prerun.connect
+@task_postrun.connect
+def close_old_db_connections(**kwargs):
+    """
+    Возвращает соединения с БД в пул или закрывает устаревшие до и после каждой задачи.
+
+    Django делает это по сигналам начала и конца HTTP-запроса, которых в воркерах
+    Celery нет: без этого задача держала бы соединение из пула до конца работы
+    воркера, а постоянное соединение не проверялось бы перед использованием.
+    """
+    close_old_connections()
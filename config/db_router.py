@@ -0,0 +1,131 @@
+import contextvars
+import random
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Ключ сессии со временем, до которого чтения пользователя идут в основную БД.
+REPLICA_PIN_SESSION_KEY = 'replica_pin_until'
+
+# Реплика, выбранная для чтений текущего запроса, или None — читать из основной БД.
+_replica = contextvars.ContextVar('replica', default=None)
+
+
+def is_pinned(request):
+    """
+    Проверяет, закреплены ли чтения пользователя за основной БД после его недавней записи.
+    """
+    session = getattr(request, 'session', None)
+    return session is not None and session.get(REPLICA_PIN_SESSION_KEY, 0) > time.time()
+
+
+@contextmanager
+def replica_reads(request=None):
+    """
+    Направляет чтения внутри блока в одну из реплик `REPLICA_DATABASES`.
+
+    Чтения остаются в основной БД, если реплики не настроены, если пользователь
+    недавно что-то записал (`is_pinned`) или если чтение выполняется внутри
+    транзакции основной БД.
+    """
+    alias = None
+    if settings.REPLICA_DATABASES and not (request is not None and is_pinned(request)):
+        alias = random.choice(settings.REPLICA_DATABASES)
+    token = _replica.set(alias)
+    try:
+        yield alias
+    finally:
+        _replica.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """
+    Направляет чтения внутри блока в основную БД.
+
+    Используется для данных, которые сохраняются в общий кэш: значение, прочитанное
+    из отстающей реплики, осталось бы в кэше и после того, как реплика догонит основную БД.
+    """
+    token = _replica.set(None)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Маршрутизатор, отправляющий чтения в реплики внутри блоков `replica_reads`.
+
+    Вне этих блоков, а также для записей, миграций и чтений внутри транзакций
+    используется основная БД. После первой записи в блоке последующие чтения
+    блока тоже идут в основную БД, чтобы запрос видел собственные изменения.
+
+    Записи, связанные с объектом, сохраненным в другую (не реплику) БД, например
+    строки связи многие-ко-многим бронирования, сохраненного через `save(using=...)`,
+    идут в БД этого объекта.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        _replica.set(None)
+        instance = hints.get('instance')
+        alias = instance._state.db if instance is not None else None
+        if alias and alias not in settings.REPLICA_DATABASES:
+            return alias
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему репликацией из основной БД.
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """
+    Миксин представления, читающего данные из реплики.
+
+    Ответ рендерится внутри блока `replica_reads`, поэтому ленивые запросы из
+    шаблонов тоже идут в реплику.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with replica_reads(request):
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render') and not getattr(response, 'is_rendered', True):
+                response.render()
+            return response
+
+
+class ReplicaPinMiddleware:
+    """
+    Закрепляет чтения пользователя за основной БД на `REPLICA_PIN_SECONDS` секунд после записи.
+
+    Записью считается успешный запрос с методом, изменяющим данные (POST, PUT,
+    PATCH, DELETE), например создание бронирования: следующая страница должна
+    показать созданное бронирование, даже если реплика еще отстает.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (settings.REPLICA_DATABASES and request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+                and response.status_code < 400 and hasattr(request, 'session')):
+            request.session[REPLICA_PIN_SESSION_KEY] = time.time() + settings.REPLICA_PIN_SECONDS
+        return response
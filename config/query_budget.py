@@ -0,0 +1,143 @@
+import logging
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.urls import URLPattern, URLResolver, get_resolver, resolve
+
+from config.query_tracking import QueryRecorder
+
+logger = logging.getLogger(__name__)
+
+# Сколько мест в коде с наибольшим числом запросов выводится в отчете о превышении бюджета.
+REPORT_CALL_SITES = 10
+
+
+def query_budget(max_queries):
+    """
+    Декоратор функции-представления, задающий бюджет — максимальное число
+    запросов к базе данных за один запрос к представлению.
+
+    Для представлений-классов бюджет задается атрибутом класса `query_budget`.
+    Бюджет включает запросы промежуточных слоев (сессия, пользователь) и
+    отрисовки шаблона.
+
+    Пример:
+        @query_budget(3)
+        def verify_view(request, token):
+            ...
+    """
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+def get_query_budget(view_func):
+    """
+    Возвращает бюджет запросов представления или None, если он не задан.
+
+    Учитывает атрибут функции (`query_budget`) и атрибут класса представления,
+    обернутого `as_view()` (`view_class.query_budget`).
+    """
+    budget = getattr(view_func, 'query_budget', None)
+    if budget is None:
+        budget = getattr(getattr(view_func, 'view_class', None), 'query_budget', None)
+    return budget
+
+
+def view_name(view_func):
+    """
+    Возвращает полное имя представления для отчетов, например `booking.views.HomeView`.
+    """
+    view = getattr(view_func, 'view_class', view_func)
+    return f'{view.__module__}.{view.__qualname__}'
+
+
+def format_report(queries, limit=REPORT_CALL_SITES):
+    """
+    Возвращает строки отчета с количеством запросов по местам в коде, начиная с самых частых.
+    """
+    sites = Counter(query['call_site'] or '<вне кода проекта>' for query in queries)
+    return [f'{count} × {site}' for site, count in sites.most_common(limit)]
+
+
+def views_without_budget(*namespaces):
+    """
+    Возвращает имена маршрутов пространств имен `namespaces`, у представлений
+    которых не задан бюджет запросов.
+    """
+    missing = []
+
+    def walk(patterns, namespace):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns, pattern.namespace or namespace)
+            elif isinstance(pattern, URLPattern) and namespace in namespaces:
+                if get_query_budget(pattern.callback) is None:
+                    missing.append(f'{namespace}:{pattern.name}')
+
+    walk(get_resolver().url_patterns, None)
+    return missing
+
+
+class QueryBudgetMiddleware:
+    """
+    Промежуточный слой, записывающий в журнал превышения бюджета запросов представлений.
+
+    Работает только при `DEBUG = True`: считает все запросы к базам данных за
+    время обработки запроса и, если их больше бюджета представления (см.
+    `query_budget`), пишет предупреждение с местами в коде, откуда выполнены
+    запросы. Ответ при этом не изменяется.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        budget = getattr(request, 'query_budget', None)
+        if budget is not None and len(recorder) > budget:
+            logger.warning(
+                'Представление %s (%s %s) выполнило %s запросов при бюджете %s:\n%s',
+                request.query_budget_view, request.method, request.path, len(recorder), budget,
+                '\n'.join(format_report(recorder.queries)),
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_query_budget(view_func)
+        request.query_budget_view = view_name(view_func)
+
+
+class QueryBudgetTestMixin:
+    """
+    Миксин тестов, проверяющий, что представление укладывается в свой бюджет запросов.
+    """
+
+    def assertQueryBudget(self, url, method='get', data=None, **extra):
+        """
+        Выполняет запрос тестовым клиентом и проверяет число запросов к базам данных.
+
+        Тест не проходит, если у представления нет бюджета или бюджет превышен;
+        сообщение содержит места в коде с наибольшим числом запросов.
+
+        Возвращает:
+            HttpResponse: Ответ представления.
+        """
+        match = resolve(urlsplit(url).path)
+        budget = get_query_budget(match.func)
+        if budget is None:
+            self.fail(f'Для представления {match.view_name} не задан бюджет запросов')
+        with QueryRecorder() as recorder:
+            response = getattr(self.client, method)(url, data, **extra)
+        if len(recorder) > budget:
+            self.fail(
+                f'Представление {match.view_name} выполнило {len(recorder)} запросов при бюджете {budget}:\n'
+                + '\n'.join(format_report(recorder.queries))
+            )
+        return response
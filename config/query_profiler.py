@@ -0,0 +1,165 @@
+import json
+import logging
+import os
+import re
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+
+from config.query_budget import view_name
+from config.query_tracking import QueryRecorder
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b')
+_SPACES = re.compile(r'\s+')
+_FROM = re.compile(r'\bFROM "(\w+)"')
+_CONDITION = re.compile(r'"(\w+)"\."(\w+)" (?:= (?:%s|\?)|IN \(\.\.\.\))')
+
+
+def normalize_sql(sql):
+    """
+    Приводит SQL к форме запроса без значений: строки и числа заменяются на `?`,
+    списки `IN (%s, %s, ...)` любой длины — на `IN (...)`.
+    """
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def _models_by_table():
+    return {model._meta.db_table: model for model in apps.get_models(include_auto_created=True)}
+
+
+def suggest_fix(sql):
+    """
+    Возвращает подсказку, как заменить повторяющийся запрос одним, или None.
+
+    Условие по первичному ключу таблицы означает обращение к внешнему ключу
+    каждого объекта — подсказывается `select_related` с полями, ссылающимися на
+    модель. Условие по внешнему ключу означает обращение к обратной связи или
+    к связи многие-ко-многим — подсказывается `prefetch_related` с ее именем.
+    """
+    sql = normalize_sql(sql)
+    main_table = _FROM.search(sql)
+    if main_table is None:
+        return None
+    models = _models_by_table()
+    for table, column in _CONDITION.findall(sql.split(' WHERE ', 1)[-1]):
+        model = models.get(table)
+        field = model and next((field for field in model._meta.fields if field.column == column), None)
+        if field is None:
+            continue
+        if field.primary_key:
+            sources = [
+                f"{source._meta.label}.{relation.name}"
+                for source in models.values() if not source._meta.auto_created
+                for relation in source._meta.fields
+                if relation.is_relation and relation.related_model is model
+            ]
+            if sources:
+                return f"select_related() по внешнему ключу на {model._meta.label}: {', '.join(sorted(sources))}"
+            continue
+        if not field.is_relation:
+            continue
+        owner = field.related_model
+        for many_to_many in owner._meta.many_to_many:
+            # Связь многие-ко-многим читает связанную таблицу с присоединением промежуточной.
+            if many_to_many.remote_field.through is model and main_table.group(1) != table:
+                return f"prefetch_related('{many_to_many.name}') для {owner._meta.label}"
+        for related in owner._meta.related_objects:
+            if related.field is field and not related.many_to_many:
+                return f"prefetch_related('{related.get_accessor_name()}') для {owner._meta.label}"
+    return None
+
+
+def find_repeated_queries(queries, threshold=None):
+    """
+    Находит запросы одной формы, выполненные из одного места в коде не менее `threshold` раз.
+
+    Запросы группируются по нормализованному SQL (`normalize_sql`) и месту
+    вызова (`config.query_tracking.call_site`), поэтому один и тот же запрос из
+    разных мест считается отдельно.
+
+    Аргументы:
+        queries (list[dict]): Запросы `QueryRecorder.queries`.
+        threshold (int | None): Минимальное число повторов, по умолчанию `N_PLUS_ONE_THRESHOLD`.
+
+    Возвращает:
+        list[dict]: Группы по убыванию числа повторов: `sql`, `call_site`,
+        `count`, `duration` (суммарно, секунды) и `suggestion` (см. `suggest_fix`).
+    """
+    if threshold is None:
+        threshold = settings.N_PLUS_ONE_THRESHOLD
+    groups = defaultdict(list)
+    for query in queries:
+        groups[(normalize_sql(query['sql']), query['call_site'])].append(query)
+    repeated = [
+        {
+            'sql': sql,
+            'call_site': site,
+            'count': len(group),
+            'duration': round(sum(query['duration'] for query in group), 6),
+            'suggestion': suggest_fix(group[0]['sql']),
+        }
+        for (sql, site), group in groups.items() if len(group) >= threshold
+    ]
+    return sorted(repeated, key=lambda group: -group['count'])
+
+
+def write_report(report, directory=None):
+    """
+    Сохраняет отчет о запросах в JSON-файл в каталоге `N_PLUS_ONE_REPORT_DIR` и возвращает путь к нему.
+    """
+    directory = directory or settings.N_PLUS_ONE_REPORT_DIR
+    os.makedirs(directory, exist_ok=True)
+    slug = re.sub(r'[^\w]+', '_', report['path']).strip('_') or 'root'
+    stamp = timezone.localtime().strftime('%Y%m%dT%H%M%S%f')
+    path = os.path.join(directory, f'{stamp}_{report["method"]}_{slug}.json')
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    return path
+
+
+class NPlusOneMiddleware:
+    """
+    Промежуточный слой поиска запросов N+1 для разработки.
+
+    Работает только при `DEBUG = True` и `N_PLUS_ONE_DETECTION = True`:
+    записывает запросы к базам данных за время обработки запроса и, если
+    запрос одной формы выполняется из одного места в коде не менее
+    `N_PLUS_ONE_THRESHOLD` раз (например, обращение к `reservation.tables` в
+    цикле шаблона), сохраняет JSON-отчет с подсказками `select_related` /
+    `prefetch_related` (см. `find_repeated_queries`) и пишет путь к нему в журнал.
+    """
+
+    def __init__(self, get_response):
+        if not (settings.DEBUG and settings.N_PLUS_ONE_DETECTION):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        repeated = find_repeated_queries(recorder.queries)
+        if repeated:
+            path = write_report({
+                'method': request.method,
+                'path': request.path,
+                'view': getattr(request, 'n_plus_one_view', None),
+                'queries': len(recorder),
+                'duration': round(sum(query['duration'] for query in recorder.queries), 6),
+                'repeated': repeated,
+            })
+            logger.warning('Повторяющиеся запросы в %s %s (%s групп), отчет: %s',
+                           request.method, request.path, len(repeated), path)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.n_plus_one_view = view_name(view_func)
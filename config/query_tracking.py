@@ -0,0 +1,146 @@
+import os
+import sys
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections, models
+from django.db.models.manager import BaseManager
+
+# Классы ORM, кадры методов которых не указывают место запроса, даже если класс определен в проекте.
+_ORM_CLASSES = (models.Model, models.QuerySet, BaseManager)
+
+# Файл Django, кадры которого указывают на узел шаблона, выполнивший запрос.
+_TEMPLATE_BASE = os.path.join('django', 'template', 'base.py')
+
+# Файлы проекта, которые не бывают местом запроса: точка входа и сами средства учета запросов.
+_SKIPPED_FILES = {'manage.py', os.path.join('config', 'query_tracking.py'), os.path.join('config', 'query_budget.py')}
+
+# Путь модуля проекта по имени модуля (None для модулей библиотек).
+_module_paths = {}
+
+
+def _project_path(filename):
+    """
+    Возвращает путь файла проекта относительно `BASE_DIR` или None для файлов
+    библиотек и средств учета запросов.
+    """
+    base_dir = str(settings.BASE_DIR)
+    if not filename.startswith(base_dir) or 'site-packages' in filename:
+        return None
+    path = os.path.relpath(filename, base_dir)
+    return None if path in _SKIPPED_FILES else path
+
+
+def _in_packages(path, packages):
+    return packages is None or path.split('/', 1)[0].split(os.sep, 1)[0] in packages
+
+
+def _class_path(cls):
+    """
+    Возвращает путь файла проекта, в котором определен класс (кроме моделей,
+    QuerySet и менеджеров), или None.
+    """
+    if issubclass(cls, _ORM_CLASSES):
+        return None
+    if cls.__module__ not in _module_paths:
+        filename = getattr(sys.modules.get(cls.__module__), '__file__', None)
+        _module_paths[cls.__module__] = filename and _project_path(filename)
+    return _module_paths[cls.__module__]
+
+
+def _template_site(frame):
+    """
+    Возвращает шаблон и строку узла, если кадр — отрисовка узла шаблона Django.
+    """
+    if frame.f_code.co_name != 'render_annotated' or not frame.f_code.co_filename.endswith(_TEMPLATE_BASE):
+        return None
+    node = frame.f_locals.get('self')
+    origin, token = getattr(node, 'origin', None), getattr(node, 'token', None)
+    if origin is None or token is None:
+        return None
+    return f'{origin.template_name}:{token.lineno}'
+
+
+def call_site(frame=None, packages=None):
+    """
+    Возвращает место в коде проекта, откуда выполнен запрос к базе данных.
+
+    Кадры стека просматриваются от текущего наружу до первого кадра кода
+    проекта (`BASE_DIR` без установленных библиотек), например
+    `booking/views.py:150 in get_context_data`. Унаследованный от Django метод
+    класса проекта указывается по классу, например
+    `booking/views.py in ReservationDetailView.get_object`. Если раньше
+    встречается отрисовка узла шаблона, возвращается шаблон и строка узла,
+    например `booking/reservation_list.html:12`: запросы из шаблонов выполняются
+    после возврата из представления, и кадр представления на них не указывает.
+
+    С `packages` (например, `('booking', 'users')`) учитываются только файлы и
+    шаблоны этих приложений.
+    """
+    frame = frame or sys._getframe(1)
+    while frame is not None:
+        site = _template_site(frame)
+        if site is not None and _in_packages(site, packages):
+            return site
+        path = _project_path(frame.f_code.co_filename)
+        if path is not None and _in_packages(path, packages):
+            return f'{path}:{frame.f_lineno} in {frame.f_code.co_name}'
+        owner = frame.f_locals.get('self')
+        path = owner is not None and _class_path(type(owner))
+        if path and _in_packages(path, packages):
+            return f'{path} in {type(owner).__name__}.{frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+@contextmanager
+def wrap_all_connections(wrapper):
+    """
+    Устанавливает `connection.execute_wrapper(wrapper)` на соединения со всеми базами данных внутри блока.
+    """
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield
+
+
+class QueryRecorder:
+    """
+    Контекстный менеджер, записывающий запросы ко всем базам данных внутри блока.
+
+    Запросы перехватываются через `connection.execute_wrapper`, поэтому запись
+    не зависит от `DEBUG`. Обертки действуют на соединения текущего потока.
+
+    Атрибуты:
+        queries (list[dict]): Записанные запросы: `sql`, `alias`, `many`,
+            `duration` (секунды) и `call_site` (см. `call_site`).
+    """
+
+    def __init__(self):
+        self.queries = []
+        self._wrapped = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'alias': context['connection'].alias,
+                'many': many,
+                'duration': time.perf_counter() - started,
+                'call_site': call_site(),
+            })
+
+    def __enter__(self):
+        self._wrapped = wrap_all_connections(self)
+        self._wrapped.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._wrapped.__exit__(exc_type, exc_value, traceback)
+
+    def __len__(self):
+        return len(self.queries)
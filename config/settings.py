@@ -9,6 +9,7 @@ https://docs.djangoproject.com/en/5.1/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
+import copy
 from datetime import timedelta
 from pathlib import Path
 from dotenv import load_dotenv
@@ -49,7 +50,11 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'config.slow_queries.SlowQueryMiddleware',
+    'config.query_budget.QueryBudgetMiddleware',
+    'config.query_profiler.NPlusOneMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'config.db_router.ReplicaPinMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -91,6 +96,48 @@ DATABASES = {
     }
 }
 
+# Соединения с БД не открываются заново на каждый запрос и задачу Celery.
+# По умолчанию используется пул соединений psycopg 3 (DB_POOL_MAX_SIZE соединений на процесс):
+# соединение берется из пула на время запроса и возвращается после него, пул проверяет
+# соединение перед выдачей. При DB_POOL_MAX_SIZE=0 пул отключается, и каждый поток держит
+# постоянное соединение DB_CONN_MAX_AGE секунд с проверкой перед повторным использованием.
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE') or 10)
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE') or 2)
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT') or 10)
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE') or 600)
+
+# Проверка соединения перед использованием: для пула Django передает её в psycopg_pool.
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+if DB_POOL_MAX_SIZE:
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': min(DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE),
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
+        }
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = DB_CONN_MAX_AGE
+
+# Реплики для чтения: POSTGRES_REPLICA_HOSTS — список хостов через запятую (хост[:порт]),
+# остальные параметры подключения берутся из основной БД. Списки бронирований, страницы
+# «О нас» и поиск свободных столов читают из реплик (config.db_router.ReplicaReadMixin),
+# записи, транзакции и чтения в течение REPLICA_PIN_SECONDS секунд после записи
+# пользователя идут в основную БД.
+REPLICA_DATABASES = []
+for number, replica_host in enumerate(filter(None, (os.getenv('POSTGRES_REPLICA_HOSTS') or '').split(',')), start=1):
+    replica_host, _, replica_port = replica_host.strip().partition(':')
+    DATABASES[f'replica_{number}'] = {
+        **copy.deepcopy(DATABASES['default']),
+        'HOST': replica_host,
+        'PORT': replica_port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(f'replica_{number}')
+
+DATABASE_ROUTERS = ['config.db_router.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS') or 10)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -151,16 +198,67 @@ EMAIL_USE_SSL = os.getenv('EMAIL_USE_SSL', False) == "True"
 SERVER_EMAIL = EMAIL_HOST_USER
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
-CACHE_ENABLED = os.getenv('CACHE_ENABLED')
+CACHE_ENABLED = os.getenv('CACHE_ENABLED', False) == "True"
 
+# Бэкенды кэша собирают статистику попаданий, размеров и задержек по префиксам ключей
+# (команда cache_stats и /cache-stats/)
 if CACHE_ENABLED:
     CACHES = {
         "default": {
-            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "BACKEND": "booking.cache_backends.InstrumentedRedisCache",
             "LOCATION": os.getenv('LOCATION'),
             "TIMEOUT": 300
         }
     }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "booking.cache_backends.InstrumentedLocMemCache",
+        }
+    }
+
+# Период (в секундах) переноса статистики кэша из памяти процесса в общее хранилище
+CACHE_STATS_FLUSH_INTERVAL = int(os.getenv('CACHE_STATS_FLUSH_INTERVAL') or 10)
+
+# Размер и время жизни (в секундах) кэша редко меняющихся данных в памяти процесса перед Redis.
+# Процессы сбрасывают кэш по событиям Redis pub/sub, время жизни страхует от потерянных событий.
+LOCAL_CACHE_MAX_ENTRIES = int(os.getenv('LOCAL_CACHE_MAX_ENTRIES') or 1000)
+LOCAL_CACHE_TTL = int(os.getenv('LOCAL_CACHE_TTL') or 300)
+
+# Время жизни (в секундах) данных движка доступности столов в памяти процесса
+AVAILABILITY_CACHE_TTL = int(os.getenv('AVAILABILITY_CACHE_TTL') or 60)
+
+# Время (в секундах), на которое за гостем удерживаются столы, пока он заполняет форму бронирования
+TABLE_HOLD_TTL = int(os.getenv('TABLE_HOLD_TTL') or 90)
+
+# Начиная с какого количества строк (по статистике PostgreSQL) списки в админке не выполняют COUNT(*)
+ESTIMATED_COUNT_THRESHOLD = int(os.getenv('ESTIMATED_COUNT_THRESHOLD') or 10000)
+
+# Секционирование бронирований по месяцам (PostgreSQL): на сколько месяцев вперед создаются
+# секции и сколько прошедших месяцев остаются присоединенными (0 — секции не отсоединяются)
+BOOKING_PARTITION_MONTHS_AHEAD = int(os.getenv('BOOKING_PARTITION_MONTHS_AHEAD') or 12)
+BOOKING_PARTITION_RETENTION_MONTHS = int(os.getenv('BOOKING_PARTITION_RETENTION_MONTHS') or 0)
+
+# Архивация бронирований: через сколько дней после даты бронирование переносится в архив,
+# размер пакета чтения и удаления и каталог gzip-архивов. Архивы содержат контактные данные
+# гостей, поэтому каталог находится вне MEDIA_ROOT и не должен раздаваться веб-сервером
+BOOKING_ARCHIVE_AFTER_DAYS = int(os.getenv('BOOKING_ARCHIVE_AFTER_DAYS') or 365)
+BOOKING_ARCHIVE_CHUNK_SIZE = int(os.getenv('BOOKING_ARCHIVE_CHUNK_SIZE') or 1000)
+BOOKING_ARCHIVE_DIR = os.getenv('BOOKING_ARCHIVE_DIR') or os.path.join(BASE_DIR, 'booking_archive')
+
+# Поиск запросов N+1 при DEBUG = True: включен ли он, с какого числа повторов запроса одной
+# формы из одного места в коде сохраняется JSON-отчет и в каком каталоге
+N_PLUS_ONE_DETECTION = os.getenv('N_PLUS_ONE_DETECTION', 'True') == "True"
+N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD') or 3)
+N_PLUS_ONE_REPORT_DIR = os.getenv('N_PLUS_ONE_REPORT_DIR') or os.path.join(BASE_DIR, 'n_plus_one_reports')
+
+# Журнал медленных запросов: запросы дольше порога (в миллисекундах, 0 — журнал отключен)
+# записываются с представлением и местом в коде; проверяется случайная доля HTTP-запросов
+SLOW_QUERY_THRESHOLD_MS = int(os.getenv('SLOW_QUERY_THRESHOLD_MS') or 500)
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv('SLOW_QUERY_SAMPLE_RATE') or 0.1)
+
+# Размер (в пикселях) миниатюр аватаров в списке пользователей админки
+AVATAR_THUMBNAIL_SIZE = int(os.getenv('AVATAR_THUMBNAIL_SIZE') or 64)
 
 # Настройки для Celery
 
@@ -186,4 +284,12 @@ CELERY_BEAT_SCHEDULE = {
         'args': ('Сообщение с контактной формы ресторана «ParkKing»', 'Message Text', ['solod-spb78@yandex.ru']),  #
         # Передайте необходимые аргументы здесь
     },
+    'manage-booking-partitions': {
+        'task': 'booking.tasks.manage_booking_partitions_task',
+        'schedule': timedelta(days=1),
+    },
+    'archive-bookings': {
+        'task': 'booking.tasks.archive_bookings_task',
+        'schedule': timedelta(days=1),
+    },
 }
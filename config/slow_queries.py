@@ -0,0 +1,96 @@
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from config.query_budget import view_name
+from config.query_tracking import call_site, wrap_all_connections
+
+logger = logging.getLogger(__name__)
+
+# Приложения, кадры и шаблоны которых указываются как место медленного запроса.
+SLOW_QUERY_PACKAGES = ('booking', 'users', 'about_us')
+
+
+def params_shape(params, many=False):
+    """
+    Возвращает форму параметров запроса без значений: типы параметров, длины
+    списков и для `executemany` — количество наборов параметров.
+
+    Значения не записываются в журнал, потому что содержат контактные данные гостей.
+    """
+    def shape(value):
+        if isinstance(value, (list, tuple)):
+            return f'{type(value).__name__}[{len(value)}]'
+        return type(value).__name__
+
+    if params is None:
+        return None
+    if many:
+        rows = params if isinstance(params, (list, tuple)) else None
+        return {'rows': len(rows) if rows is not None else None, 'params': params_shape(rows[0]) if rows else None}
+    if isinstance(params, dict):
+        return {key: shape(value) for key, value in params.items()}
+    return [shape(value) for value in params]
+
+
+class SlowQueryLogger:
+    """
+    Обертка выполнения запросов (`connection.execute_wrapper`), записывающая в
+    журнал запросы дольше `threshold` секунд.
+
+    Запись содержит SQL с заполнителями вместо значений, форму параметров
+    (`params_shape`), длительность, представление и место в коде приложений
+    `SLOW_QUERY_PACKAGES`, откуда выполнен запрос. Место в коде определяется только
+    для медленных запросов, остальные запросы обходятся в замер времени.
+    """
+
+    def __init__(self, threshold, view=None):
+        self.threshold = threshold
+        self.view = view
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            if duration >= self.threshold:
+                view = self.view() if callable(self.view) else self.view
+                logger.warning(
+                    'Медленный запрос %.1f мс (%s) в %s из %s: %s; параметры: %s',
+                    duration * 1000, context['connection'].alias, view,
+                    call_site(packages=SLOW_QUERY_PACKAGES), sql, params_shape(params, many),
+                )
+
+
+def _request_view(request):
+    match = getattr(request, 'resolver_match', None)
+    return view_name(match.func) if match is not None else None
+
+
+class SlowQueryMiddleware:
+    """
+    Промежуточный слой журнала медленных запросов к базе данных.
+
+    Работает при `SLOW_QUERY_THRESHOLD_MS > 0` и `SLOW_QUERY_SAMPLE_RATE > 0`,
+    в том числе в продакшене. Запросы к базам данных проверяются только у доли
+    `SLOW_QUERY_SAMPLE_RATE` HTTP-запросов, выбранной случайно: у остальных
+    обертка не устанавливается, поэтому накладные расходы ограничены долей
+    выборки. Запросы дольше `SLOW_QUERY_THRESHOLD_MS` миллисекунд записываются
+    в журнал `config.slow_queries` (см. `SlowQueryLogger`) с именем представления.
+    """
+
+    def __init__(self, get_response):
+        if settings.SLOW_QUERY_THRESHOLD_MS <= 0 or settings.SLOW_QUERY_SAMPLE_RATE <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.SLOW_QUERY_SAMPLE_RATE:
+            return self.get_response(request)
+        slow_queries = SlowQueryLogger(settings.SLOW_QUERY_THRESHOLD_MS / 1000, lambda: _request_view(request))
+        with wrap_all_connections(slow_queries):
+            return self.get_response(request)
@@ -1,8 +1,11 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from django.utils.html import mark_safe
+from django.conf import settings
+from django.utils.html import format_html
+from booking.pagination import EstimatedCountPaginator
 from .models import User
 from .forms import UserRegisterForm, UserProfileForm
+from .utils import avatar_thumbnail_url
 
 
 class UserAdmin(BaseUserAdmin):
@@ -25,22 +28,21 @@ class UserAdmin(BaseUserAdmin):
     search_fields = ('email', 'nickname', 'first_name', 'last_name')
     ordering = ('email',)
     readonly_fields = ('avatar_tag',)
+    # Количество пользователей для больших выборок берется из статистики PostgreSQL
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     def avatar_tag(self, obj):
-        if obj.avatar:
-            return mark_safe(f'''
-                  <div style="position: relative; padding-top: 80px;">
-                      <img src="{obj.avatar.url}" style="
-                          width: 100px;
-                          height: 100px;
-                          border-radius: 10%;
-                          object-fit: cover;
-                          position: absolute;
-                          top: -10px;
-                          left: 0px;
-                      " />
-                  </div>
-              ''')
+        """
+        Показывает миниатюру аватара вместо исходного изображения.
+        """
+        url = avatar_thumbnail_url(obj.avatar)
+        if url:
+            size = settings.AVATAR_THUMBNAIL_SIZE
+            return format_html(
+                '<img src="{}" width="{}" height="{}" loading="lazy" style="border-radius: 10%; object-fit: cover;" />',
+                url, size, size
+            )
         return "-"
 
     avatar_tag.short_description = 'Avatar'
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-16 23:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0003_user_birth_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('token__isnull', False)), fields=['token'], name='user_token_idx'),
+        ),
+    ]
@@ -29,6 +29,7 @@ class User(AbstractUser):
     Метаданные:
         - verbose_name: Человеко-читаемое имя модели (единственное число).
         - verbose_name_plural: Человеко-читаемое имя модели (множественное число).
+        - indexes: Частичный индекс по токену верификации.
 
     Методы:
         - __str__: Возвращает строковое представление объекта пользователя (адрес электронной почты).
@@ -56,6 +57,10 @@ class User(AbstractUser):
     class Meta:
         verbose_name = "Пользователь"
         verbose_name_plural = "Пользователи"
+        indexes = [
+            # Поиск пользователя по токену из ссылки подтверждения (verify_view)
+            models.Index(fields=['token'], name='user_token_idx', condition=models.Q(token__isnull=False)),
+        ]
 
     def __str__(self):
         return f"{self.email}"
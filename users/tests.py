@@ -1,8 +1,15 @@
-from django.test import TestCase, Client
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.core import mail
-from .utils import generate_token
+from django.core.files.base import ContentFile
+from PIL import Image
+from config.query_budget import QueryBudgetTestMixin, views_without_budget
+from .utils import avatar_thumbnail_url, generate_token
 
 User = get_user_model()
 
@@ -136,3 +143,96 @@ class UserViewsTestCase(TestCase):
         response = self.client.get(reverse('users:email_verification'))
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'users/email_verification.html')
+
+
+class AvatarThumbnailTestCase(TestCase):
+    """
+    Тестовый класс для проверки миниатюр аватаров в админке.
+    """
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+        buffer = BytesIO()
+        Image.new('RGB', (800, 600), 'red').save(buffer, format='PNG')
+        self.user = User.objects.create_user(email='avatar@example.com', password='password123')
+        self.user.avatar.save('avatar.png', ContentFile(buffer.getvalue()))
+
+    def test_thumbnail_created_once(self):
+        """
+        Проверяет, что миниатюра имеет заданный размер и создается только при первом обращении.
+        """
+        url = avatar_thumbnail_url(self.user.avatar, size=48)
+        self.assertTrue(url.endswith('_48.jpg'))
+        path = os.path.join(self.media_root, 'users', 'thumbnails', os.path.basename(url))
+        with Image.open(path) as thumbnail:
+            self.assertEqual(thumbnail.size, (48, 48))
+
+        modified = os.path.getmtime(path)
+        self.assertEqual(avatar_thumbnail_url(self.user.avatar, size=48), url)
+        self.assertEqual(os.path.getmtime(path), modified)
+
+    def test_admin_list_uses_thumbnail(self):
+        """
+        Проверяет, что список пользователей в админке показывает миниатюры, а не исходные аватары.
+        """
+        User.objects.create_superuser(email='admin@example.com', password='password123')
+        self.client.login(email='admin@example.com', password='password123')
+        response = self.client.get(reverse('admin:users_user_changelist'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'users/thumbnails/')
+        self.assertNotContains(response, f'src="{self.user.avatar.url}"')
+
+    def test_missing_avatar(self):
+        """
+        Проверяет, что для пользователя без аватара миниатюра не создается.
+        """
+        self.assertIsNone(avatar_thumbnail_url(User(email='empty@example.com').avatar))
+
+
+class UserQueryBudgetTestCase(QueryBudgetTestMixin, TestCase):
+    """
+    Тесты бюджетов запросов представлений пользователей (`config.query_budget`).
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='test@example.com', password='password123', token='token123',
+                                             is_verified=True)
+
+    def test_all_views_have_budget(self):
+        """
+        У каждого представления пользователей задан бюджет запросов.
+        """
+        self.assertEqual(views_without_budget('users'), [])
+
+    def test_anonymous_pages_within_budget(self):
+        """
+        Страницы входа, регистрации, сброса пароля и подтверждения почты укладываются в бюджет.
+        """
+        for url in [reverse('users:login'), reverse('users:register'), reverse('users:reset_password'),
+                    reverse('users:email_verification'), reverse('users:verify_success', args=['token123'])]:
+            with self.subTest(url=url):
+                self.assertEqual(self.assertQueryBudget(url).status_code, 200)
+        self.assertQueryBudget(reverse('users:register'), 'post', {
+            'email': 'new@example.com', 'password1': 'Str0ng-pass-123', 'password2': 'Str0ng-pass-123'})
+        response = self.assertQueryBudget(reverse('users:login'), 'post',
+                                          {'username': 'test@example.com', 'password': 'password123'})
+        self.assertEqual(response.status_code, 302)
+        self.assertQueryBudget(reverse('users:reset_password'), 'post', {'email': 'test@example.com'})
+
+    def test_account_pages_within_budget(self):
+        """
+        Профиль, удаление аккаунта и выход укладываются в бюджет.
+        """
+        self.client.login(email='test@example.com', password='password123')
+        for url in [reverse('users:profile'), reverse('users:delete_account')]:
+            with self.subTest(url=url):
+                self.assertEqual(self.assertQueryBudget(url).status_code, 200)
+        self.assertQueryBudget(reverse('users:logout'), 'post')
+        self.client.login(email='test@example.com', password='password123')
+        self.assertQueryBudget(reverse('users:delete_account'), 'post')
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
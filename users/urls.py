@@ -1,6 +1,7 @@
 from django.contrib.auth.views import LogoutView
 from django.urls import path
 
+from config.query_budget import query_budget
 from users.apps import UsersConfig
 from users.views import RegisterView, ProfileView, verify_view, res_password, DeleteAccountView, \
     email_verification_view
@@ -10,7 +11,7 @@ app_name = UsersConfig.name
 
 urlpatterns = [
     path('login/', CustomLoginView.as_view(), name='login'),
-    path('logout/', LogoutView.as_view(), name='logout'),
+    path('logout/', query_budget(4)(LogoutView.as_view()), name='logout'),
     path('register/', RegisterView.as_view(), name='register'),
     path('profile/', ProfileView.as_view(), name='profile'),
     path('confirm/<token>/', verify_view, name='verify_success'),
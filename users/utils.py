@@ -1,4 +1,10 @@
+import os
 import random
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
 
 CHARS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789+-*!&$#?=@'
 """
@@ -50,3 +56,35 @@ def generate_password(length=10):
     '1A2b3C4d5E6f7G8h'
     """
     return ''.join(random.choice(CHARS) for _ in range(length))
+
+
+def avatar_thumbnail_url(avatar, size=None):
+    """
+    Возвращает URL квадратной миниатюры аватара, создавая её при первом обращении.
+
+    Миниатюра сохраняется в хранилище рядом с аватаром (`users/thumbnails/`), её имя
+    включает имя исходного файла и размер, поэтому при замене аватара создается новая.
+
+    Параметры:
+    - avatar (ImageFieldFile): Аватар пользователя.
+    - size (int, optional): Сторона миниатюры в пикселях. По умолчанию - `AVATAR_THUMBNAIL_SIZE`.
+
+    Возвращает:
+    - str | None: URL миниатюры или None, если аватара нет или его не удалось прочитать.
+    """
+    if not avatar:
+        return None
+    size = size or settings.AVATAR_THUMBNAIL_SIZE
+    stem = os.path.splitext(os.path.basename(avatar.name))[0]
+    name = f'users/thumbnails/{stem}_{size}.jpg'
+
+    if not avatar.storage.exists(name):
+        try:
+            with avatar.storage.open(avatar.name) as source, Image.open(source) as image:
+                thumbnail = ImageOps.fit(image.convert('RGB'), (size, size))
+        except (OSError, ValueError):
+            return None
+        buffer = BytesIO()
+        thumbnail.save(buffer, format='JPEG', quality=85)
+        name = avatar.storage.save(name, ContentFile(buffer.getvalue()))
+    return avatar.storage.url(name)
@@ -7,6 +7,7 @@ from .forms import UserRegisterForm, UserProfileForm, CustomAuthenticationForm
 from .models import User
 from .utils import generate_token, generate_password
 from django.contrib.auth.views import LoginView
+from config.query_budget import query_budget
 
 
 class RegisterView(CreateView):
@@ -24,6 +25,7 @@ class RegisterView(CreateView):
         template_name (str): Путь к шаблону для отображения страницы регистрации.
         success_url (str): URL, на который будет перенаправлен пользователь после успешной регистрации.
     """
+    query_budget = 4
     model = User
     form_class = UserRegisterForm
     template_name = 'users/register.html'
@@ -52,6 +54,7 @@ class RegisterView(CreateView):
         return super().form_valid(form)
 
 
+@query_budget(2)
 def verify_view(request, token):
     """
     Функция для верификации пользователя по уникальному токену.
@@ -69,6 +72,7 @@ def verify_view(request, token):
     return render(request, 'users/verify.html')
 
 
+@query_budget(3)
 def res_password(request):
     """
     Функция для сброса пароля пользователя. Отправляет новый пароль на
@@ -111,6 +115,7 @@ class ProfileView(UpdateView):
         form_class (Form): Форма для обновления профиля пользователя, `UserProfileForm`.
         success_url (str): URL, на который будет перенаправлен пользователь после успешного обновления профиля.
     """
+    query_budget = 4
     model = User
     form_class = UserProfileForm
     success_url = reverse_lazy('users:profile')
@@ -139,6 +144,7 @@ class CustomLoginView(LoginView):
         form_class (Form): Форма для аутентификации, `CustomAuthenticationForm`.
         template_name (str): Путь к шаблону для отображения страницы входа.
     """
+    query_budget = 9
     form_class = CustomAuthenticationForm
     template_name = 'users/login.html'
 
@@ -156,6 +162,7 @@ class DeleteAccountView(LoginRequiredMixin, DeleteView):
         template_name (str): Путь к шаблону для отображения страницы удаления аккаунта.
         success_url (str): URL для перенаправления после успешного удаления аккаунта.
     """
+    query_budget = 8
     model = User
     template_name = 'users/delete_account.html'
     success_url = reverse_lazy('users:login')
@@ -177,6 +184,7 @@ class DeleteAccountView(LoginRequiredMixin, DeleteView):
         return self.request.user
 
 
+@query_budget(0)
 def email_verification_view(request):
     """
     Представление для отображения страницы подтверждения регистрации по электронной почте.